@@ -8,7 +8,10 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from ai.constants import INITIAL_PROMPT_GENERAL, INITIAL_PROMPT_EVENT_GENERATION
 from events.models import Event
+from events.occurrences import materialize_occurrences
+from sync.changelog import record_calendar_change
 from calendars.models import Calendar
+from calendars.membership import invalidate_visible_calendars
 
 import requests
 import json
@@ -203,6 +206,7 @@ def create_events_from_data(events_data, user):
     :raises ValueError: If the event data is invalid or incomplete.
     """
     calendar = Calendar.objects.create(user=user, title="SMART", description="")
+    invalidate_visible_calendars([user.pk])
     created_events = []
 
     for event in events_data:
@@ -234,10 +238,12 @@ def create_events_from_data(events_data, user):
                 user=user
             )
             new_event.save()
+            materialize_occurrences(new_event)
             created_events.append(new_event)
         except Exception as e:
             logger.error(f"Error creating event: {e}")
             continue
 
+    record_calendar_change(calendar, 'refresh')
     logger.info(created_events)
     return created_events
@@ -56,6 +56,8 @@ INSTALLED_APPS = [
     'calendars.apps.CalendarConfig',
     'events.apps.EventsConfig',
     'invitations.apps.InvitationsConfig',
+    'sync.apps.SyncConfig',
+    'scheduling.apps.SchedulingConfig',
     'whitenoise.runserver_nostatic',
     'ai.apps.AIConfig',
 ]
@@ -84,6 +86,24 @@ DATABASES = {
     'default': dj_database_url.config(default=os.getenv('POSTGRES_DB_URL'))
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Uses Redis when REDIS_URL is set (requires the `redis` package), the per-process memory cache otherwise
+
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -208,8 +228,36 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 # Default profile picture
 DEFAULT_PROFILE_PIC = os.path.join(MEDIA_ROOT, 'image/default_profile.jpg')
 
-# Setup for sending emails
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Number of days ahead of today that event occurrences are materialized for
+EVENT_OCCURRENCE_HORIZON_DAYS = 365
+
+# Number of seconds the expanded events of a calendar window are kept in the cache
+EVENT_WINDOW_CACHE_TIMEOUT = 60 * 60
+
+# Number of seconds a rendered .ics subscription feed is kept in the cache
+ICS_FEED_CACHE_TIMEOUT = 60 * 60
+
+# Number of seconds the ids of the calendars visible to a user are cached. Entries are keyed by a version
+# stored in the database, so invalidation reaches every process even with the process-local LocMem cache
+CALENDAR_MEMBERSHIP_CACHE_TIMEOUT = 60 * 60
+
+# Where .ics import jobs run: 'db' leaves them to `python manage.py run_import_worker`, 'thread' runs them on an
+# in-process thread pool and is only for development: serverless deployments such as Vercel stop the process after
+# the response, so 'thread' is the default in DEV_MODE only and a startup check warns about it elsewhere.
+# Uploads are kept in the default storage (MEDIA_ROOT) until their job finishes, so workers on other machines
+# need a storage they share with the web process, e.g. S3 configured through STORAGES['default']
+IMPORT_JOB_BACKEND = os.getenv('IMPORT_JOB_BACKEND', 'thread' if os.getenv('DEV_MODE') == 'true' else 'db')
+IMPORT_JOB_THREADS = 2
+
+# Where queued emails are delivered: 'thread' sends them on an in-process thread once queued, 'db' leaves them to
+# `python manage.py send_queued_emails`. Failed sends are retried after OUTBOUND_EMAIL_RETRY_DELAY * 2 ** (attempts - 1) seconds
+OUTBOUND_EMAIL_BACKEND = os.getenv('OUTBOUND_EMAIL_BACKEND', 'thread')
+OUTBOUND_EMAIL_BATCH_SIZE = 50
+OUTBOUND_EMAIL_MAX_ATTEMPTS = 5
+OUTBOUND_EMAIL_RETRY_DELAY = 60
+
+# Setup for sending emails, set EMAIL_BACKEND to e.g. 'django.core.mail.backends.console.EmailBackend' for local development
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
 EMAIL_HOST = 'smtp.gmail.com'  # Replace with your SMTP server address
 EMAIL_PORT = 587  # Or the port number your SMTP server uses
 EMAIL_USE_TLS = True  # Use TLS (True for most servers, False if you use SSL)
@@ -293,6 +341,16 @@ if os.getenv('DEV_MODE') == 'true':
                 'level': 'DEBUG',
                 'propagate': True,
             },
+            'sync': {
+                'handlers': ['file', 'console'],
+                'level': 'DEBUG',
+                'propagate': True,
+            },
+            'scheduling': {
+                'handlers': ['file', 'console'],
+                'level': 'DEBUG',
+                'propagate': True,
+            },
         },
     }
 
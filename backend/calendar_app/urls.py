@@ -25,10 +25,12 @@ from users.views import google_auth, sign_out, test_connection
 from django.conf import settings
 from django.conf.urls.static import static
 
-from calendars.views import calendar_view, calendar_detailed_view, get_shared_calendars, import_ics_calendar, export_ics_calendar
+from calendars.views import calendar_view, calendar_detailed_view, get_shared_calendars, import_ics_calendar, import_job_status, export_ics_calendar, calendar_feed_view, subscribe_ics_calendar
 from events.views import event_view, event_detailed_view
 from invitations.views import create_invitation, respond_invitation, get_invites_by_email
 from ai.views import get_ai_response
+from sync.views import sync_view
+from scheduling.views import freebusy_view, suggest_slots_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -49,13 +51,23 @@ urlpatterns = [
     path('api/calendars/<int:cal_id>/', calendar_detailed_view, name='calendar_detailed_view'),  # Handles PUT, DELETE, GET for individual calendars
     path('api/calendars/shared/', get_shared_calendars, name='get_shared_calendars'),
     path('api/calendars/import/', import_ics_calendar, name='import_calendar'), # Handles POST for calendar imports
-    path('api/calendars/export/', export_ics_calendar, name='export_calendar'), # Handles GET for calendar exports
+    path('api/calendars/import/<int:job_id>/', import_job_status, name='import_job_status'), # Handles GET for the progress of an import
+    path('api/calendars/<int:cal_id>/export.ics', export_ics_calendar, name='export_calendar'), # Handles GET for calendar exports
+    path('api/calendars/<int:cal_id>/feed/', calendar_feed_view, name='calendar_feed_view'), # Handles GET, POST and DELETE for the subscription URL
+    path('api/feeds/<slug:token>.ics', subscribe_ics_calendar, name='subscribe_calendar'), # Handles GET for calendar subscriptions
 
     ## Invitations Paths
     path('api/invitations/create/', create_invitation, name='create_invitation'),
     path('api/invitations/accept/', respond_invitation, name='accept_decline_invitation'),
     path('api/invitations/', get_invites_by_email, name='get_invites_by_email'),
 
+    ## Sync Paths
+    path('api/sync/', sync_view, name='sync_view'), # Handles GET for changes since a token
+
+    ## Scheduling Paths
+    path('api/freebusy/', freebusy_view, name='freebusy_view'), # Handles POST for the busy time and common free slots of participants
+    path('api/freebusy/suggestions/', suggest_slots_view, name='suggest_slots_view'), # Handles POST for the best meeting slots, streamed
+
     path('api/test', test_connection, name="test_connection"),
 
     # AI Path
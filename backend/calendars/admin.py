@@ -7,7 +7,8 @@ Date: 2024-08-09
 This module registers the `Calendar` model with the Django admin site and customizes its representation in the admin interface.
 """
 from django.contrib import admin
-from .models import Calendar
+from .models import Calendar, ImportJob
+from .serializers import CalendarListSerializer
 
 @admin.register(Calendar)
 class CalendarAdmin(admin.ModelAdmin):
@@ -19,9 +20,18 @@ class CalendarAdmin(admin.ModelAdmin):
     ::field int cal_id: The id of the calendar in the database
     ::field list(str) shared_users: The list of user emails that the calendar is shared to
     """
-    list_display = ('title', 'user', 'get_shared_users', 'description')
+    list_display = ('title', 'user', 'get_shared_users', 'get_event_count', 'description')
     search_fields = ('title', 'user__email', 'shared_users__email')
     list_filter = ('user', 'shared_users')
+
+    def get_queryset(self, request):
+        """
+        Loads the owners, shared users and event counts of the changelist rows with a constant number of queries.
+
+        ::param HTTPRequest request : The HTTP request object
+        ::return QuerySet : The calendars prepared by `CalendarListSerializer.setup_eager_loading`
+        """
+        return CalendarListSerializer.setup_eager_loading(super().get_queryset(request))
     
     def get_shared_users(self, user_list):
         """
@@ -31,3 +41,27 @@ class CalendarAdmin(admin.ModelAdmin):
         ::return str : comma sparated str of user emails
         """
         return ", ".join([user.email for user in user_list.shared_users.all()])
+
+    @admin.display(description='Events', ordering='event_count')
+    def get_event_count(self, calendar):
+        """
+        Displays the number of events of the calendar, annotated by `get_queryset`.
+
+        ::param Calendar calendar : The calendar of the row
+        ::return int : The number of events
+        """
+        return calendar.event_count
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    """
+    Customizes the display of `ImportJob` instances in the Django admin interface.
+
+    ::field tuple list_display : Specifies the fields to be displayed in the list view of the Django admin.
+    ::field tuple list_filter : Specifies the fields to filter the list view by.
+    ::field tuple exclude : Keeps the uploaded file out of the change form.
+    """
+    list_display = ('title', 'user', 'status', 'processed', 'imported', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    list_select_related = ('user',)
+    exclude = ('source',)
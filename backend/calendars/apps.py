@@ -18,3 +18,8 @@ class CalendarConfig(AppConfig):
     """
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'calendars'
+
+    def ready(self):
+        from django.core import checks
+        from .checks import check_import_job_backend
+        checks.register(check_import_job_backend)
@@ -0,0 +1,39 @@
+"""
+File: checks.py
+Author: Jason
+Documentation updated by: Jason
+Date: 2026-10-18
+
+This module defines the system checks of the calendars application, run on startup and by `manage.py check`.
+"""
+import os
+from django.conf import settings
+from django.core.checks import Error, Warning
+
+IMPORT_JOB_BACKENDS = ('thread', 'db')
+
+
+def check_import_job_backend(app_configs, **kwargs):
+    """
+    Warn when .ics imports run on in-process threads outside development.
+
+    Serverless deployments (e.g. Vercel) stop the process once the response is sent, so a job started on a thread
+    never finishes and is only failed once its claim expires.
+
+    ::param list(AppConfig)/optional app_configs : The applications being checked
+    ::return list(CheckMessage) : The errors and warnings found
+    """
+    backend = settings.IMPORT_JOB_BACKEND
+    if backend not in IMPORT_JOB_BACKENDS:
+        return [Error(
+            f"IMPORT_JOB_BACKEND must be one of {', '.join(IMPORT_JOB_BACKENDS)}, not {backend!r}.",
+            id='calendars.E001',
+        )]
+    if backend == 'thread' and os.getenv('DEV_MODE') != 'true':
+        return [Warning(
+            "IMPORT_JOB_BACKEND = 'thread' is meant for development, imports are lost when the process stops "
+            "after the response.",
+            hint="Set IMPORT_JOB_BACKEND=db and run `python manage.py run_import_worker`.",
+            id='calendars.W001',
+        )]
+    return []
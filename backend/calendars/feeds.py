@@ -0,0 +1,69 @@
+"""
+File: feeds.py
+Author: Jason
+Documentation updated by: Jason
+Date: 2026-10-18
+
+This module serves the .ics subscription feeds polled by external calendar clients (Google, Apple, Outlook).
+
+Each calendar can expose a feed under a secret token. A feed is rendered with the export pipeline of `calendars.ics`
+and cached under the validators of the calendar version, so every event or calendar write makes the old entry
+unreachable. Polls that send `If-None-Match` or `If-Modified-Since` are answered with a `304` from the version alone.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.crypto import get_random_string
+from sync.versions import collection_validators
+from events.models import Event
+from .ics import EXPORT_CHUNK_SIZE, iter_export
+
+FEED_TOKEN_LENGTH = 32
+
+# Fields of `Event` read by the export
+EXPORT_FIELDS = ('cal_id', 'title', 'description', 'start', 'end', 'repeat_type', 'repeat_until', 'repeat_days', 'rrule', 'exdates')
+
+
+def new_feed_token():
+    """
+    Generate the secret of a subscription URL.
+
+    ::return str : A random alphanumeric token
+    """
+    return get_random_string(FEED_TOKEN_LENGTH)
+
+
+def export_events(calendar_id):
+    """
+    Iterate over the events of a calendar in chunks, for the export pipeline.
+
+    ::param int calendar_id : The calendar to export
+    ::return iterator(Event) : The events with the exported fields only
+    """
+    return Event.objects.filter(cal_id=calendar_id).only(*EXPORT_FIELDS).order_by('pk').iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def feed_validators(calendar):
+    """
+    Build the validators of the feed of a calendar from its current version.
+
+    ::param Calendar calendar : The subscribed calendar
+    ::return tuple(str, datetime) : The quoted ETag and the time of the latest change, see `sync.versions`
+    """
+    return collection_validators('calendar', calendar.pk, 'feed')
+
+
+def render_feed(calendar, validators):
+    """
+    Return the rendered feed of a calendar, from the cache when its version has not changed.
+
+    ::param Calendar calendar : The subscribed calendar
+    ::param tuple(str, datetime) validators : The validators returned by `feed_validators`
+    ::return bytes : The .ics file
+    """
+    etag = validators[0].strip('"')
+    key = f'ics_feed:{calendar.pk}:{etag}'
+    body = cache.get(key)
+    if body is None:
+        body = b''.join(iter_export(calendar, export_events(calendar.pk)))
+        cache.set(key, body, timeout=settings.ICS_FEED_CACHE_TIMEOUT)
+    return body
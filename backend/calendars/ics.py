@@ -0,0 +1,429 @@
+"""
+File: ics.py
+Author: Jason
+Documentation updated by: Jason
+Date: 2026-10-18
+
+This module contains the streaming .ics import and export pipelines.
+
+The upload is read chunk by chunk and every top-level VEVENT is unfolded and parsed on its own, so the whole
+file is never held in memory. Events are inserted with `bulk_create` in batches of `IMPORT_BATCH_SIZE`, and
+events that cannot be imported are reported instead of aborting the import. Recurring VEVENTs are imported as
+one series each, see `recurrence_fields`. The export writes one VEVENT at a time from a database iterator and
+emits series as RRULEs, see `export_rrule`.
+"""
+import codecs
+import random
+from contextlib import nullcontext
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from django.db import transaction
+from django.utils import timezone
+from dateutil.rrule import rrulestr
+from django.utils.dateparse import parse_datetime
+from icalendar import Calendar as ICalendar, Event as ICalEvent, Timezone as ICalTimezone, vRecur
+from events.models import Event, EventOccurrence
+from events.occurrences import materialize_new_occurrences
+from events.recurrence import WEEKDAYS
+
+IMPORT_BATCH_SIZE = 500
+
+# Number of events fetched per round trip while exporting
+EXPORT_CHUNK_SIZE = 500
+
+EXPORT_PRODID = '-//My Calendar Application//EN'
+
+# RFC 5545 weekday codes mapped to the values of `Event.repeat_days`
+ICAL_WEEKDAYS = {'MO': 'MON', 'TU': 'TUE', 'WE': 'WED', 'TH': 'THU', 'FR': 'FRI', 'SA': 'SAT', 'SU': 'SUN'}
+
+# Python weekday numbers (Monday is 0) mapped to RFC 5545 weekday codes
+WEEKDAY_CODES = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+
+# Top-level components parsed by the importer, VTIMEZONE definitions are needed to resolve custom TZIDs
+PARSED_COMPONENTS = ('VEVENT', 'VTIMEZONE')
+
+
+# Function to generate random colors, avoiding very light colors
+def generate_random_color():
+    # Generate RGB values between 0 and 200 to avoid light colors (values near 255 are too white)
+    r = random.randint(0, 240)
+    g = random.randint(0, 240)
+    b = random.randint(0, 240)
+    # Convert RGB to HEX format
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+def _iter_raw_lines(chunks):
+    decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+    pending = ''
+    for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split('\n')
+        yield from lines
+    pending += decoder.decode(b'', final=True)
+    yield from pending.split('\n')
+
+
+def iter_unfolded_lines(chunks):
+    """
+    Decode and unfold the content lines of an .ics stream incrementally (RFC 5545, section 3.1).
+
+    ::param iterable(bytes) chunks : The raw chunks of the upload, e.g. `UploadedFile.chunks()`
+    ::return generator(str) : Each non-empty logical content line without its line break
+    """
+    current = None
+    for line in _iter_raw_lines(chunks):
+        line = line.rstrip('\r')
+        if line[:1] in (' ', '\t') and current is not None:
+            current += line[1:]  # Folded continuation of the previous line
+            continue
+        if current:
+            yield current
+        current = line
+    if current:
+        yield current
+
+
+def iter_components(chunks):
+    """
+    Lazily yield the top-level VEVENT and VTIMEZONE blocks of an .ics stream.
+
+    ::param iterable(bytes) chunks : The raw chunks of the upload
+    ::return generator(tuple(str, str)) : The component name and its unfolded source, nested components included
+    """
+    name = None
+    depth = 0
+    block = []
+    for line in iter_unfolded_lines(chunks):
+        key, _, value = line.partition(':')
+        key = key.upper()
+        if name is None:
+            if key == 'BEGIN' and value.strip().upper() in PARSED_COMPONENTS:
+                name = value.strip().upper()
+                depth = 1
+                block = [line]
+            continue
+        block.append(line)
+        if key == 'BEGIN':
+            depth += 1
+        elif key == 'END':
+            depth -= 1
+            if depth == 0:
+                yield name, '\r\n'.join(block) + '\r\n'
+                name = None
+
+
+def as_datetime(value):
+    """
+    Convert a DTSTART/DTEND value to an aware datetime. Dates (all-day events) start at midnight.
+
+    ::param date/datetime value : The decoded property value
+    ::return datetime : The aware datetime
+    """
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, datetime.min.time())
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def _until_datetime(value):
+    # A DATE bound includes the whole day
+    if isinstance(value, datetime):
+        return as_datetime(value)
+    return as_datetime(value) + timedelta(days=1) - timedelta(microseconds=1)
+
+
+def _simple_repeat_type(freq, parts, start):
+    """
+    Return the repeat type expressing a rule with an INTERVAL of 1, `None` if the repeat fields cannot express it.
+    The recurrence engine clamps monthly and yearly series to the end of shorter months where RFC 5545 skips them,
+    so those are only mapped when the day exists in every month.
+    """
+    if freq == 'DAILY' and not parts:
+        return 'DAILY'
+    if freq == 'WEEKLY' and set(parts) <= {'BYDAY'}:
+        days = [str(day).upper() for day in parts.get('BYDAY', [])]
+        # Ordinal days (e.g. 2TU) are not expressible, and the first instance must fall on one of the days
+        if all(day in ICAL_WEEKDAYS for day in days) and (not days or start.strftime('%a')[:2].upper() in days):
+            return 'WEEKLY'
+    if freq == 'MONTHLY' and start.day <= 28 and parts in ({}, {'BYMONTHDAY': [start.day]}):
+        return 'MONTHLY'
+    if freq == 'YEARLY' and (start.month, start.day) != (2, 29) and not set(parts) - {'BYMONTH', 'BYMONTHDAY'} \
+            and parts.get('BYMONTH', [start.month]) == [start.month] and parts.get('BYMONTHDAY', [start.day]) == [start.day]:
+        return 'YEARLY'
+    return None
+
+
+def recurrence_fields(component, start):
+    """
+    Map the RRULE and EXDATE properties of a VEVENT onto the repeat fields of `Event`.
+
+    Rules the repeat fields can express become 'DAILY', 'WEEKLY', 'MONTHLY' or 'YEARLY' series. Any other rule is
+    stored as a 'CUSTOM' series with its RRULE. Either way COUNT and UNTIL are converted to `repeat_until`.
+
+    ::param icalendar.Event component : The parsed VEVENT
+    ::param datetime start : The aware start of the first instance
+    ::return dict : The `repeat_type`, `repeat_days`, `repeat_until`, `rrule` and `exdates` of the event
+    ::raises ValueError : Raised if the RRULE is malformed
+    """
+    fields = {'repeat_type': 'NONE', 'repeat_days': None, 'repeat_until': None, 'rrule': None, 'exdates': []}
+    rule = component.get('RRULE')
+    if isinstance(rule, list):
+        rule = rule[0]  # Multiple RRULEs are deprecated by RFC 5545, keep the first
+    if not rule:
+        return fields
+
+    rule = {key.upper(): value for key, value in rule.items()}
+    freq = str(rule['FREQ'][0]).upper()
+    interval = int(rule.get('INTERVAL', [1])[0])
+    parts = {key: value for key, value in rule.items() if key not in ('FREQ', 'INTERVAL', 'UNTIL', 'COUNT', 'WKST')}
+    unbounded = vRecur({key: value for key, value in rule.items() if key not in ('UNTIL', 'COUNT')}).to_ical().decode()
+
+    repeat_type = _simple_repeat_type(freq, parts, start) if interval == 1 else None
+    if repeat_type:
+        fields['repeat_type'] = repeat_type
+        if repeat_type == 'WEEKLY' and parts.get('BYDAY'):
+            fields['repeat_days'] = [ICAL_WEEKDAYS[str(day).upper()] for day in parts['BYDAY']]
+    else:
+        fields['repeat_type'] = 'CUSTOM'
+        fields['rrule'] = unbounded
+
+    expanded = rrulestr(unbounded, dtstart=start)  # Raises ValueError on malformed rules
+    if rule.get('COUNT'):
+        # The last instance bounds the series
+        instances = list(expanded.xafter(start, count=int(rule['COUNT'][0]), inc=True))
+        fields['repeat_until'] = instances[-1] if instances else start
+    elif rule.get('UNTIL'):
+        fields['repeat_until'] = _until_datetime(rule['UNTIL'][0])
+
+    exdates = component.get('EXDATE') or []
+    for exdate in exdates if isinstance(exdates, list) else [exdates]:
+        fields['exdates'].extend(as_datetime(value.dt).isoformat() for value in exdate.dts)
+    return fields
+
+
+def build_event(component, calendar, user, color_for):
+    """
+    Build an unsaved `Event` from a parsed VEVENT.
+
+    ::param icalendar.Event component : The parsed VEVENT
+    ::param Calendar calendar : The calendar the event is imported into
+    ::param CustomUser user : The user importing the calendar
+    ::param callable color_for : Returns the color to use for a summary
+    ::return Event : The event with its series bounds set, ready for `bulk_create`
+    ::raises ValueError : Raised if the VEVENT has no usable start or end, a malformed RRULE or a value too long for its column
+    """
+    # icalendar drops the properties it cannot parse, fail instead of silently importing a different schedule
+    for name, error in component.errors:
+        if name in ('DTSTART', 'DTEND', 'DURATION', 'RRULE', 'EXDATE', 'RECURRENCE-ID'):
+            raise ValueError(error)
+    if component.get('DTSTART') is None:
+        raise ValueError('Missing DTSTART')
+    start_value = component.decoded('DTSTART')
+    start = as_datetime(start_value)
+    if component.get('DTEND') is not None:
+        end = as_datetime(component.decoded('DTEND'))
+    elif component.get('DURATION') is not None:
+        end = start + component.decoded('DURATION')
+    else:
+        # RFC 5545: all-day events last one day, timed events end when they start
+        end = start + (timedelta(days=1) if isinstance(start_value, date) and not isinstance(start_value, datetime) else timedelta())
+    if end < start:
+        raise ValueError('DTEND is before DTSTART')
+
+    summary = str(component.get('SUMMARY', 'No Title'))
+    # Overridden instances of a series are imported as single events
+    recurrence = {} if component.get('RECURRENCE-ID') is not None else recurrence_fields(component, start)
+    event = Event(
+        cal_id=calendar,
+        title=summary,
+        description=str(component.get('DESCRIPTION', '')),
+        start=start,
+        end=end,
+        user=user,
+        bg_color=color_for(summary),
+        **recurrence,
+    )
+    # An over-long value would fail the whole `bulk_create` batch on databases that enforce lengths
+    for field in Event._meta.concrete_fields:
+        value = getattr(event, field.attname)
+        if field.max_length and isinstance(value, str) and len(value) > field.max_length:
+            raise ValueError(f'{field.name} is longer than {field.max_length} characters')
+    event.update_series_bounds()
+    return event
+
+
+def apply_overrides(series, overrides):
+    """
+    Remove the instances overridden by a RECURRENCE-ID from their series, the overrides being imported as single events.
+
+    ::param dict(str, Event) series : The saved recurring events keyed by UID
+    ::param list(tuple(str, datetime)) overrides : The UID and RECURRENCE-ID of each override
+    """
+    removed = {}
+    for uid, recurrence_id in overrides:
+        if uid in series:
+            removed.setdefault(uid, []).append(recurrence_id)
+    for uid, starts in removed.items():
+        event = series[uid]
+        event.exdates = event.exdates + [value.isoformat() for value in starts]
+        Event.objects.filter(pk=event.pk).update(exdates=event.exdates)
+        EventOccurrence.objects.filter(event=event, start__in=starts).delete()
+
+
+def import_ics(chunks, calendar, user, color_for, progress=None, atomic=True):
+    """
+    Import the events of an .ics stream into a calendar.
+
+    ::param iterable(bytes) chunks : The raw chunks of the upload
+    ::param Calendar calendar : The calendar to import into
+    ::param CustomUser user : The user importing the calendar
+    ::param callable color_for : Returns the color to use for a summary
+    ::param callable/optional progress : Called after each batch with the number of VEVENTs read, of events imported and the errors so far
+    ::param bool atomic : Import everything in one transaction, otherwise each batch is committed on its own so progress is visible to other connections
+    ::return tuple(int, list(dict)) : The number of imported events and one error per skipped VEVENT,
+        with its position in the file, its UID and SUMMARY when readable and the reason
+    """
+    imported = 0
+    errors = []
+    batch = []
+    index = 0
+    # Recurring events by UID and the instances overridden by a RECURRENCE-ID, resolved once every event is saved
+    series = {}
+    overrides = []
+
+    def flush():
+        with transaction.atomic():
+            created = Event.objects.bulk_create(batch, batch_size=IMPORT_BATCH_SIZE)
+            materialize_new_occurrences(created)
+        batch.clear()
+        if progress:
+            progress(index, imported + len(created), errors)
+        return len(created)
+
+    with transaction.atomic() if atomic else nullcontext():
+        for name, source in iter_components(chunks):
+            if name == 'VTIMEZONE':
+                try:
+                    # Parsing registers the custom timezone for the TZIDs of the following events
+                    ICalTimezone.from_ical(source)
+                except Exception:
+                    pass
+                continue
+
+            index += 1
+            component = None
+            try:
+                component = ICalEvent.from_ical(source)
+                event = build_event(component, calendar, user, color_for)
+                uid = str(component.get('UID', ''))
+                if component.get('RECURRENCE-ID') is not None:
+                    overrides.append((uid, as_datetime(component.decoded('RECURRENCE-ID'))))
+                elif event.repeat_type != 'NONE' and uid:
+                    series[uid] = event
+                batch.append(event)
+            except Exception as e:
+                errors.append({
+                    'index': index,
+                    'uid': str(component.get('UID', '')) if component is not None else None,
+                    'summary': str(component.get('SUMMARY', '')) if component is not None else None,
+                    'error': str(e),
+                })
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                imported += flush()
+        if batch:
+            imported += flush()
+        with transaction.atomic():
+            apply_overrides(series, overrides)
+    if progress:
+        progress(index, imported, errors)
+    return imported, errors
+
+
+def _utc(value):
+    return as_datetime(value).astimezone(dt_timezone.utc)
+
+
+def export_rrule(event):
+    """
+    Build the RRULE of a series so clients expand it exactly like the recurrence engine does.
+
+    The engine clamps monthly and yearly series to the end of shorter months, which RFC 5545 expresses as a
+    BYSETPOS=-1 over the candidate days of the month.
+
+    ::param Event event : The event to export
+    ::return tuple(vRecur, list(datetime)) : The rule, `None` for single events, and the starts to exclude with EXDATE
+    """
+    start = _utc(event.start)
+    exdates = [_utc(parse_datetime(value)) for value in event.exdates or ()]
+    if event.repeat_type == 'CUSTOM' and event.rrule:
+        rule = vRecur.from_ical(event.rrule)
+    elif event.repeat_type == 'DAILY':
+        rule = vRecur({'FREQ': 'DAILY'})
+    elif event.repeat_type == 'WEEKLY':
+        rule = vRecur({'FREQ': 'WEEKLY'})
+        weekdays = sorted({WEEKDAYS[day] for day in event.repeat_days or () if day in WEEKDAYS})
+        if weekdays:
+            rule['BYDAY'] = [WEEKDAY_CODES[weekday] for weekday in weekdays]
+            # RFC 5545 counts DTSTART as an instance even when it is not one of the days, the engine does not
+            if start.weekday() not in weekdays:
+                exdates.append(start)
+    elif event.repeat_type == 'MONTHLY':
+        rule = vRecur({'FREQ': 'MONTHLY'})
+        if start.day > 28:
+            rule.update({'BYMONTHDAY': list(range(28, start.day + 1)), 'BYSETPOS': [-1]})
+    elif event.repeat_type == 'YEARLY':
+        rule = vRecur({'FREQ': 'YEARLY'})
+        if (start.month, start.day) == (2, 29):
+            rule.update({'BYMONTH': [2], 'BYMONTHDAY': [28, 29], 'BYSETPOS': [-1]})
+    else:
+        return None, []
+
+    if event.repeat_until:
+        rule['UNTIL'] = [_utc(event.repeat_until)]
+    return rule, exdates
+
+
+def export_event(event, stamp):
+    """
+    Serialize an event as a folded VEVENT block.
+
+    ::param Event event : The event to export
+    ::param datetime stamp : The DTSTAMP shared by every event of the export
+    ::return bytes : The VEVENT with CRLF line endings
+    """
+    component = ICalEvent()
+    component.add('UID', f'event-{event.pk}@{event.cal_id_id}')
+    component.add('DTSTAMP', stamp)
+    component.add('SUMMARY', event.title)
+    if event.description:
+        component.add('DESCRIPTION', event.description)
+    component.add('DTSTART', _utc(event.start))
+    component.add('DTEND', _utc(event.end))
+    rule, exdates = export_rrule(event)
+    if rule is not None:
+        component.add('RRULE', rule)
+    if exdates:
+        component.add('EXDATE', sorted(exdates))
+    return component.to_ical()
+
+
+def iter_export(calendar, events):
+    """
+    Lazily serialize a calendar as an .ics stream, one VEVENT at a time.
+
+    ::param Calendar calendar : The exported calendar
+    ::param iterable(Event) events : The events of the calendar, e.g. a `QuerySet.iterator()`
+    ::return generator(bytes) : The chunks of the .ics file
+    """
+    ics_calendar = ICalendar()
+    ics_calendar.add('PRODID', EXPORT_PRODID)
+    ics_calendar.add('VERSION', '2.0')
+    ics_calendar.add('X-WR-CALNAME', calendar.title)
+    footer = b'END:VCALENDAR\r\n'
+    yield ics_calendar.to_ical()[:-len(footer)]
+
+    stamp = _utc(timezone.now())
+    for event in events:
+        yield export_event(event, stamp)
+    yield footer
@@ -0,0 +1,218 @@
+"""
+File: jobs.py
+Author: Jason
+Documentation updated by: Jason
+Date: 2026-10-18
+
+This module runs .ics imports in the background so the upload request returns immediately.
+
+Jobs are stored in the `ImportJob` table. With `IMPORT_JOB_BACKEND = 'thread'` they run on an in-process thread
+pool as soon as the upload is committed. With `'db'` they wait for a separate worker process,
+`python manage.py run_import_worker`, which polls the table. Use the latter where the web process cannot keep
+running after the response, e.g. on serverless deployments.
+
+A running job holds a claim that every batch of progress extends. If the worker dies, the claim expires and the
+job is failed by the next worker poll or status request, and the calendar it had partially imported is removed.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import logging
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from sync.changelog import calendar_member_ids, record_calendar_change
+from .ics import generate_random_color, import_ics
+from .membership import invalidate_visible_calendars
+from .models import Calendar, ImportJob
+
+logger = logging.getLogger(__name__)
+
+# Size of the chunks the stored upload is fed to the parser in
+SOURCE_CHUNK_SIZE = 64 * 1024
+
+# How long a running job may go without reporting progress before it is considered abandoned
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+STALE_FAILURE = 'The import was interrupted, please upload the file again'
+
+
+class JobAbandoned(Exception):
+    """
+    Raised in a worker whose job was failed as stale while it was still running.
+    """
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.IMPORT_JOB_THREADS, thread_name_prefix='import-job')
+    return _executor
+
+
+def enqueue_import_job(job):
+    """
+    Schedule a saved import job according to `IMPORT_JOB_BACKEND`.
+
+    ::param ImportJob job : The pending job
+    """
+    if settings.IMPORT_JOB_BACKEND == 'thread':
+        # Wait for the upload to be committed so the worker thread can read it
+        transaction.on_commit(lambda: _get_executor().submit(_run_in_thread, job.pk))
+
+
+def _run_in_thread(job_id):
+    try:
+        run_import_job(job_id)
+    finally:
+        close_old_connections()
+
+
+def claim_next_job():
+    """
+    Fail the abandoned jobs, then atomically mark the oldest pending job as running.
+
+    ::return ImportJob : The claimed job, `None` when no job is pending
+    """
+    fail_stale_jobs()
+    with transaction.atomic():
+        job = ImportJob.objects.select_for_update(skip_locked=True).filter(status='pending').order_by('created_at').first()
+        if job is None:
+            return None
+        job.status = 'running'
+        job.started_at = timezone.now()
+        job.claimed_until = job.started_at + CLAIM_TIMEOUT
+        job.save(update_fields=['status', 'started_at', 'claimed_until'])
+    return job
+
+
+def claim_job(job_id):
+    """
+    Atomically mark a specific pending job as running.
+
+    ::param int job_id : The job to claim
+    ::return ImportJob : The claimed job, `None` if it was already claimed by another worker
+    """
+    now = timezone.now()
+    claimed = ImportJob.objects.filter(pk=job_id, status='pending').update(
+        status='running', started_at=now, claimed_until=now + CLAIM_TIMEOUT
+    )
+    return ImportJob.objects.get(pk=job_id) if claimed else None
+
+
+def _discard_calendar(calendar_id):
+    """
+    Remove the calendar of a failed job along with the events imported into it.
+    """
+    calendar = Calendar.objects.filter(pk=calendar_id).first()
+    if calendar is None:
+        return
+    member_ids = calendar_member_ids(calendar)
+    with transaction.atomic():
+        # Log the change while the calendar still has its primary key, `delete()` resets it
+        record_calendar_change(calendar, 'delete', member_ids)
+        calendar.delete()
+        transaction.on_commit(lambda: invalidate_visible_calendars(member_ids))
+
+
+def _delete_source(name):
+    """
+    Delete the stored upload of a finished job.
+    """
+    if name:
+        ImportJob._meta.get_field('source').storage.delete(name)
+
+
+def _fail_job(job_id, failure, calendar_id, jobs=None):
+    """
+    Mark a running job as failed and discard its calendar, unless another process finished it first.
+    """
+    jobs = (jobs if jobs is not None else ImportJob.objects).filter(pk=job_id, status='running')
+    source = jobs.values_list('source', flat=True).first()
+    if jobs.update(status='failed', failure=failure, source='', claimed_until=None, finished_at=timezone.now()):
+        _delete_source(source)
+        _discard_calendar(calendar_id)
+        return True
+    return False
+
+
+def fail_stale_jobs(jobs=None):
+    """
+    Fail the running jobs whose claim expired, e.g. because their worker process died.
+
+    ::param QuerySet/optional jobs : The jobs to check, defaults to all of them
+    ::return int : The number of jobs failed
+    """
+    stale = (jobs if jobs is not None else ImportJob.objects).filter(status='running').filter(
+        Q(claimed_until__lt=timezone.now()) | Q(claimed_until__isnull=True)
+    )
+    # The claim is checked again on update, a worker may have reported progress in between
+    return sum(
+        _fail_job(job_id, STALE_FAILURE, calendar_id, stale)
+        for job_id, calendar_id in list(stale.values_list('pk', 'calendar_id'))
+    )
+
+
+def run_import_job(job_id):
+    """
+    Claim and run a pending import job.
+
+    ::param int job_id : The job to run
+    """
+    job = claim_job(job_id)
+    if job is not None:
+        process_import_job(job)
+
+
+def process_import_job(job):
+    """
+    Import the stored upload of a claimed job into a new calendar, saving progress after every batch.
+    If the job fails the calendar and the events imported so far are removed.
+
+    ::param ImportJob job : The running job
+    """
+    color_map = {}
+
+    def color_for(summary):
+        # Check if the summary already has a color, if not generate one
+        if summary not in color_map:
+            color_map[summary] = generate_random_color()
+        return color_map[summary]
+
+    def progress(processed, imported, errors):
+        # Extends the claim, and stops the import if the job was failed as stale meanwhile
+        updated = ImportJob.objects.filter(pk=job.pk, status='running').update(
+            processed=processed, imported=imported, errors=errors, claimed_until=timezone.now() + CLAIM_TIMEOUT
+        )
+        if not updated:
+            raise JobAbandoned(f'Import job {job.pk} is no longer running')
+
+    calendar = None
+    try:
+        calendar = Calendar.objects.create(user=job.user, title=job.title, description=job.description)
+        ImportJob.objects.filter(pk=job.pk).update(calendar=calendar)
+        # The upload is streamed from storage, only one chunk and one batch of events are held in memory
+        with job.source.open('rb') as source:
+            chunks = iter(lambda: source.read(SOURCE_CHUNK_SIZE), b'')
+            imported, errors = import_ics(chunks, calendar, job.user, color_for, progress=progress, atomic=False)
+    except JobAbandoned:
+        logger.warning("Import job %s was failed as stale while running", job.pk)
+        if calendar is not None:
+            _discard_calendar(calendar.pk)
+        return
+    except Exception as e:
+        logger.exception("Import job %s failed", job.pk)
+        calendar_id = calendar.pk if calendar is not None else None
+        # A job failed as stale meanwhile had its upload deleted, its calendar is still this worker's to remove
+        if not _fail_job(job.pk, str(e), calendar_id) and calendar_id is not None:
+            _discard_calendar(calendar_id)
+        return
+
+    invalidate_visible_calendars([job.user_id])
+    record_calendar_change(calendar, 'refresh')
+    if ImportJob.objects.filter(pk=job.pk, status='running').update(
+        status='succeeded', imported=imported, errors=errors, source='', claimed_until=None, finished_at=timezone.now()
+    ):
+        _delete_source(job.source.name)
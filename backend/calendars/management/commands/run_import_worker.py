@@ -0,0 +1,37 @@
+"""
+File: run_import_worker.py
+Author: Jason
+Documentation updated by: Jason
+Date: 2026-10-18
+
+This module defines the worker process that runs queued .ics import jobs when `IMPORT_JOB_BACKEND = 'db'`.
+Run it next to the web process, e.g. `python manage.py run_import_worker`, or from a scheduler with `--once`.
+"""
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from calendars.jobs import claim_next_job, process_import_job
+
+
+class Command(BaseCommand):
+    """
+    Polls the `ImportJob` table and runs the pending jobs one at a time, oldest first, failing the abandoned ones.
+    Several workers can run side by side, each job is claimed by exactly one of them.
+    """
+    help = 'Run queued .ics import jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once no job is pending instead of polling')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds to wait between polls when idle')
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
+                continue
+            self.stdout.write(f"Running import job {job.pk} ({job.title})")
+            process_import_job(job)
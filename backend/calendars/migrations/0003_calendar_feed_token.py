@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-18 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calendars', '0002_importjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='calendar',
+            name='feed_token',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-18 12:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calendars', '0003_calendar_feed_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='claimed_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
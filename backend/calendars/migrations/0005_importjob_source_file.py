@@ -0,0 +1,39 @@
+# Generated by Django 5.1 on 2026-10-18 13:05
+
+import calendars.models
+from django.core.files.base import ContentFile
+from django.db import migrations, models
+
+
+def move_sources_to_storage(apps, schema_editor):
+    # Unfinished jobs keep their upload, finished ones had it cleared already
+    ImportJob = apps.get_model('calendars', 'ImportJob')
+    for job in ImportJob.objects.filter(status__in=('pending', 'running')).iterator():
+        if job.source:
+            job.source_file.save('upload.ics', ContentFile(bytes(job.source)), save=False)
+            job.save(update_fields=['source_file'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calendars', '0004_importjob_claimed_until'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='source_file',
+            field=models.FileField(blank=True, upload_to=calendars.models.import_upload_path),
+        ),
+        migrations.RunPython(move_sources_to_storage, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='importjob',
+            name='source',
+        ),
+        migrations.RenameField(
+            model_name='importjob',
+            old_name='source_file',
+            new_name='source',
+        ),
+    ]
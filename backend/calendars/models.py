@@ -1,3 +1,4 @@
+from uuid import uuid4
 from django.db import models
 from django.conf import settings
 
@@ -10,12 +11,14 @@ class Calendar(models.Model):
     ::field CharField title : The title of the calendar.
     ::field TextField description : A description of the calendar.
     ::field ManyToManyField shared_users : List of shared users
+    ::field CharField feed_token : The secret of the calendar's .ics subscription URL, null while the feed is disabled.
     """
     cal_id = models.AutoField(primary_key=True)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='calendars')
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True, null=True)
     shared_users = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='shared_calendars', blank=True)
+    feed_token = models.CharField(max_length=64, unique=True, null=True, blank=True)
 
     def __str__(self):
         """
@@ -24,3 +27,69 @@ class Calendar(models.Model):
         ::return str: The shared calendar title.
         """
         return self.title
+
+
+def import_upload_path(job, filename):
+    """
+    Name the stored upload of an import job with a random name, the client's file name is not trusted.
+
+    ::param ImportJob job : The job the upload belongs to
+    ::param str filename : The name of the uploaded file
+    ::return str : The path of the file in the default storage
+    """
+    return f'imports/{uuid4().hex}.ics'
+
+
+class ImportJob(models.Model):
+    """
+    Tracks the background import of an uploaded .ics file into a new calendar.
+
+    ::field ForeignKey user : The user who uploaded the file.
+    ::field ForeignKey calendar : The calendar created by the import, set once the job starts.
+    ::field CharField title : The title of the calendar to create.
+    ::field TextField description : The description of the calendar to create.
+    ::field FileField source : The uploaded file in the default storage, read back in chunks by the worker. Deleted once the job finishes.
+    ::field CharField status : 'pending', 'running', 'succeeded' or 'failed'.
+    ::field PositiveIntegerField processed : The number of VEVENTs read so far.
+    ::field PositiveIntegerField imported : The number of events imported so far.
+    ::field JSONField errors : The per-event errors, as reported by `calendars.ics.import_ics`.
+    ::field TextField failure : The reason the whole job failed, if it did.
+    ::field DateTimeField created_at : The timestamp of the upload.
+    ::field DateTimeField started_at : The timestamp of when a worker picked the job up.
+    ::field DateTimeField claimed_until : The time after which a running job that reported no progress is considered abandoned.
+    ::field DateTimeField finished_at : The timestamp of when the job succeeded or failed.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='import_jobs')
+    calendar = models.ForeignKey(Calendar, on_delete=models.SET_NULL, null=True, blank=True, related_name='import_jobs')
+    title = models.CharField(max_length=255)
+    description = models.TextField(blank=True, default='')
+    source = models.FileField(upload_to=import_upload_path, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    processed = models.PositiveIntegerField(default=0)
+    imported = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    failure = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='importjob_status_created_idx'),
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the import job.
+
+        ::return str: The calendar title followed by the status.
+        """
+        return f"Import of {self.title} ({self.status})"
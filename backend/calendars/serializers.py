@@ -7,6 +7,8 @@ Date: 2024-08-09
 This module provides a `CalendarSerializer` class for converting `Calendar` instances to and from JSON format for API responses.
 """
 
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Prefetch
 from rest_framework import serializers
 from .models import Calendar
 
@@ -30,3 +32,38 @@ class CalendarSerializer(serializers.ModelSerializer):
         model = Calendar
         fields = ('cal_id', 'user', 'title', 'description', 'shared_users')
         read_only_fields = ['cal_id', 'user'] # I added this
+
+
+class CalendarListSerializer(CalendarSerializer):
+    """
+    This class extends `CalendarSerializer` with the owner and the number of events of each calendar, for the list endpoints.
+    Serialize querysets prepared by `setup_eager_loading` so the number of queries does not grow with the number of calendars.
+
+    ::meta dict owner : The id, username and email of the user who owns the calendar.
+    ::meta int event_count : The number of events in the calendar, recurring series counting once.
+    """
+    owner = serializers.SerializerMethodField()
+    event_count = serializers.SerializerMethodField()
+
+    class Meta(CalendarSerializer.Meta):
+        fields = CalendarSerializer.Meta.fields + ('owner', 'event_count')
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """
+        Load the owners, the shared user emails and the event counts along with the calendars.
+
+        ::param QuerySet queryset : The calendars to serialize
+        ::return QuerySet : The calendars with their owner joined, their shared users prefetched and `event_count` annotated
+        """
+        return queryset.select_related('user').prefetch_related(
+            Prefetch('shared_users', queryset=get_user_model().objects.only('email'))
+        ).annotate(event_count=Count('events'))
+
+    def get_owner(self, calendar):
+        return {'id': calendar.user.id, 'username': calendar.user.username, 'email': calendar.user.email}
+
+    def get_event_count(self, calendar):
+        # Single calendars that were not loaded through `setup_eager_loading` are counted on demand
+        event_count = getattr(calendar, 'event_count', None)
+        return calendar.events.count() if event_count is None else event_count
@@ -0,0 +1,267 @@
+"""
+File: tests.py
+Author: Jason
+Documentation updated by: Jason
+Date: 2026-10-18
+
+This module contains the tests of the calendars application.
+"""
+import tempfile
+from unittest import mock
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from events.models import Event
+from sync.models import ChangeLogEntry
+from sync.versions import collection_versions
+from users.models import CustomUser
+from calendars.checks import check_import_job_backend
+from calendars.ics import import_ics
+from calendars.jobs import claim_job, claim_next_job, fail_stale_jobs, process_import_job
+from calendars.membership import invalidate_visible_calendars, visible_calendar_ids
+from calendars.models import Calendar, ImportJob
+
+
+class DeleteCalendarTests(TestCase):
+    """
+    Deleting a calendar through DELETE /api/calendars/<id>/.
+    """
+    def setUp(self):
+        cache.clear()
+        self.owner = CustomUser.objects.create(email='owner@example.com', username='owner')
+        self.member = CustomUser.objects.create(email='member@example.com', username='member')
+        Calendar.objects.create(user=self.owner, title='Personal')
+        self.calendar = Calendar.objects.create(user=self.owner, title='Team')
+        self.calendar.shared_users.add(self.member)
+        start = datetime(2026, 11, 2, 9, tzinfo=dt_timezone.utc)
+        self.event = Event.objects.create(
+            cal_id=self.calendar, user=self.owner, title='Standup', start=start, end=start + timedelta(minutes=15)
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def sync_token(self, user):
+        self.client.force_authenticate(user)
+        return self.client.get('/api/sync/').data['token']
+
+    def delete_calendar(self):
+        self.client.force_authenticate(self.owner)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.delete(f'/api/calendars/{self.calendar.pk}/')
+
+    def test_delete_removes_calendar_and_events(self):
+        response = self.delete_calendar()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Calendar.objects.filter(pk=self.calendar.pk).exists())
+        self.assertFalse(Event.objects.filter(pk=self.event.pk).exists())
+
+    def test_delete_is_reported_by_sync_to_every_member(self):
+        tokens = {user: self.sync_token(user) for user in (self.owner, self.member)}
+
+        self.assertEqual(self.delete_calendar().status_code, 200)
+
+        for user, token in tokens.items():
+            self.assertTrue(ChangeLogEntry.objects.filter(
+                user=user, kind='calendar', object_id=self.calendar.pk, action='delete'
+            ).exists())
+            self.client.force_authenticate(user)
+            delta = self.client.get('/api/sync/', {'since': token}).data
+            self.assertFalse(delta['reset'])
+            self.assertEqual(delta['calendars']['deleted'], [self.calendar.pk])
+            self.assertEqual(delta['calendars']['upserted'], [])
+
+    def test_delete_invalidates_cached_memberships(self):
+        # Cache the memberships of both users before the delete
+        for user in (self.owner, self.member):
+            self.assertIn(self.calendar.pk, visible_calendar_ids(user))
+
+        self.assertEqual(self.delete_calendar().status_code, 200)
+
+        for user in (self.owner, self.member):
+            self.assertNotIn(self.calendar.pk, visible_calendar_ids(user))
+        self.client.force_authenticate(self.member)
+        self.assertEqual(self.client.get('/api/events/').data, [])
+
+    def test_invalidation_reaches_other_processes(self):
+        other = Calendar.objects.create(user=self.owner, title='Other')
+        self.assertNotIn(other.pk, visible_calendar_ids(self.member))
+
+        # Another process has its own local cache, which the invalidation cannot clear
+        with mock.patch.object(cache, 'delete_many'), mock.patch.object(cache, 'delete'):
+            other.shared_users.add(self.member)
+            invalidate_visible_calendars([self.member.pk])
+
+        self.assertIn(other.pk, visible_calendar_ids(self.member))
+
+    def test_delete_changes_etags_of_members_lists(self):
+        lists = [(self.owner, '/api/calendars/'), (self.member, '/api/calendars/shared/')]
+        lists += [(user, '/api/events/') for user in (self.owner, self.member)]
+        etags = {}
+        for user, url in lists:
+            self.client.force_authenticate(user)
+            etags[user, url] = self.client.get(url)['ETag']
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etags[user, url]).status_code, 304)
+        calendar_version = collection_versions('calendar', [self.calendar.pk])[str(self.calendar.pk)]
+
+        self.assertEqual(self.delete_calendar().status_code, 200)
+
+        for user, url in lists:
+            self.client.force_authenticate(user)
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[user, url])
+            self.assertEqual(response.status_code, 200, url)
+            self.assertNotEqual(response['ETag'], etags[user, url])
+            self.assertNotIn(self.calendar.pk, [item['cal_id'] for item in response.data])
+        self.assertGreater(collection_versions('calendar', [self.calendar.pk])[str(self.calendar.pk)], calendar_version)
+
+
+ICS_SOURCE = b"""BEGIN:VCALENDAR
+VERSION:2.0
+PRODID:-//Tests//EN
+BEGIN:VEVENT
+UID:1@example.com
+DTSTART:20261102T090000Z
+DTEND:20261102T100000Z
+SUMMARY:Planning
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+class StaleImportJobTests(TestCase):
+    """
+    Import jobs whose worker died are failed and their partial calendar removed.
+    """
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media = override_settings(MEDIA_ROOT=media_root.name)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.user = CustomUser.objects.create(email='importer@example.com', username='importer')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def abandoned_job(self):
+        # A job whose worker died after importing one event
+        calendar = Calendar.objects.create(user=self.user, title='Imported')
+        start = datetime(2026, 11, 2, 9, tzinfo=dt_timezone.utc)
+        Event.objects.create(cal_id=calendar, user=self.user, title='Partial', start=start, end=start + timedelta(hours=1))
+        return ImportJob.objects.create(
+            user=self.user, title='Imported', source=self.upload(), status='running', calendar=calendar,
+            started_at=timezone.now() - timedelta(hours=1), claimed_until=timezone.now() - timedelta(minutes=1),
+        ), calendar
+
+    def upload(self):
+        return ContentFile(ICS_SOURCE, name='calendar.ics')
+
+    def assert_failed_and_discarded(self, job, calendar):
+        source = job.source.name
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertFalse(job.source)
+        self.assertFalse(job.source.storage.exists(source))
+        self.assertFalse(Calendar.objects.filter(pk=calendar.pk).exists())
+        self.assertFalse(Event.objects.filter(cal_id=calendar.pk).exists())
+
+    def test_worker_poll_fails_expired_claims(self):
+        job, calendar = self.abandoned_job()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertIsNone(claim_next_job())
+
+        self.assert_failed_and_discarded(job, calendar)
+
+    def test_status_request_fails_expired_claim(self):
+        job, calendar = self.abandoned_job()
+
+        response = self.client.get(f'/api/calendars/import/{job.pk}/')
+
+        self.assertEqual(response.data['status'], 'failed')
+        self.assert_failed_and_discarded(job, calendar)
+
+    def test_live_claims_are_kept(self):
+        job, calendar = self.abandoned_job()
+        ImportJob.objects.filter(pk=job.pk).update(claimed_until=timezone.now() + timedelta(minutes=5))
+
+        self.assertEqual(fail_stale_jobs(), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'running')
+        self.assertTrue(Calendar.objects.filter(pk=calendar.pk).exists())
+
+    def test_upload_is_stored_and_streamed_by_the_job(self):
+        upload = SimpleUploadedFile('calendar.ics', ICS_SOURCE, content_type='text/calendar')
+        response = self.client.post('/api/calendars/import/', {'ics_file': upload, 'title': 'Imported'})
+        self.assertEqual(response.status_code, 202)
+        job = ImportJob.objects.get(pk=response.data['job_id'])
+        source = job.source.name
+        self.assertTrue(source.startswith('imports/'))
+        self.assertTrue(job.source.storage.exists(source))
+
+        process_import_job(claim_job(job.pk))
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.imported, job.claimed_until), ('succeeded', 1, None))
+        self.assertEqual(Event.objects.filter(cal_id=job.calendar_id).count(), 1)
+        self.assertFalse(job.source)
+        self.assertFalse(job.source.storage.exists(source))
+
+    def test_worker_stops_once_its_job_was_failed(self):
+        job = ImportJob.objects.create(user=self.user, title='Imported', source=self.upload())
+        job = claim_job(job.pk)
+        # Another process considers the job abandoned before the worker reports progress
+        ImportJob.objects.filter(pk=job.pk).update(claimed_until=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(fail_stale_jobs(), 1)
+
+        process_import_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertFalse(Calendar.objects.filter(user=self.user).exists())
+
+
+class ImportValidationTests(TestCase):
+    """
+    VEVENTs that do not fit the columns are reported without failing the rest of the import.
+    """
+    def setUp(self):
+        self.user = CustomUser.objects.create(email='importer@example.com', username='importer')
+        self.calendar = Calendar.objects.create(user=self.user, title='Imported')
+
+    def vevent(self, uid, summary):
+        return f"BEGIN:VEVENT\r\nUID:{uid}\r\nDTSTART:20261102T090000Z\r\nDTEND:20261102T100000Z\r\nSUMMARY:{summary}\r\nEND:VEVENT\r\n"
+
+    def test_over_long_summary_is_reported(self):
+        source = 'BEGIN:VCALENDAR\r\nVERSION:2.0\r\n' + self.vevent('1@example.com', 'Planning') \
+            + self.vevent('2@example.com', 'x' * 300) + self.vevent('3@example.com', 'Review') + 'END:VCALENDAR\r\n'
+
+        imported, errors = import_ics([source.encode()], self.calendar, self.user, lambda summary: '#000000')
+
+        self.assertEqual(imported, 2)
+        self.assertEqual([(error['index'], error['uid']) for error in errors], [(2, '2@example.com')])
+        self.assertIn('title', errors[0]['error'])
+        self.assertEqual(
+            sorted(Event.objects.filter(cal_id=self.calendar).values_list('title', flat=True)), ['Planning', 'Review']
+        )
+
+
+class ImportJobBackendCheckTests(TestCase):
+    """
+    The startup check on `IMPORT_JOB_BACKEND`.
+    """
+    def check(self, backend, dev_mode):
+        with override_settings(IMPORT_JOB_BACKEND=backend), mock.patch.dict('os.environ', {'DEV_MODE': dev_mode}):
+            return [message.id for message in check_import_job_backend(None)]
+
+    def test_thread_backend_is_only_for_development(self):
+        self.assertEqual(self.check('thread', 'true'), [])
+        self.assertEqual(self.check('thread', 'false'), ['calendars.W001'])
+        self.assertEqual(self.check('db', 'false'), [])
+
+    def test_unknown_backend(self):
+        self.assertEqual(self.check('celery', 'true'), ['calendars.E001'])
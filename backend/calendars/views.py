@@ -1,40 +1,33 @@
-import random
-from datetime import datetime
-from io import BytesIO
-from typing import List
-from dateutil import parser
-from pytz import UTC
-from django.http import HttpResponse
-from django.template.loader import render_to_string
-from django.core.mail import EmailMessage
-from icalendar import Calendar as ICalendar, Event as ICalEvent
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.views.decorators.http import require_safe
 
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from events.models import Event
-from .models import Calendar
+from sync.changelog import calendar_member_ids, invitee_emails, record_calendar_change
+from sync.versions import collection_validators, not_modified, with_validators
+from .models import Calendar, ImportJob
+from .feeds import export_events, feed_validators, new_feed_token, render_feed
+from .ics import iter_export
+from .membership import invalidate_visible_calendars, visible_calendar_ids
+from .jobs import enqueue_import_job, fail_stale_jobs
 from django.core.exceptions import ValidationError, ObjectDoesNotExist
-from .serializers import CalendarSerializer
-from invitations.models import CalendarInvite
+from .serializers import CalendarListSerializer, CalendarSerializer
+from invitations.bulk import invite_emails
 from invitations.serializers import CalendarInviteSerializer
 from django.utils.dateparse import parse_datetime
 from django.shortcuts import get_object_or_404
-from django.utils.crypto import get_random_string
+from django.utils.text import slugify
 from django.conf import settings
+from django.db import transaction
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Function to generate random colors, avoiding very light colors
-def generate_random_color():
-    # Generate RGB values between 0 and 200 to avoid light colors (values near 255 are too white)
-    r = random.randint(0, 240)
-    g = random.randint(0, 240)
-    b = random.randint(0, 240)
-    # Convert RGB to HEX format
-    return f"#{r:02x}{g:02x}{b:02x}"
+ICS_CONTENT_TYPE = 'text/calendar; charset=utf-8'
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
@@ -62,9 +55,14 @@ def get_calendars(request):
     ::raises ValidationError : Raised if the provided data is invalid
     """
     try:
-        calendars = Calendar.objects.filter(user=request.user)
-        serializer = CalendarSerializer(calendars, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        validators = collection_validators('calendars', request.user.pk, 'owned')
+        cached = not_modified(request, validators)
+        if cached:
+            return cached
+
+        calendars = CalendarListSerializer.setup_eager_loading(Calendar.objects.filter(user=request.user))
+        serializer = CalendarListSerializer(calendars, many=True)
+        return with_validators(Response(serializer.data, status=status.HTTP_200_OK), validators)
     except Exception as e:
         logger.exception("Error retrieving calendars")
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -83,9 +81,11 @@ def create_calendar(request):
 
         # Create the calendar
         calendar = Calendar.objects.create(user=request.user, title=title, description=description)
+        record_calendar_change(calendar, 'upsert')
+        invalidate_visible_calendars([request.user.pk])
 
-        # Process email invitations using the extracted function
-        invitations, email_statuses = process_email_invitations(calendar, emails, request.user)
+        # Invite the new email addresses in bulk, their emails are sent in the background
+        invitations, email_statuses = invite_emails(calendar, emails, request.user)
 
         # Serialize and return the calendar data and invitations
         calendar_serializer = CalendarSerializer(calendar)
@@ -169,9 +169,10 @@ def update_calendar(request, cal_id):
         
         # Save the updated calendar
         calendar.save()
+        record_calendar_change(calendar, 'upsert')
 
-        # Process email invitations using the extracted function
-        invitations, email_statuses = process_email_invitations(calendar, emails, request.user)
+        # Invite the new email addresses in bulk, their emails are sent in the background
+        invitations, email_statuses = invite_emails(calendar, emails, request.user)
         
         # Serialize and return the updated calendar data and invitations
         serializer = CalendarSerializer(calendar)
@@ -204,7 +205,14 @@ def delete_calendar(request, cal_id):
             return Response({'error': 'Cannot delete the last calendar'}, status=status.HTTP_400_BAD_REQUEST)
 
         # Proceed with deletion
-        calendar.delete()
+        member_ids = calendar_member_ids(calendar)
+        emails = invitee_emails(calendar)
+        with transaction.atomic():
+            # Log the change while the calendar still has its primary key, `delete()` resets it
+            record_calendar_change(calendar, 'delete', member_ids, emails)
+            calendar.delete()
+            # Runs once the delete is committed, so no request can cache the old memberships in between
+            transaction.on_commit(lambda: invalidate_visible_calendars(member_ids))
         return Response({'success': 'Calendar deleted'}, status=status.HTTP_200_OK)
 
     except Calendar.DoesNotExist:
@@ -223,177 +231,147 @@ def get_shared_calendars(request):
     ::return Response : A JSON response containing all the shared calendars for the user
     """
     try:
-        shared_calendars = Calendar.objects.filter(shared_users=request.user)
-        serializer = CalendarSerializer(shared_calendars, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        validators = collection_validators('calendars', request.user.pk, 'shared')
+        cached = not_modified(request, validators)
+        if cached:
+            return cached
+
+        shared_calendars = CalendarListSerializer.setup_eager_loading(Calendar.objects.filter(shared_users=request.user))
+        serializer = CalendarListSerializer(shared_calendars, many=True)
+        return with_validators(Response(serializer.data, status=status.HTTP_200_OK), validators)
     except Exception as e:
         logger.exception("Error retrieving shared calendars")
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-def process_email_invitations(calendar, emails: List[str], user):
-    """
-    Process email invitations for a calendar.
-
-    :param Calendar calendar: The calendar for which invitations are sent
-    :param list emails: A list of email addresses to invite
-    :param User user: The user who is sending the invitations
-    :return tuple: A tuple containing the list of CalendarInvite objects and the email statuses
-    """
-    invitations = []
-    email_statuses = []
-    emails = [email.lower() for email in emails]
-    for email in emails:
-        if email:
-            # Check if the email is already invited
-            if CalendarInvite.objects.filter(calendar=calendar, email=email).exists():
-                continue  # Skip if already invited
-
-            # Create an invitation
-            invite = CalendarInvite.objects.create(
-                calendar=calendar,
-                email=email,
-                invited_by=user,
-                token=get_random_string(32)  # Generate a unique token
-            )
-            
-            # Prepare and send email
-            subject = f"You've been invited to the calendar: {calendar.title}"
-            context = {
-                'calendar_name': calendar.title,
-                'invited_by': user.username,
-                'current_year': datetime.now().year
-            }
-            html_message = render_to_string('emails/invitation_email.html', context)
-            email_message = EmailMessage(
-                subject=subject,
-                body=html_message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[email]
-            )
-            email_message.content_subtype = "html"  # Set email content to HTML
-            
-            # Send the email and track the status
-            try:
-                email_success = email_message.send()
-                email_statuses.append({'email': email, 'success': email_success})
-            except Exception as email_error:
-                logger.exception(f"Failed to send email to {email}")
-                email_statuses.append({'email': email, 'success': False, 'error': str(email_error)})
-
-            invitations.append(invite)
-    
-    return invitations, email_statuses
-
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def import_ics_calendar(request):
     """
-    Import calendar data from an uploaded .ics file.
+    Queue the import of an uploaded .ics file into a new calendar.
+
+    The import runs in the background (see `calendars.jobs`), so the response does not depend on the size of the file.
+    Poll GET /api/calendars/import/<job_id>/ for its progress.
+
+    ::param File ics_file : The .ics file to import
+    ::param str/optional title : The title of the new calendar
+    ::param str/optional description : The description of the new calendar
+    ::return Response : A 202 JSON response with the `job_id` and its `status`
     """
     file = request.FILES.get('ics_file')
     if not file:
         return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        title = request.data.get('title', 'My Calendar')
-        description = request.data.get('description', '')
-        emails = request.data.get('email_list', [])  # Get the list of emails
-
-        # Create the calendar
-        calendar = Calendar.objects.create(user=request.user, title=title, description=description)
-        # Read and parse the ICS file
-        ics_data = file.read()
-        calendar_ics = ICalendar.from_ical(ics_data)
-
-        # Dictionary to store event summaries and their associated colors
-        color_map = {}
-
-        # Process calendar data
-        for component in calendar_ics.walk():
-            if component.name == "VEVENT":
-                summary = component.get('SUMMARY', 'No Title')
-                description = component.get('DESCRIPTION', '')
-                start = component.get('DTSTART').dt
-                end = component.get('DTEND').dt
-                #logger.info("Summary: %s \nDescription: %s \nStart: %s \nEnd: %s \n", summary, description, start, end)
-
-                # Check if the summary already has a color, if not generate one
-                if summary not in color_map:
-                    color_map[summary] = generate_random_color()
-
-                # Save or update the calendar events in your database
-                Event.objects.create(
-                    cal_id=calendar,
-                    title=summary,
-                    description=description,
-                    start=start,
-                    end=end,
-                    user=request.user,
-                    bg_color=color_map[summary]
-                )
-
-        return Response({'success': 'File imported successfully'}, status=status.HTTP_200_OK)
+        job = ImportJob.objects.create(
+            user=request.user,
+            title=request.data.get('title', 'My Calendar'),
+            description=request.data.get('description', ''),
+            source=file,  # Written to storage chunk by chunk, never held in memory as a whole
+        )
+        enqueue_import_job(job)
+        return Response({'job_id': job.pk, 'status': job.status}, status=status.HTTP_202_ACCEPTED)
     except Exception as e:
+        logger.exception("Error queuing calendar import")
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-    
-@api_view(['POST'])
+
+@api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def export_ics_calendar(request):
+def import_job_status(request, job_id):
     """
-    Export calendar data as a .ics file.
+    Report the progress of an import job of the authenticated user.
+
+    ::param int job_id : The ID returned by the upload
+    ::return Response : A JSON response with the `status`, the number of VEVENTs `processed` and of events `imported`,
+        the per-event `errors`, the `failure` reason of failed jobs and the `cal_id` of the new calendar
     """
-    try:
-        # Get calendar title and events from the request
-        calendar_title = request.data.get("cal_title", "My Calendar")
-        events = request.data.get("events", [])
-        logger.info("%s", events)
-
-        # Create an ICS calendar
-        ics_calendar = ICalendar()
-        ics_calendar.add('prodid', '-//My Calendar Application//EN')
-        ics_calendar.add('version', '2.0')
-        ics_calendar.add('x-wr-calname', calendar_title)
-
-        # Add events to the ICS calendar
-        for event_data in events:
-            try:
-                ics_event = ICalEvent()
-                ics_event.add('SUMMARY', event_data['title'])
-                ics_event.add('DESCRIPTION', event_data.get('description', ''))
-
-                # Convert start and end to datetime using dateutil parser
-                start = parser.isoparse(event_data['start']) if isinstance(event_data['start'], str) else event_data['start']
-                end = parser.isoparse(event_data['end']) if isinstance(event_data['end'], str) else event_data['end']
-
-                # Convert to UTC .ics format if needed (DTSTART and DTEND for UTC)
-                start_utc = start.astimezone(UTC)
-                end_utc = end.astimezone(UTC)
-
-                # Add the event to the calendar using datetime objects
-                ics_event.add('DTSTART', start_utc)
-                ics_event.add('DTEND', end_utc)
-
-                # Add the event to the calendar
-                ics_calendar.add_component(ics_event)
-            except KeyError as key_err:
-                logger.error(f"Missing required field in event: {key_err}")
-                return HttpResponse({'error': f"Missing required field in event: {key_err}"}, status=status.HTTP_400_BAD_REQUEST)
-            except Exception as e:
-                logger.error(f"Error processing event: {e}")
-                return HttpResponse({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-        # Save calendar to a BytesIO stream
-        ics_file = BytesIO()
-        ics_file.write(ics_calendar.to_ical())
-        ics_file.seek(0)
-        raw_ics_data = ics_file.getvalue()
-        # logger.info("ICS Data: %s", raw_ics_data.decode('utf-8'))
-
-        # Prepare the response with the correct content type
-        response = HttpResponse(raw_ics_data, content_type='text/calendar')
-        response['Content-Disposition'] = 'attachment; filename="calendar.ics"'
+    # Jobs whose worker died are reported as failed instead of running forever
+    fail_stale_jobs(ImportJob.objects.filter(pk=job_id, user=request.user))
+    job = get_object_or_404(
+        ImportJob.objects.only('status', 'processed', 'imported', 'errors', 'failure', 'calendar_id', 'created_at', 'finished_at'),
+        pk=job_id, user=request.user,
+    )
+    return Response({
+        'job_id': job.pk,
+        'status': job.status,
+        'processed': job.processed,
+        'imported': job.imported,
+        'errors': job.errors,
+        'failure': job.failure or None,
+        'cal_id': job.calendar_id,
+        'created_at': job.created_at.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }, status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_ics_calendar(request, cal_id):
+    """
+    Export a calendar the user owns or shares as a .ics file.
+
+    Events are read with a server-side iterator and written one VEVENT at a time, so memory does not grow with
+    the size of the calendar. Repeating events are exported as one VEVENT with an RRULE.
+
+    ::param int cal_id : The ID of the calendar to export
+    ::return StreamingHttpResponse : The `text/calendar` attachment
+    """
+    if cal_id not in visible_calendar_ids(request.user):
+        return Response({'error': 'Calendar not found'}, status=status.HTTP_404_NOT_FOUND)
 
+    try:
+        calendar = Calendar.objects.only('title').get(cal_id=cal_id)
+        response = StreamingHttpResponse(iter_export(calendar, export_events(cal_id)), content_type=ICS_CONTENT_TYPE)
+        response['Content-Disposition'] = f'attachment; filename="{slugify(calendar.title) or "calendar"}.ics"'
         return response
     except Exception as e:
-        logger.error(f"Error generating ICS calendar: {str(e)}", exc_info=True)  # Detailed logging with stack trace
-        return HttpResponse({'error': 'Internal Server Error'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        logger.exception("Error exporting calendar")
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET', 'POST', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def calendar_feed_view(request, cal_id):
+    """
+    Manage the .ics subscription URL of a calendar owned by the authenticated user.
+
+    ::param HTTPRequest request : The HTTP request object
+    ::param int cal_id : The ID of the calendar
+    ::return Response : A JSON response with the `feed_url`, null while the feed is disabled
+
+    - @GET: Retrieve the current subscription URL.
+    - @POST: Enable the feed, or rotate its token so the previous URL stops working.
+    - @DELETE: Disable the feed.
+    """
+    calendar = get_object_or_404(Calendar.objects.only('feed_token'), pk=cal_id, user=request.user)
+    try:
+        if request.method != 'GET':
+            calendar.feed_token = new_feed_token() if request.method == 'POST' else None
+            calendar.save(update_fields=['feed_token'])
+        feed_url = None
+        if calendar.feed_token:
+            feed_url = request.build_absolute_uri(reverse('subscribe_calendar', args=[calendar.feed_token]))
+        return Response({'feed_url': feed_url}, status=status.HTTP_200_OK)
+    except Exception as e:
+        logger.exception("Error managing calendar feed")
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@require_safe
+def subscribe_ics_calendar(request, token):
+    """
+    Serve the .ics subscription feed of a calendar to external calendar clients.
+
+    The secret token authenticates the request, so the view is a plain Django view: the clients send neither
+    an API token nor an `Accept` header the API would negotiate.
+
+    ::param HTTPRequest request : The HTTP request object
+    ::param str token : The secret of the subscription URL
+    ::return HttpResponse : The `text/calendar` feed, or a `304` when the client copy is current
+    ::raises Http404 : Raised if no calendar has the token
+    """
+    calendar = Calendar.objects.only('title').filter(feed_token=token).first()
+    if calendar is None:
+        raise Http404('Unknown feed')
+
+    validators = feed_validators(calendar)
+    cached = not_modified(request, validators)
+    if cached is not None:
+        return cached
+    return with_validators(HttpResponse(render_feed(calendar, validators), content_type=ICS_CONTENT_TYPE), validators)
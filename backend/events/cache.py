@@ -0,0 +1,60 @@
+"""
+File: cache.py
+Author: Jason
+Documentation updated by: Jason
+Date: 2026-10-18
+
+This module caches the serialized, expanded events of each calendar for a window in Django's cache.
+
+Entries are keyed by calendar, calendar version, window and layout rather than by user, so every member of a shared
+calendar reads the same entry. Event writes, imports and deletes bump the calendar version, which makes the
+old entries unreachable; they expire after `EVENT_WINDOW_CACHE_TIMEOUT` seconds. Membership is resolved on
+every request, so accepting an invitation or losing access takes effect immediately.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from sync.versions import collection_versions
+
+
+def window_cache_key(calendar_id, version, window, layout='list'):
+    """
+    Build the cache key of the events of a calendar for a window.
+
+    ::param int calendar_id : The calendar
+    ::param int version : The current version of the calendar
+    ::param tuple(datetime, datetime)/optional window : The `[start, end)` window, `None` for the whole calendar
+    ::param str layout : 'list' for the serialized events, 'columnar' for the columnar payload
+    ::return str : The cache key
+    """
+    span = f'{window[0].isoformat()}/{window[1].isoformat()}' if window else 'all'
+    return f'event_window:{layout}:{calendar_id}:{version}:{span}'
+
+
+def get_cached_windows(calendar_ids, window, layout='list'):
+    """
+    Read the cached events of several calendars for a window with one version query and one cache round trip.
+
+    ::param iterable(int) calendar_ids : The calendars to read
+    ::param tuple(datetime, datetime)/optional window : The `[start, end)` window, `None` for the whole calendar
+    ::param str layout : 'list' for the serialized events, 'columnar' for the columnar payload
+    ::return tuple(dict, dict) : The cached events keyed by calendar id, and the cache keys of the calendars that missed
+    """
+    versions = collection_versions('calendar', calendar_ids)
+    keys = {calendar_id: window_cache_key(calendar_id, versions[str(calendar_id)], window, layout) for calendar_id in calendar_ids}
+    cached = cache.get_many(keys.values())
+    hits = {calendar_id: cached[key] for calendar_id, key in keys.items() if key in cached}
+    misses = {calendar_id: key for calendar_id, key in keys.items() if key not in cached}
+    return hits, misses
+
+
+def set_cached_windows(misses, events_by_calendar):
+    """
+    Store the freshly serialized events of the calendars that missed the cache.
+
+    ::param dict(int, str) misses : The cache keys returned by `get_cached_windows`
+    ::param dict(int, list(dict)/dict) events_by_calendar : The serialized events or columnar payloads keyed by calendar id
+    """
+    cache.set_many(
+        {key: events_by_calendar.get(calendar_id, []) for calendar_id, key in misses.items()},
+        timeout=settings.EVENT_WINDOW_CACHE_TIMEOUT,
+    )
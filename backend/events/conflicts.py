@@ -0,0 +1,116 @@
+"""
+File: conflicts.py
+Author: Jason
+Documentation updated by: Jason
+Date: 2026-10-18
+
+This module finds the existing events that overlap an event about to be created or updated.
+
+Candidate series are found with one range query on the series bounds: a `btree_gist` index on
+`(cal_id, tstzrange(series_start, series_end))` on PostgreSQL (see migration 0014), the
+`(cal_id, series_start, series_end)` B-tree elsewhere. The migration needs superuser or CREATE rights to install
+`btree_gist`; without them it skips the GiST index and PostgreSQL uses the B-tree too. Their occurrences are read
+from the materialized `EventOccurrence` table or expanded with the recurrence engine
+(see `occurrences.occurrence_intervals`), so recurring events conflict on every instance.
+Series are checked up to the materialization horizon, or up to the end of their first occurrence when they start after it.
+"""
+from bisect import bisect_right
+from functools import lru_cache
+from django.db import connection
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+from .models import Event
+from .occurrences import INTERVAL_FIELDS, horizon_end, occurrence_intervals
+from .recurrence import RecurrenceRule
+
+MAX_CONFLICTS = 50
+
+# Indexed expression of migration 0014, repeated verbatim so the planner matches it. Inverted bounds are
+# collapsed because `tstzrange` rejects them, and a null `series_end` is an unbounded range.
+SERIES_RANGE_SQL = (
+    "tstzrange(series_start, CASE WHEN series_end < series_start THEN series_start ELSE series_end END, '[]')"
+)
+
+
+@lru_cache(maxsize=None)
+def has_range_index():
+    """
+    Tell whether migration 0014 created the GiST index, checked once per process.
+
+    ::return bool : True if the `event_cal_series_gist` index exists
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_indexes WHERE indexname = 'event_cal_series_gist'")
+        return cursor.fetchone() is not None
+
+
+def overlapping_series(calendar_ids, start, end):
+    """
+    Restrict the events of some calendars to the series overlapping a window, through a range index.
+
+    Matches the same series as `views.filter_window`.
+
+    ::param list(int) calendar_ids : The calendars to search
+    ::param datetime start : The inclusive lower bound of the window
+    ::param datetime end : The exclusive upper bound of the window
+    ::return QuerySet : The overlapping events
+    """
+    if connection.vendor != 'postgresql' or not has_range_index():
+        return Event.objects.filter(cal_id__in=calendar_ids, series_start__lt=end).filter(
+            Q(series_end__gte=start) | Q(series_end__isnull=True)
+        )
+    if not calendar_ids:
+        return Event.objects.none()
+    # One equality per calendar lets each arm of the OR probe the (cal_id, range) GiST index, combined with a BitmapOr
+    calendars = Q()
+    for calendar_id in calendar_ids:
+        calendars |= Q(cal_id=calendar_id)
+    overlaps = RawSQL(f"{SERIES_RANGE_SQL} && tstzrange(%s, %s, '[)')", (start, end), output_field=BooleanField())
+    return Event.objects.filter(calendars, overlaps)
+
+
+def _proposed_intervals(event, until):
+    duration = event.end - event.start
+    if not duration:
+        return []
+    starts = RecurrenceRule.from_event(event).between(event.start, until)
+    return [(occurrence, occurrence + duration) for occurrence in starts]
+
+
+def find_conflicts(event, calendar_ids, limit=MAX_CONFLICTS):
+    """
+    Find the occurrences of other events that overlap the occurrences of an event.
+
+    ::param Event event : The event to check, saved or not, with its start, end and repeat fields set
+    ::param list(int) calendar_ids : The calendars to search, usually the calendars visible to the user
+    ::param int limit : The maximum number of conflicts to return
+    ::return list(dict) : The `id`, `cal_id`, `title`, `start` and `end` of each conflicting occurrence, chronologically
+    """
+    event.update_series_bounds()
+    # An event starting past the horizon is still checked on its first occurrence
+    until = max(horizon_end(), event.end)
+    if event.series_end is not None:
+        until = min(until, event.series_end)
+    proposed = _proposed_intervals(event, until)
+    if not proposed:
+        return []
+    start, end = proposed[0][0], proposed[-1][1]
+    proposed_starts = [low for low, _ in proposed]
+    duration = event.end - event.start
+
+    events = overlapping_series(calendar_ids, start, end)
+    if event.pk:
+        events = events.exclude(pk=event.pk)
+    events = {row.id: row for row in events.values_list(*INTERVAL_FIELDS, 'title', named=True)}
+    intervals = occurrence_intervals(events.values(), start, end, calendar_ids)
+
+    conflicts = []
+    for event_id, occurrences in intervals.items():
+        for low, high in occurrences:
+            # The proposed occurrences all last `duration`, the first one ending after `low` starts after `low - duration`
+            index = bisect_right(proposed_starts, low - duration)
+            if index < len(proposed_starts) and proposed_starts[index] < high:
+                row = events[event_id]
+                conflicts.append({'id': event_id, 'cal_id': row.cal_id, 'title': row.title, 'start': low, 'end': high})
+    conflicts.sort(key=lambda conflict: (conflict['start'], conflict['id']))
+    return conflicts[:limit]
@@ -0,0 +1,76 @@
+"""
+File: benchmark_event_serializer.py
+Author: Jason
+Documentation updated by: Jason
+Date: 2026-10-18
+
+This module defines a benchmark comparing `EventSerializer` with the fast row serializer used by the list endpoints.
+Run it with `python manage.py benchmark_event_serializer --count 10000`. The generated data is rolled back.
+"""
+import time
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from calendars.models import Calendar
+from events.models import Event
+from events.serializers import EventSerializer, event_rows, serialize_event_row
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    """
+    Serializes the same events with both paths, checks that the JSON is byte-identical and reports the timings.
+    """
+    help = 'Benchmark EventSerializer against the fast row serializer used by the list endpoints.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10000, help='Number of events to generate')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run_benchmark(options['count'])
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    def run_benchmark(self, count):
+        user = get_user_model().objects.create(email='benchmark@timemesh.invalid', username='benchmark')
+        calendar = Calendar.objects.create(user=user, title='Benchmark')
+        start = timezone.now().replace(microsecond=0)
+        Event.objects.bulk_create([
+            Event(
+                cal_id=calendar,
+                title=f'Event {index}',
+                description=None if index % 3 else 'Description',
+                start=start + timedelta(hours=index),
+                end=start + timedelta(hours=index + 1),
+                user=user,
+                repeat_type='WEEKLY' if index % 10 == 0 else 'NONE',
+                repeat_days=['MON', 'WED'] if index % 10 == 0 else None,
+                repeat_until=start + timedelta(days=90) if index % 10 == 0 else None,
+            )
+            for index in range(count)
+        ], batch_size=1000)
+        events = Event.objects.filter(cal_id=calendar).order_by('id')
+        renderer = JSONRenderer()
+
+        began = time.perf_counter()
+        serializer_json = renderer.render([EventSerializer(event).data for event in events])
+        serializer_time = time.perf_counter() - began
+
+        current_timezone = timezone.get_current_timezone()
+        began = time.perf_counter()
+        rows_json = renderer.render([serialize_event_row(row, current_timezone) for row in event_rows(events)])
+        rows_time = time.perf_counter() - began
+
+        self.stdout.write(f"EventSerializer:      {serializer_time * 1000:8.1f} ms")
+        self.stdout.write(f"serialize_event_row:  {rows_time * 1000:8.1f} ms")
+        self.stdout.write(f"Speedup:              {serializer_time / rows_time:8.1f}x")
+        self.stdout.write(f"Byte-identical JSON:  {serializer_json == rows_json}")
@@ -0,0 +1,94 @@
+"""
+File: explain_hot_queries.py
+Author: Jason
+Documentation updated by: Jason
+Date: 2026-10-18
+
+This module defines a command that prints the query plan of each hot endpoint query, so plan regressions
+(e.g. a dropped index) show up before deploy. Run it against a database with production-like data:
+`python manage.py explain_hot_queries --email someone@example.com --check`.
+"""
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from calendars.membership import visible_calendar_ids_query
+from calendars.models import Calendar
+from events.conflicts import overlapping_series
+from events.models import Event, EventOccurrence
+from events.views import filter_window, list_rows
+from invitations.models import CalendarInvite
+from sync.models import ChangeLogEntry
+
+# Plan lines that read a whole table, per database vendor
+FULL_SCAN_MARKERS = {
+    'postgresql': ('Seq Scan',),
+    'sqlite': ('SCAN ',),
+}
+
+
+def hot_queries(user):
+    """
+    Build the queries run by the hot endpoints for a user.
+
+    ::param CustomUser user : The user to run the queries for
+    ::return list(tuple(str, QuerySet)) : The name of each query and the query itself
+    """
+    calendar_ids = list(visible_calendar_ids_query(user))
+    start = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    window = (start - timedelta(days=7), start + timedelta(days=38))
+    calendar = Calendar.objects.filter(user=user).first()
+    return [
+        ('calendars: visible ids (get_events)', visible_calendar_ids_query(user)),
+        ('calendars: owned (get_calendars)', Calendar.objects.filter(user=user)),
+        ('calendars: shared (get_shared_calendars)', Calendar.objects.filter(shared_users=user)),
+        ('events: month window (get_events)', list_rows(filter_window(Event.objects.filter(cal_id__in=calendar_ids), window))),
+        ('events: occurrence range scan (get_events)', EventOccurrence.objects.filter(
+            calendar__in=calendar_ids, start__gte=window[0], start__lt=window[1]
+        ).values_list('event_id', 'start')),
+        ('events: conflict candidates (create_event)', overlapping_series(calendar_ids, start, start + timedelta(hours=1))),
+        ('events: upcoming (ai)', Event.objects.filter(
+            user=user, start__gte=timezone.now(), start__lte=timezone.now() + timedelta(days=30)
+        )),
+        ('invitations: by email (get_invites_by_email)', CalendarInvite.objects.filter(email=user.email)),
+        ('invitations: existing (invite_emails)', CalendarInvite.objects.filter(
+            calendar=calendar, email__in=[user.email]
+        ).values_list('email', flat=True)),
+        ('sync: change log (sync_view)', ChangeLogEntry.objects.filter(user=user, version__gt=0)),
+    ]
+
+
+class Command(BaseCommand):
+    """
+    Runs EXPLAIN on each hot endpoint query and reports its plan, optionally failing when a query scans a whole table.
+    """
+    help = 'Print the query plan of each hot endpoint query.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', help='Email of the user to run the queries for, defaults to the first user')
+        parser.add_argument('--check', action='store_true', help='Exit with an error if a query scans a whole table')
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.order_by('pk')
+        user = users.filter(email=options['email']).first() if options['email'] else users.first()
+        if user is None:
+            raise CommandError('No user to run the queries for')
+
+        markers = FULL_SCAN_MARKERS.get(connection.vendor, ())
+        full_scans = []
+        for name, queryset in hot_queries(user):
+            plan = queryset.explain()
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(plan)
+            self.stdout.write('')
+            # SQLite reports index reads as "SEARCH" or "SCAN ... USING ... INDEX"
+            if any(marker in line and 'INDEX' not in line for line in plan.splitlines() for marker in markers):
+                full_scans.append(name)
+
+        if full_scans:
+            self.stdout.write(self.style.WARNING(f"Full table scans in: {', '.join(full_scans)}"))
+            if options['check']:
+                raise CommandError(f'{len(full_scans)} hot queries scan a whole table')
+        else:
+            self.stdout.write(self.style.SUCCESS('Every hot query reads through an index'))
@@ -0,0 +1,28 @@
+"""
+File: extend_occurrences.py
+Author: Jason
+Documentation updated by: Jason
+Date: 2026-10-18
+
+This module defines the rolling horizon job that keeps the `EventOccurrence` table materialized ahead of time.
+Schedule it to run daily, e.g. `python manage.py extend_occurrences`.
+"""
+from django.core.management.base import BaseCommand
+from events.occurrences import events_to_extend, extend_occurrences, horizon_end
+
+
+class Command(BaseCommand):
+    """
+    Extends the materialized occurrences of every series up to the rolling horizon.
+    Series that have never been materialized are written from their first instance.
+    """
+    help = 'Materialize event occurrences up to the rolling horizon (EVENT_OCCURRENCE_HORIZON_DAYS).'
+
+    def handle(self, *args, **options):
+        until = horizon_end()
+        series_count = 0
+        occurrence_count = 0
+        for event in events_to_extend(until).iterator(chunk_size=500):
+            occurrence_count += extend_occurrences(event, until)
+            series_count += 1
+        self.stdout.write(f"Extended {series_count} series with {occurrence_count} occurrences up to {until.isoformat()}")
@@ -0,0 +1,44 @@
+# Generated by Django 5.1 on 2026-10-18 12:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_series_bounds(apps, schema_editor):
+    Event = apps.get_model('events', 'Event')
+    for event in Event.objects.all().iterator():
+        event.series_start = event.start
+        if event.repeat_type == 'NONE' or not event.repeat_type:
+            event.series_end = event.end
+        elif event.repeat_until:
+            event.series_end = event.repeat_until + (event.end - event.start)
+        else:
+            event.series_end = None
+        event.save(update_fields=['series_start', 'series_end'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calendars', '0001_initial'),
+        ('events', '0009_alter_event_repeat_until'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='series_end',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='series_start',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_series_bounds, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['cal_id', 'series_start', 'series_end'], name='event_cal_series_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.1 on 2026-10-18 13:40
+
+import logging
+from django.db import DatabaseError, migrations, transaction
+
+logger = logging.getLogger(__name__)
+
+# Must match `events.conflicts.SERIES_RANGE_SQL` so the planner uses the index
+SERIES_RANGE_SQL = (
+    "tstzrange(series_start, CASE WHEN series_end < series_start THEN series_start ELSE series_end END, '[]')"
+)
+
+
+def has_btree_gist(schema_editor):
+    """
+    Make sure the `btree_gist` extension is installed, which creating it requires superuser or CREATE rights.
+    Returns False when the role may not create it, e.g. on some managed PostgreSQL plans.
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'btree_gist'")
+        if cursor.fetchone():
+            return True
+    try:
+        # In a savepoint, so a refusal does not abort the migration transaction
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    except DatabaseError:
+        return False
+    return True
+
+
+def create_range_index(apps, schema_editor):
+    # Range types and GiST only exist on PostgreSQL, other databases keep the B-tree on the series bounds
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    if not has_btree_gist(schema_editor):
+        # `events.conflicts.overlapping_series` falls back to the B-tree when the index is missing. Run
+        # `CREATE EXTENSION btree_gist` as a privileged role and migrate back and forth to add it later
+        logger.warning('The btree_gist extension could not be created, skipping the event_cal_series_gist index')
+        return
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS event_cal_series_gist ON events_event USING gist (cal_id_id, ({SERIES_RANGE_SQL}))'
+    )
+
+
+def drop_range_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS event_cal_series_gist')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0013_event_exdates_event_rrule_alter_event_repeat_type'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_range_index, drop_range_index),
+    ]
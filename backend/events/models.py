@@ -25,6 +25,11 @@ class Event(models.Model):
     ::field DateTimeField end : The end date and time of the event.
     ::field CharField bg_color : Background color for the event in hexadecimal format. Defaults to '#FFFFFF'.
     ::field ForeignKey user : Links the event to a user. Uses the `AUTH_USER_MODEL` with a CASCADE delete policy.
+    ::field TextField rrule : The RFC 5545 recurrence rule of 'CUSTOM' series that the repeat fields cannot express, bounded by `repeat_until`.
+    ::field JSONField exdates : The ISO 8601 starts of the occurrences removed from the series (EXDATE and overridden instances).
+    ::field DateTimeField series_start : The start of the first instance of the series. Kept in sync on save.
+    ::field DateTimeField series_end : The end of the last instance of the series, null when the series is open-ended. Kept in sync on save.
+    ::field DateTimeField materialized_until : The exclusive bound up to which the series has rows in `EventOccurrence`.
     """
     REPEAT_CHOICES = [
         ('NONE', 'Does not repeat'),
@@ -32,6 +37,7 @@ class Event(models.Model):
         ('WEEKLY', 'Weekly'),
         ('MONTHLY', 'Monthly'),
         ('YEARLY', 'Yearly'),
+        ('CUSTOM', 'Custom rule'),
     ]
 
     cal_id = models.ForeignKey(Calendar, on_delete=models.CASCADE, related_name='events')
@@ -47,6 +53,20 @@ class Event(models.Model):
     repeat_until = models.DateTimeField(null=True, blank=True)
     repeat_days = models.JSONField(null=True, blank=True)  # For storing days of the week for weekly repeats
     repeated_dates = models.JSONField(default=list, blank=True)  # New field to store repeated dates
+    rrule = models.TextField(null=True, blank=True)  # RFC 5545 rule of imported 'CUSTOM' series, without UNTIL or COUNT
+    exdates = models.JSONField(default=list, blank=True)  # Starts of the occurrences removed from the series
+
+    # Denormalized bounds of the whole series so range queries can find every series overlapping a window
+    series_start = models.DateTimeField(null=True, blank=True, editable=False)
+    series_end = models.DateTimeField(null=True, blank=True, editable=False)
+    materialized_until = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['cal_id', 'series_start', 'series_end'], name='event_cal_series_idx'),
+            models.Index(fields=['cal_id', 'start', 'end'], name='event_cal_start_end_idx'),
+            models.Index(fields=['user', 'start'], name='event_user_start_idx'),
+        ]
 
     def __str__(self):
         """
@@ -55,7 +75,34 @@ class Event(models.Model):
         ::return str: The event title followed by the calendar title.
         """
         return f"{self.title}"
-    
+
+    def save(self, *args, **kwargs):
+        """
+        Overriding the save method to keep the series bounds in sync with the start, end and repeat fields.
+        """
+        self.update_series_bounds()
+        super().save(*args, **kwargs)
+
+    def update_series_bounds(self):
+        """
+        Recompute `series_start` and `series_end` from the start, end and repeat fields.
+        Call this before `bulk_create`/`bulk_update`, which bypass `save`.
+        """
+        # The fields may hold ISO strings, e.g. `Event.objects.create(start='2026-11-02T09:00:00Z', ...)`
+        for field in ('start', 'end', 'repeat_until'):
+            value = self._meta.get_field(field).to_python(getattr(self, field))
+            if value is not None and settings.USE_TZ and timezone.is_naive(value):
+                value = timezone.make_aware(value)
+            setattr(self, field, value)
+        self.series_start = self.start
+        if self.repeat_type == 'NONE' or not self.repeat_type:
+            self.series_end = self.end
+        elif self.repeat_until:
+            # The last instance starts at or before repeat_until and lasts as long as the first one
+            self.series_end = self.repeat_until + (self.end - self.start)
+        else:
+            self.series_end = None
+
     def set_repeated_dates(self, dates):
         # Handle both datetime objects and string inputs
         self.repeated_dates = [
@@ -68,4 +115,36 @@ class Event(models.Model):
         return [
             timezone.datetime.fromisoformat(date) if isinstance(date, str) else date
             for date in self.repeated_dates
-        ]
\ No newline at end of file
+        ]
+
+
+class EventOccurrence(models.Model):
+    """
+    Represents a single materialized instance of an event series.
+
+    Occurrences are written when a series is created or edited and extended by the rolling horizon job,
+    so window queries are indexed range scans instead of recurrence expansion.
+
+    ::field ForeignKey event : The series the occurrence belongs to. Uses a CASCADE delete policy.
+    ::field ForeignKey calendar : The calendar of the series, denormalized so calendar range scans need no join.
+    ::field DateTimeField start : The start date and time of the occurrence.
+    ::field DateTimeField end : The end date and time of the occurrence.
+    """
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='occurrences')
+    calendar = models.ForeignKey(Calendar, on_delete=models.CASCADE, related_name='occurrences')
+    start = models.DateTimeField()
+    end = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['calendar', 'start', 'end'], name='occurrence_cal_time_idx'),
+            models.Index(fields=['event', 'start'], name='occurrence_event_start_idx'),
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the occurrence.
+
+        ::return str: The event title followed by the start of the occurrence.
+        """
+        return f"{self.event.title} @ {self.start.isoformat()}"
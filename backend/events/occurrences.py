@@ -0,0 +1,216 @@
+"""
+File: occurrences.py
+Author: Jason
+Documentation updated by: Jason
+Date: 2026-10-18
+
+This module maintains the materialized `EventOccurrence` table and answers window queries from it.
+
+Occurrences are written per series when it is created or edited, and the rolling horizon job
+(`manage.py extend_occurrences`) appends the occurrences that come into range over time.
+Series that are not materialized far enough for a window are expanded with the recurrence engine instead.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import Event, EventOccurrence
+from .recurrence import RecurrenceRule
+from .vectorized import expand_occurrences, occurrence_rows
+
+OCCURRENCE_BATCH_SIZE = 500
+
+
+def horizon_end(now=None):
+    """
+    Return the exclusive bound up to which occurrences are materialized.
+
+    ::param datetime/optional now : The reference time, defaults to the current time
+    ::return datetime : `now` plus `EVENT_OCCURRENCE_HORIZON_DAYS`
+    """
+    return (now or timezone.now()) + timedelta(days=settings.EVENT_OCCURRENCE_HORIZON_DAYS)
+
+
+def _write_occurrences(event, start, end):
+    rule = RecurrenceRule.from_event(event)
+    duration = event.end - event.start
+    occurrences = [
+        EventOccurrence(event=event, calendar_id=event.cal_id_id, start=occurrence, end=occurrence + duration)
+        for occurrence in rule.iter_occurrences(start, end)
+    ]
+    EventOccurrence.objects.bulk_create(occurrences, batch_size=OCCURRENCE_BATCH_SIZE)
+    Event.objects.filter(pk=event.pk).update(materialized_until=end)
+    event.materialized_until = end
+    return len(occurrences)
+
+
+def materialize_occurrences(event, until=None):
+    """
+    Rewrite the occurrences of a series from its first instance up to the horizon.
+    Call this whenever the start, end or repeat fields of the series change.
+
+    ::param Event event : The saved series to materialize
+    ::param datetime/optional until : The exclusive bound to materialize up to, defaults to the horizon
+    ::return int : The number of occurrences written
+    """
+    until = max(until or horizon_end(), event.start + timedelta(microseconds=1))
+    with transaction.atomic():
+        EventOccurrence.objects.filter(event=event).delete()
+        return _write_occurrences(event, event.start, until)
+
+
+def materialize_new_occurrences(events, until=None):
+    """
+    Write the occurrences of a batch of series that were just created with `bulk_create`, in as few queries as possible.
+
+    ::param list(Event) events : The saved series, none of which has occurrences yet
+    ::param datetime/optional until : The exclusive bound to materialize up to, defaults to the horizon
+    ::return int : The number of occurrences written
+    """
+    until = until or horizon_end()
+    occurrences = []
+    bounds = defaultdict(list)
+    for event in events:
+        event_until = max(until, event.start + timedelta(microseconds=1))
+        duration = event.end - event.start
+        occurrences.extend(
+            EventOccurrence(event=event, calendar_id=event.cal_id_id, start=occurrence, end=occurrence + duration)
+            for occurrence in RecurrenceRule.from_event(event).iter_occurrences(event.start, event_until)
+        )
+        bounds[event_until].append(event.pk)
+        event.materialized_until = event_until
+    with transaction.atomic():
+        EventOccurrence.objects.bulk_create(occurrences, batch_size=OCCURRENCE_BATCH_SIZE)
+        for event_until, event_ids in bounds.items():
+            Event.objects.filter(pk__in=event_ids).update(materialized_until=event_until)
+    return len(occurrences)
+
+
+def extend_occurrences(event, until=None):
+    """
+    Append the occurrences of a series between its current `materialized_until` and `until`.
+
+    ::param Event event : The saved series to extend
+    ::param datetime/optional until : The exclusive bound to extend up to, defaults to the horizon
+    ::return int : The number of occurrences written
+    """
+    until = until or horizon_end()
+    if event.materialized_until is None:
+        return materialize_occurrences(event, until)
+    if event.materialized_until >= until:
+        return 0
+    with transaction.atomic():
+        return _write_occurrences(event, event.materialized_until, until)
+
+
+def events_to_extend(until=None):
+    """
+    Return the series whose materialized occurrences stop short of `until` and that have instances left to write.
+
+    ::param datetime/optional until : The exclusive bound to check against, defaults to the horizon
+    ::return QuerySet : The events that the horizon job has to extend
+    """
+    until = until or horizon_end()
+    return Event.objects.filter(
+        Q(materialized_until__isnull=True)
+        | (Q(materialized_until__lt=until) & (Q(series_end__isnull=True) | Q(series_end__gt=F('materialized_until'))))
+    )
+
+
+def is_materialized(event, end):
+    """
+    Check whether every occurrence of a series that starts before `end` has been written to the table.
+
+    ::param Event event : The series to check
+    ::param datetime end : The exclusive bound that has to be covered
+    ::return bool : True if the table can answer for the series up to `end`
+    """
+    if event.materialized_until is None:
+        return False
+    if event.materialized_until >= end:
+        return True
+    # Finite series whose last instance starts before the materialized bound are complete
+    last_start = event.start if event.repeat_type == 'NONE' else event.repeat_until
+    return last_start is not None and last_start < event.materialized_until
+
+
+def occurrences_between(events, start, end, calendars=None):
+    """
+    Return the occurrence starts of each event within `[start, end)`.
+
+    Series materialized past `end` are read with a single indexed range scan, over the calendars when
+    they are given (one scan for a whole listing) or over the event ids otherwise (one scan per batch).
+    The rest are expanded with the recurrence engine.
+
+    ::param iterable(Event) events : The events to expand, model instances or named rows with the repeat fields
+    ::param QuerySet/list/optional calendars : The calendars the events belong to
+    ::param datetime start : The inclusive lower bound of the window
+    ::param datetime end : The exclusive upper bound of the window
+    ::return dict(int, list(datetime)) : The occurrence starts keyed by event id in chronological order
+    """
+    occurrences = defaultdict(list)
+    materialized = set()
+    for event in events:
+        if is_materialized(event, end):
+            materialized.add(event.id)
+        else:
+            occurrences[event.id] = RecurrenceRule.from_event(event).between(start, end)
+
+    if materialized:
+        rows = EventOccurrence.objects.filter(start__gte=start, start__lt=end)
+        if calendars is not None:
+            rows = rows.filter(calendar__in=calendars)
+        else:
+            rows = rows.filter(event_id__in=materialized)
+        rows = rows.order_by('start').values_list('event_id', 'start')
+        for event_id, occurrence in rows:
+            if event_id in materialized:
+                occurrences[event_id].append(occurrence)
+    return occurrences
+
+
+# Columns needed by `occurrence_intervals`, for `QuerySet.values_list(*INTERVAL_FIELDS, named=True)`
+INTERVAL_FIELDS = ('id', 'cal_id', 'start', 'end', 'repeat_type', 'repeat_until', 'repeat_days', 'rrule', 'exdates', 'materialized_until')
+
+
+def occurrence_intervals(events, start, end, calendars=None):
+    """
+    Return the `(start, end)` of every occurrence of each event that overlaps `[start, end)`.
+
+    Unlike `occurrences_between`, occurrences that started before the window and are still running are included,
+    as needed to tell when someone is busy. Materialized series are read with one indexed range scan, reaching back
+    by the longest duration among them; the rest are expanded in one batch (see `vectorized.expand_occurrences`).
+
+    ::param iterable(Event) events : The events to expand, model instances or named rows with the `INTERVAL_FIELDS`
+    ::param datetime start : The inclusive lower bound of the window
+    ::param datetime end : The exclusive upper bound of the window
+    ::param QuerySet/list/optional calendars : The calendars the events belong to, lets the table be scanned by calendar
+    ::return dict(int, list(tuple(datetime, datetime))) : The occurrences keyed by event id in chronological order,
+        zero-length occurrences left out
+    """
+    intervals = defaultdict(list)
+    durations = {}
+    expanded = []
+    for event in events:
+        duration = event.end - event.start
+        if not duration:
+            continue
+        if is_materialized(event, end):
+            durations[event.id] = duration
+        else:
+            expanded.append(event)
+    for event_id, occurrence_start, occurrence_end in occurrence_rows(expand_occurrences(expanded, start, end, overlapping=True)):
+        intervals[event_id].append((occurrence_start, occurrence_end))
+
+    if durations:
+        rows = EventOccurrence.objects.filter(start__gte=start - max(durations.values()), start__lt=end, end__gt=start)
+        if calendars is not None:
+            rows = rows.filter(calendar__in=calendars)
+        else:
+            rows = rows.filter(event_id__in=durations)
+        for event_id, occurrence_start, occurrence_end in rows.order_by('start').values_list('event_id', 'start', 'end'):
+            if event_id in durations:
+                intervals[event_id].append((occurrence_start, occurrence_end))
+    return intervals
@@ -0,0 +1,88 @@
+"""
+File: pagination.py
+Author: Jason
+Documentation updated by: Jason
+Date: 2026-10-18
+
+This module provides keyset (cursor) pagination helpers for list endpoints.
+
+Pages are selected with a `WHERE (field, id) > (cursor)` condition instead of an OFFSET,
+so every page costs the same no matter how deep into the listing the client is.
+"""
+import base64
+import json
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(value, pk):
+    """
+    Encode the position of a row as an opaque cursor.
+
+    ::param datetime value : The value of the ordering field of the row
+    ::param int pk : The primary key of the row, used to break ties
+    ::return str : The URL-safe cursor
+    """
+    payload = json.dumps([value.isoformat(), pk]).encode()
+    return base64.urlsafe_b64encode(payload).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by `encode_cursor`.
+
+    ::param str cursor : The cursor sent by the client
+    ::return tuple(datetime, int) : The ordering value and primary key of the last row of the previous page
+    ::raises ValueError : Raised if the cursor is malformed
+    """
+    try:
+        value, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        value = parse_datetime(value)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise ValueError('Invalid cursor')
+    if value is None or not isinstance(pk, int):
+        raise ValueError('Invalid cursor')
+    return value, pk
+
+
+def parse_page_size(raw_page_size):
+    """
+    Parse the requested page size, clamping it to `MAX_PAGE_SIZE`.
+
+    ::param str/optional raw_page_size : The page size sent by the client
+    ::return int : The page size to use
+    ::raises ValueError : Raised if the page size is not a positive integer
+    """
+    if not raw_page_size:
+        return DEFAULT_PAGE_SIZE
+    page_size = int(raw_page_size)
+    if page_size < 1:
+        raise ValueError('page_size must be a positive integer')
+    return min(page_size, MAX_PAGE_SIZE)
+
+
+def keyset_page(queryset, field, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Return one page of a queryset ordered by `(field, id)`.
+
+    ::param QuerySet queryset : The rows to paginate, model instances or named `values_list` rows with an `id`
+    ::param str field : The name of the datetime field to order by
+    ::param str/optional cursor : The cursor returned with the previous page
+    ::param int page_size : The maximum number of rows in the page
+    ::return tuple(list, str) : The rows of the page and the cursor of the next page, `None` on the last page
+    ::raises ValueError : Raised if the cursor is malformed
+    """
+    queryset = queryset.order_by(field, 'id')
+    if cursor:
+        value, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(**{f'{field}__gt': value}) | Q(**{field: value, 'id__gt': pk}))
+
+    # Fetch one extra row to know whether another page follows
+    rows = list(queryset[:page_size + 1])
+    if len(rows) <= page_size:
+        return rows, None
+    last = rows[page_size - 1]
+    return rows[:page_size], encode_cursor(getattr(last, field), last.id)
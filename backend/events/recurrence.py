@@ -0,0 +1,190 @@
+"""
+File: recurrence.py
+Author: Jason
+Documentation updated by: Jason
+Date: 2026-10-18
+
+This module contains the recurrence engine used to expand repeating events into their occurrences.
+
+Occurrences are computed arithmetically from the rule, so the engine can jump straight to the first
+occurrence of any window instead of walking day by day from the first instance of the series.
+Imported rules that do not fit the repeat fields ('CUSTOM') are stored as an RFC 5545 RRULE and expanded with dateutil.
+"""
+import calendar as pycalendar
+from datetime import timedelta
+from itertools import count
+from dateutil.rrule import rrulestr
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+WEEKDAYS = {'MON': 0, 'TUE': 1, 'WED': 2, 'THU': 3, 'FRI': 4, 'SAT': 5, 'SUN': 6}
+
+ONE_DAY = timedelta(days=1)
+ONE_WEEK = timedelta(weeks=1)
+
+
+def add_months(value, months, day=None):
+    """
+    Shift a datetime by a number of months, clamping the day to the length of the target month.
+
+    ::param datetime value : The datetime to shift
+    ::param int months : The number of months to add (may be negative)
+    ::param int/optional day : The preferred day of the month, defaults to the day of `value`
+    ::return datetime : The shifted datetime, e.g. Jan 31 + 1 month is Feb 28 (or 29)
+    """
+    month_index = value.month - 1 + months
+    year = value.year + month_index // 12
+    month = month_index % 12 + 1
+    day = min(day or value.day, pycalendar.monthrange(year, month)[1])
+    return value.replace(year=year, month=month, day=day)
+
+
+def _ceil_div(delta, step):
+    """
+    Return the smallest integer n such that `n * step >= delta`.
+    """
+    return -((-delta) // step)
+
+
+def _aware(value):
+    if value is not None and timezone.is_naive(value):
+        return timezone.make_aware(value)
+    return value
+
+
+class RecurrenceRule:
+    """
+    Describes how an event repeats and computes its occurrences lazily.
+
+    ::field str repeat_type : One of 'NONE', 'DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY' or 'CUSTOM'
+    ::field datetime dtstart : The start of the first instance of the series
+    ::field datetime/optional until : The inclusive upper bound of the series, `None` when open-ended
+    ::field list(int) weekdays : Sorted weekday numbers (Monday is 0) for weekly rules with repeat days
+    ::field set(datetime) exdates : The starts of the occurrences removed from the series
+    """
+    def __init__(self, repeat_type, dtstart, until=None, repeat_days=None, rrule=None, exdates=None):
+        self.repeat_type = repeat_type if repeat_type in ('DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY') else 'NONE'
+        self.dtstart = _aware(dtstart)
+        self.until = _aware(until)
+        self.exdates = {_aware(parse_datetime(value) if isinstance(value, str) else value) for value in exdates or ()}
+        self._rrule = None
+        if repeat_type == 'CUSTOM' and rrule:
+            # Bounds are kept in `until`, the stored rule has no UNTIL or COUNT
+            self._rrule = rrulestr(rrule, dtstart=self.dtstart)
+            self.repeat_type = 'CUSTOM'
+        self.weekdays = []
+        if self.repeat_type == 'WEEKLY' and repeat_days:
+            self.weekdays = sorted({WEEKDAYS[day] for day in repeat_days if day in WEEKDAYS})
+
+        # Weekly rules with repeat days are laid out as slots counted from the Monday of the first week
+        self._week_anchor = self.dtstart - timedelta(days=self.dtstart.weekday())
+        self._first_slot = sum(1 for weekday in self.weekdays if weekday < self.dtstart.weekday())
+
+    @classmethod
+    def from_event(cls, event):
+        """
+        Build the recurrence rule of an `Event` instance.
+
+        ::param Event event : The event whose repeat fields describe the rule
+        ::return RecurrenceRule : The rule for the event
+        """
+        return cls(event.repeat_type, event.start, event.repeat_until, event.repeat_days, event.rrule, event.exdates)
+
+    def occurrence(self, index):
+        """
+        Return the start of the occurrence with the given zero-based index, ignoring `until`.
+
+        ::param int index : The index of the occurrence in the series
+        ::return datetime : The start of the occurrence
+        """
+        if self.repeat_type == 'DAILY':
+            return self.dtstart + index * ONE_DAY
+        if self.repeat_type == 'WEEKLY':
+            if not self.weekdays:
+                return self.dtstart + index * ONE_WEEK
+            week, slot = divmod(index + self._first_slot, len(self.weekdays))
+            return self._week_anchor + week * ONE_WEEK + timedelta(days=self.weekdays[slot])
+        if self.repeat_type == 'MONTHLY':
+            return add_months(self.dtstart, index, day=self.dtstart.day)
+        if self.repeat_type == 'YEARLY':
+            return add_months(self.dtstart, 12 * index, day=self.dtstart.day)
+        return self.dtstart
+
+    def first_index_on_or_after(self, value):
+        """
+        Find the index of the first occurrence starting on or after `value` without walking the series.
+
+        ::param datetime value : The lower bound to seek to
+        ::return int : The index of the first occurrence that starts at or after `value`
+        """
+        value = _aware(value)
+        if value <= self.dtstart:
+            return 0
+        if self.repeat_type == 'NONE':
+            return 1
+        if self.repeat_type == 'DAILY':
+            return _ceil_div(value - self.dtstart, ONE_DAY)
+        if self.repeat_type == 'WEEKLY' and not self.weekdays:
+            return _ceil_div(value - self.dtstart, ONE_WEEK)
+
+        if self.repeat_type == 'WEEKLY':
+            week = (value - self._week_anchor) // ONE_WEEK
+            slot = week * len(self.weekdays)
+            # At most one week of slots has to be checked after the arithmetic jump
+            while self.occurrence(slot - self._first_slot) < value:
+                slot += 1
+            return slot - self._first_slot
+
+        step = 1 if self.repeat_type == 'MONTHLY' else 12
+        months = (value.year - self.dtstart.year) * 12 + (value.month - self.dtstart.month)
+        index = max(months // step, 0)
+        if self.occurrence(index) < value:
+            index += 1
+        return index
+
+    def iter_occurrences(self, start=None, end=None):
+        """
+        Lazily yield the occurrences of the series that start within `[start, end)`.
+
+        ::param datetime/optional start : The inclusive lower bound, defaults to the start of the series
+        ::param datetime/optional end : The exclusive upper bound, defaults to `until`
+        ::return generator(datetime) : The start of each occurrence in chronological order
+        """
+        end = _aware(end)
+        if self.until is None and end is None and self.repeat_type != 'NONE':
+            raise ValueError('An end bound is required to expand an open-ended series')
+
+        for occurrence in self._candidates(_aware(start)):
+            if (end is not None and occurrence >= end) or (self.until is not None and occurrence > self.until):
+                return
+            if occurrence not in self.exdates:
+                yield occurrence
+
+    def _candidates(self, start):
+        """
+        Yield the occurrences starting at or after `start` in chronological order, ignoring the bounds and exdates.
+        """
+        if self._rrule is not None:
+            # RFC 5545 counts DTSTART as the first instance even when it does not match the rule
+            if start is None or start <= self.dtstart:
+                yield self.dtstart
+                yield from self._rrule.xafter(self.dtstart, inc=False)
+            else:
+                yield from self._rrule.xafter(start, inc=True)
+            return
+
+        first = self.first_index_on_or_after(start) if start is not None else 0
+        for index in count(first):
+            if self.repeat_type == 'NONE' and index > 0:
+                return
+            yield self.occurrence(index)
+
+    def between(self, start, end):
+        """
+        Return the occurrences of the series that start within `[start, end)`.
+
+        ::param datetime start : The inclusive lower bound of the window
+        ::param datetime end : The exclusive upper bound of the window
+        ::return list(datetime) : The start of each occurrence in the window
+        """
+        return list(self.iter_occurrences(start, end))
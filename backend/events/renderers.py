@@ -0,0 +1,21 @@
+"""
+File: renderers.py
+Author: Jason
+Documentation updated by: Jason
+Date: 2026-10-18
+
+This module defines the renderer for the compact columnar events format, negotiated through the Accept header.
+"""
+from rest_framework.renderers import JSONRenderer
+
+
+class ColumnarEventsRenderer(JSONRenderer):
+    """
+    Renders the columnar events payload built by `serialize_event_rows_columnar` as compact JSON.
+    Clients request it with `Accept: application/vnd.timemesh.columnar+json`.
+
+    ::field str media_type : The vendor media type that selects this renderer.
+    ::field str format : The format suffix that selects this renderer through `?format=columnar`.
+    """
+    media_type = 'application/vnd.timemesh.columnar+json'
+    format = 'columnar'
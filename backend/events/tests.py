@@ -0,0 +1,389 @@
+"""
+File: tests.py
+Author: Jason
+Documentation updated by: Jason
+Date: 2026-10-18
+
+This module contains the tests of the events application.
+"""
+import random
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock, skipUnless
+from dateutil import rrule as du
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from calendars.models import Calendar
+from events.conflicts import find_conflicts
+from events.models import Event
+from events.recurrence import RecurrenceRule
+from events import vectorized
+from users.models import CustomUser
+
+
+class UpdateEventTests(TestCase):
+    """
+    Updating an event through PUT /api/events/<id>/.
+    """
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create(email='owner@example.com', username='owner')
+        calendar = Calendar.objects.create(user=self.user, title='Personal')
+        start = datetime(2026, 11, 2, 9, tzinfo=dt_timezone.utc)
+        self.event = Event.objects.create(
+            cal_id=calendar, user=self.user, title='Standup', start=start, end=start + timedelta(minutes=15)
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_naive_datetimes_are_made_aware(self):
+        response = self.client.put(f'/api/events/{self.event.pk}/', {
+            'start': '2026-11-03T09:00:00', 'end': '2026-11-03T09:30:00',
+            'repeat_type': 'DAILY', 'repeat_until': '2026-11-10T00:00:00',
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.event.refresh_from_db()
+        expected = timezone.make_aware(datetime(2026, 11, 3, 9))
+        self.assertEqual((self.event.start, self.event.end), (expected, expected + timedelta(minutes=30)))
+        self.assertEqual(self.event.repeat_until, timezone.make_aware(datetime(2026, 11, 10)))
+
+    def test_aware_datetimes_are_kept(self):
+        response = self.client.put(f'/api/events/{self.event.pk}/', {
+            'start': '2026-11-03T09:00:00+02:00', 'end': '2026-11-03T09:30:00+02:00',
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.start, datetime(2026, 11, 3, 7, tzinfo=dt_timezone.utc))
+
+
+class SeriesBoundsTests(TestCase):
+    """
+    `Event.save` computes the series bounds from datetimes given as ISO strings.
+    """
+    def setUp(self):
+        self.user = CustomUser.objects.create(email='owner@example.com', username='owner')
+        self.calendar = Calendar.objects.create(user=self.user, title='Personal')
+
+    def test_string_datetimes(self):
+        event = Event.objects.create(
+            cal_id=self.calendar, user=self.user, title='Standup', start='2026-11-02T09:00:00Z',
+            end='2026-11-02T09:15:00Z', repeat_type='DAILY', repeat_until='2026-11-06T09:00:00Z',
+        )
+
+        start = datetime(2026, 11, 2, 9, tzinfo=dt_timezone.utc)
+        self.assertEqual((event.series_start, event.series_end), (start, start + timedelta(days=4, minutes=15)))
+        event.refresh_from_db()
+        self.assertEqual((event.series_start, event.series_end), (start, start + timedelta(days=4, minutes=15)))
+
+    def test_naive_string_datetimes(self):
+        event = Event.objects.create(
+            cal_id=self.calendar, user=self.user, title='Standup', start='2026-11-02T09:00:00', end='2026-11-02T09:15:00',
+        )
+
+        start = timezone.make_aware(datetime(2026, 11, 2, 9))
+        self.assertEqual((event.series_start, event.series_end), (start, start + timedelta(minutes=15)))
+
+
+COLUMNAR = 'application/vnd.timemesh.columnar+json'
+
+
+class ColumnarWindowCacheTests(TestCase):
+    """
+    GET /api/events/ in the columnar layout is served from the per-calendar window cache.
+    """
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create(email='owner@example.com', username='owner')
+        self.calendars = [Calendar.objects.create(user=self.user, title=title) for title in ('Personal', 'Team')]
+        start = datetime(2026, 11, 2, 9, tzinfo=dt_timezone.utc)
+        for day, calendar in enumerate(self.calendars * 2):
+            Event.objects.create(
+                cal_id=calendar, user=self.user, title=f'Event {day % 3}', bg_color=f'#00000{day % 2}',
+                start=start + timedelta(days=day), end=start + timedelta(days=day, hours=1),
+                repeat_type='WEEKLY' if day == 1 else 'NONE', repeat_until=start + timedelta(days=30) if day == 1 else None,
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.window = {'start': '2026-11-01', 'end': '2026-11-30'}
+
+    def get(self, accept):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/events/', self.window, HTTP_ACCEPT=accept)
+        self.assertEqual(response.status_code, 200)
+        event_queries = [query for query in queries if 'events_event' in query['sql']]
+        return response, event_queries
+
+    def decode(self, payload):
+        # One dict per event, with the string and color indexes resolved
+        columns = payload['columns']
+        events = []
+        for position in range(payload['count']):
+            event = {field: values[position] for field, values in columns.items()}
+            for field, table in (('title', 'strings'), ('description', 'strings'), ('repeat_type', 'strings'), ('bg_color', 'colors')):
+                if event[field] is not None:
+                    event[field] = payload[table][event[field]]
+            events.append(event)
+        return events
+
+    def test_columnar_matches_the_list_layout_and_is_cached(self):
+        listed = self.get('application/json')[0].data
+        response, event_queries = self.get(COLUMNAR)
+        self.assertTrue(event_queries)
+
+        events = self.decode(response.data)
+        self.assertEqual([event['id'] for event in events], [event['id'] for event in listed])
+        self.assertEqual([event['title'] for event in events], [event['title'] for event in listed])
+        self.assertEqual([event['bg_color'] for event in events], [event['bg_color'] for event in listed])
+        self.assertEqual(
+            [len(event['repeated_dates']) for event in events], [len(event['repeated_dates'] or []) for event in listed]
+        )
+
+        cached, event_queries = self.get(COLUMNAR)
+        self.assertEqual(event_queries, [])
+        self.assertEqual(cached.data, response.data)
+
+    def test_columnar_cache_is_invalidated_by_writes(self):
+        self.get(COLUMNAR)
+        start = datetime(2026, 11, 20, 9, tzinfo=dt_timezone.utc)
+        response = self.client.post('/api/events/', {
+            'cal_id': self.calendars[1].pk, 'title': 'Review', 'start': start.isoformat(),
+            'end': (start + timedelta(hours=1)).isoformat(),
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        payload = self.get(COLUMNAR)[0].data
+        self.assertIn(response.data['id'], payload['columns']['id'])
+        self.assertEqual(payload['count'], 5)
+
+
+class FarFutureConflictTests(TestCase):
+    """
+    `find_conflicts` checks events that start after the materialization horizon.
+    """
+    def setUp(self):
+        self.user = CustomUser.objects.create(email='owner@example.com', username='owner')
+        self.calendar = Calendar.objects.create(user=self.user, title='Personal')
+        self.start = (timezone.now() + timedelta(days=800)).replace(microsecond=0)
+        self.existing = Event.objects.create(
+            cal_id=self.calendar, user=self.user, title='Conference', start=self.start, end=self.start + timedelta(hours=8)
+        )
+
+    def proposed(self, offset, **repeat):
+        start = self.start + offset
+        return Event(cal_id=self.calendar, user=self.user, title='Dentist', start=start, end=start + timedelta(hours=1), **repeat)
+
+    def test_single_event_past_the_horizon(self):
+        conflicts = find_conflicts(self.proposed(timedelta(hours=2)), [self.calendar.pk])
+
+        self.assertEqual([conflict['id'] for conflict in conflicts], [self.existing.pk])
+
+    def test_series_starting_past_the_horizon(self):
+        event = self.proposed(timedelta(hours=2), repeat_type='WEEKLY')
+
+        self.assertEqual([conflict['id'] for conflict in find_conflicts(event, [self.calendar.pk])], [self.existing.pk])
+
+    def test_no_conflict_past_the_horizon(self):
+        self.assertEqual(find_conflicts(self.proposed(timedelta(hours=9)), [self.calendar.pk]), [])
+
+
+class RepeatedDatesCapTests(TestCase):
+    """
+    The `repeated_dates` stored on a series stop at the materialization horizon.
+    """
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create(email='owner@example.com', username='owner')
+        self.calendar = Calendar.objects.create(user=self.user, title='Personal')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_long_series_are_capped_and_still_listed_by_window(self):
+        start = timezone.now().replace(hour=9, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        response = self.client.post('/api/events/', {
+            'cal_id': self.calendar.pk, 'title': 'Standup', 'start': start.isoformat(),
+            'end': (start + timedelta(minutes=15)).isoformat(), 'repeat_type': 'DAILY',
+            'repeat_until': (start + timedelta(days=3650)).isoformat(),
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+
+        event = Event.objects.get(pk=response.data['id'])
+        self.assertLessEqual(len(event.repeated_dates), 366)
+        self.assertLessEqual(len(self.client.get(f'/api/events/{event.pk}/').data['repeated_dates']), 366)
+
+        day = (start + timedelta(days=2000)).date()
+        listed = self.client.get('/api/events/', {'start': day.isoformat(), 'end': day.isoformat()}).data
+        self.assertEqual([len(event_data['repeated_dates']) for event_data in listed], [1])
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=dt_timezone.utc)
+
+
+class RecurrenceRuleTests(TestCase):
+    """
+    The arithmetic recurrence engine expands series exactly like the equivalent `dateutil.rrule`.
+    """
+    def assert_matches(self, rule, expected):
+        expected = list(expected)
+        self.assertEqual(list(rule.iter_occurrences()), expected)
+        # Seeking straight to a window gives the same occurrences as filtering the whole series
+        for low, high in ((expected[0], expected[-1]), (expected[2] - timedelta(seconds=1), expected[5]),
+                          (expected[3] + timedelta(seconds=1), expected[-2] + timedelta(seconds=1))):
+            self.assertEqual(rule.between(low, high), [value for value in expected if low <= value < high], (low, high))
+
+    def test_monthly_clamps_to_the_end_of_shorter_months(self):
+        start = utc(2027, 1, 31, 9)
+        rule = RecurrenceRule('MONTHLY', start, utc(2028, 12, 31, 9))
+
+        occurrences = list(rule.iter_occurrences())
+        self.assertEqual(occurrences[1:4], [utc(2027, 2, 28, 9), utc(2027, 3, 31, 9), utc(2027, 4, 30, 9)])
+        self.assertEqual(occurrences[13], utc(2028, 2, 29, 9))
+        self.assert_matches(rule, du.rrule(
+            du.MONTHLY, dtstart=start, until=rule.until, bymonthday=(28, 29, 30, 31), bysetpos=-1
+        ))
+
+    def test_monthly_on_the_30th(self):
+        start = utc(2027, 1, 30, 9)
+        rule = RecurrenceRule('MONTHLY', start, utc(2028, 6, 30, 9))
+
+        self.assert_matches(rule, du.rrule(du.MONTHLY, dtstart=start, until=rule.until, bymonthday=(28, 29, 30), bysetpos=-1))
+
+    def test_yearly_on_a_leap_day(self):
+        start = utc(2028, 2, 29, 9)
+        rule = RecurrenceRule('YEARLY', start, utc(2040, 3, 1))
+
+        self.assertEqual(
+            list(rule.iter_occurrences())[1:5], [utc(year, 2, 28, 9) for year in (2029, 2030, 2031)] + [utc(2032, 2, 29, 9)]
+        )
+        self.assert_matches(rule, du.rrule(
+            du.YEARLY, dtstart=start, until=rule.until, bymonth=2, bymonthday=(28, 29), bysetpos=-1
+        ))
+
+    def test_weekly_with_several_repeat_days(self):
+        # Starts on a Tuesday, which is not one of the repeat days
+        start = utc(2026, 11, 3, 9)
+        rule = RecurrenceRule('WEEKLY', start, utc(2027, 2, 1), repeat_days=['FRI', 'MON', 'WED'])
+
+        self.assertEqual(rule.occurrence(0), utc(2026, 11, 4, 9))
+        self.assert_matches(rule, du.rrule(
+            du.WEEKLY, dtstart=start, until=rule.until, byweekday=(du.MO, du.WE, du.FR)
+        ))
+
+    def test_daily_and_weekly(self):
+        start = utc(2026, 11, 2, 9, 30)
+        for repeat_type, freq in (('DAILY', du.DAILY), ('WEEKLY', du.WEEKLY)):
+            rule = RecurrenceRule(repeat_type, start, start + timedelta(days=120))
+            self.assert_matches(rule, du.rrule(freq, dtstart=start, until=rule.until))
+
+    def test_until_is_inclusive(self):
+        start = utc(2026, 11, 2, 9)
+        rule = RecurrenceRule('DAILY', start, utc(2026, 11, 6, 9))
+        self.assertEqual(list(rule.iter_occurrences())[-1], utc(2026, 11, 6, 9))
+        self.assertEqual(list(rule.iter_occurrences()), list(du.rrule(du.DAILY, dtstart=start, until=rule.until)))
+
+        rule = RecurrenceRule('DAILY', start, utc(2026, 11, 6, 8, 59))
+        self.assertEqual(list(rule.iter_occurrences())[-1], utc(2026, 11, 5, 9))
+
+    def test_exdates_are_removed(self):
+        start = utc(2026, 11, 2, 9)
+        exdates = [utc(2026, 11, 4, 9), utc(2026, 11, 10, 9)]
+        rule = RecurrenceRule('DAILY', start, utc(2026, 11, 30, 9), exdates=[value.isoformat() for value in exdates])
+
+        expected = du.rruleset()
+        expected.rrule(du.rrule(du.DAILY, dtstart=start, until=rule.until))
+        for value in exdates:
+            expected.exdate(value)
+        self.assert_matches(rule, expected)
+
+    def test_custom_rules_follow_dateutil(self):
+        start = utc(2026, 11, 10, 9)
+        rule = RecurrenceRule('CUSTOM', start, utc(2028, 1, 1), rrule='FREQ=MONTHLY;INTERVAL=2;BYDAY=2TU')
+
+        self.assert_matches(rule, du.rrulestr('FREQ=MONTHLY;INTERVAL=2;BYDAY=2TU;UNTIL=20280101T000000Z', dtstart=start))
+
+        # RFC 5545 counts DTSTART as the first instance even when it does not match the rule
+        rule = RecurrenceRule('CUSTOM', utc(2026, 11, 3, 9), utc(2027, 2, 1), rrule='FREQ=MONTHLY;BYDAY=2TU')
+        self.assertEqual(
+            list(rule.iter_occurrences()), [utc(2026, 11, 3, 9), utc(2026, 11, 10, 9), utc(2026, 12, 8, 9), utc(2027, 1, 12, 9)]
+        )
+
+    def test_open_ended_series_need_an_end(self):
+        rule = RecurrenceRule('DAILY', utc(2026, 11, 2, 9))
+
+        with self.assertRaises(ValueError):
+            list(rule.iter_occurrences())
+        self.assertEqual(len(rule.between(utc(2030, 1, 1), utc(2030, 1, 8))), 7)
+
+
+SeriesRow = namedtuple('SeriesRow', 'id start end repeat_type repeat_until repeat_days rrule exdates')
+
+
+@skipUnless(vectorized.np is not None, 'NumPy is not installed')
+class VectorizedExpansionTests(TestCase):
+    """
+    The NumPy expansion of `vectorized.expand_occurrences` matches the recurrence engine it replaces.
+    """
+    def random_series(self, generator, count):
+        series = []
+        origin = utc(2026, 1, 1)
+        for event_id in range(1, count + 1):
+            # Starts on any minute, month ends and leap days included, with durations up to three days
+            start = origin + timedelta(minutes=generator.randrange(0, 3 * 366 * 24 * 60))
+            if generator.random() < 0.2:
+                start = generator.choice([utc(2027, 1, 31), utc(2028, 2, 29), utc(2027, 3, 31), utc(2027, 8, 30)]) \
+                    + timedelta(minutes=generator.randrange(0, 24 * 60))
+            end = start + timedelta(minutes=generator.choice([0, 15, 60, 24 * 60, 3 * 24 * 60]))
+            repeat_type = generator.choice(['NONE', 'DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY', 'CUSTOM'])
+            repeat_days = generator.sample(['MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT', 'SUN'], generator.randrange(0, 4)) \
+                if repeat_type == 'WEEKLY' else None
+            rrule = 'FREQ=WEEKLY;INTERVAL=2;BYDAY=TU,TH' if repeat_type == 'CUSTOM' else None
+            until = start + timedelta(days=generator.randrange(1, 800)) if generator.random() < 0.7 else None
+            rule = RecurrenceRule(repeat_type, start, until or start + timedelta(days=400), repeat_days, rrule)
+            # Remove a few occurrences, and one start that is not an occurrence
+            starts = list(rule.iter_occurrences())
+            exdates = generator.sample(starts, min(len(starts), generator.randrange(0, 3)))
+            exdates.append(start + timedelta(minutes=1))
+            series.append(SeriesRow(
+                event_id, start, end, repeat_type, until, repeat_days, rrule, [value.isoformat() for value in exdates]
+            ))
+        return series
+
+    def expand(self, events, start, end, overlapping):
+        return sorted(
+            (occurrence_start, event_id, occurrence_end)
+            for event_id, occurrence_start, occurrence_end
+            in vectorized.occurrence_rows(vectorized.expand_occurrences(events, start, end, overlapping))
+        )
+
+    def test_numpy_matches_the_recurrence_engine(self):
+        generator = random.Random(2026)
+        events = self.random_series(generator, 300)
+        windows = [(utc(2026, 1, 1), utc(2030, 1, 1))]
+        for _ in range(20):
+            low = utc(2026, 1, 1) + timedelta(minutes=generator.randrange(0, 4 * 366 * 24 * 60))
+            windows.append((low, low + timedelta(days=generator.choice([1, 7, 31, 92]))))
+
+        for start, end in windows:
+            for overlapping in (False, True):
+                vectorized_rows = self.expand(events, start, end, overlapping)
+                with mock.patch.object(vectorized, 'np', None):
+                    engine_rows = self.expand(events, start, end, overlapping)
+                self.assertEqual(vectorized_rows, engine_rows, (start, end, overlapping))
+                self.assertTrue(vectorized_rows or end - start < timedelta(days=2))
+
+    def test_exdates_and_running_occurrences(self):
+        start = utc(2026, 11, 2, 23)
+        events = [SeriesRow(1, start, start + timedelta(hours=2), 'DAILY', None, None, None, [utc(2026, 11, 4, 23).isoformat()])]
+        window = (utc(2026, 11, 4), utc(2026, 11, 6))
+
+        self.assertEqual([row[0] for row in self.expand(events, *window, False)], [utc(2026, 11, 5, 23)])
+        # The occurrence of the 3rd runs into the window, the one of the 4th is removed
+        self.assertEqual([row[0] for row in self.expand(events, *window, True)], [utc(2026, 11, 3, 23), utc(2026, 11, 5, 23)])
+        window = (utc(2026, 11, 6), utc(2026, 11, 7))
+        self.assertEqual([row[0] for row in self.expand(events, *window, True)], [utc(2026, 11, 5, 23), utc(2026, 11, 6, 23)])
@@ -0,0 +1,208 @@
+"""
+File: vectorized.py
+Author: Jason
+Documentation updated by: Jason
+Date: 2026-10-18
+
+This module expands many series at once, for bulk consumers such as free/busy, exports and analytics.
+
+With NumPy installed, the occurrences of every series are computed as `int64` microsecond arrays, one pass per
+kind of rule: daily, weekly and single events are arithmetic progressions (a weekly rule with repeat days is one
+progression per day), monthly and yearly rules use month-offset arithmetic with the day clamped to the length of
+the month. 'CUSTOM' rules are expanded with the recurrence engine. Without NumPy the whole batch goes through the
+recurrence engine, with the same results. NumPy is optional, see `requirements-numpy.txt`.
+
+Occurrences are computed in UTC, the timezone of the datetimes read from the database.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from operator import itemgetter
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .recurrence import WEEKDAYS, RecurrenceRule
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Layout of the expanded occurrences
+OCCURRENCE_DTYPE = [('event_id', 'i8'), ('start', 'M8[us]'), ('end', 'M8[us]')]
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+ONE_MICROSECOND = timedelta(microseconds=1)
+DAY_US = 86_400_000_000
+WEEK_US = 7 * DAY_US
+# Step of single events, large enough that only the first term of the progression is ever in range
+SINGLE_STEP_US = 2 ** 62
+NO_UNTIL_US = 2 ** 62
+
+
+def _micros(value):
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return (value - EPOCH) // ONE_MICROSECOND
+
+
+def _engine_rows(events, start, end, overlapping):
+    rows = []
+    for event in events:
+        duration = event.end - event.start
+        low = start - duration if overlapping else start
+        for occurrence in RecurrenceRule.from_event(event).between(low, end):
+            if not overlapping or occurrence + duration > start:
+                rows.append((event.id, occurrence, occurrence + duration))
+    return rows
+
+
+def _spread(k0, counts):
+    """
+    Expand `[k0, k0 + counts)` ranges into one flat array of indices, with the row each index comes from.
+    """
+    rows = np.repeat(np.arange(len(counts)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return rows, k0[rows] + offsets
+
+
+def _bounds(durations, untils, window_start, window_end, overlapping):
+    """
+    Return the bounds `[low, high)` of the occurrence starts to keep for each row.
+    """
+    # An occurrence overlaps the window when it ends strictly after its start
+    low = window_start - durations + 1 if overlapping else np.full(len(durations), window_start)
+    return low, np.minimum(window_end, untils + 1)  # `until` is inclusive
+
+
+def _progressions(series, window_start, window_end, overlapping):
+    """
+    Expand arithmetic progressions `start + k * step`, `k >= 0`, into the terms within the window of each row.
+    """
+    ids, starts, durations, untils, steps = (np.array(column, dtype=np.int64) for column in zip(*series))
+    low, high = _bounds(durations, untils, window_start, window_end, overlapping)
+    k0 = np.maximum(0, -((starts - low) // steps))
+    k1 = np.maximum(0, -((starts - high) // steps))
+    rows, k = _spread(k0, np.maximum(0, k1 - k0))
+    return ids[rows], starts[rows] + k * steps[rows], durations[rows]
+
+
+def _month_offsets(series, window_start, window_end, overlapping):
+    """
+    Expand rules repeating every `step` months on the day of month of their start, clamped to shorter months.
+    """
+    ids, starts, durations, untils, steps = (np.array(column, dtype=np.int64) for column in zip(*series))
+    low, high = _bounds(durations, untils, window_start, window_end, overlapping)
+    days = starts // DAY_US
+    months = days.astype('M8[D]').astype('M8[M]').astype(np.int64)
+    day_of_month = days - months.astype('M8[M]').astype('M8[D]').astype(np.int64)
+    time_of_day = starts - days * DAY_US
+
+    def month_of(values):
+        return (values // DAY_US).astype('M8[D]').astype('M8[M]').astype(np.int64)
+
+    # The first and last candidate months, the terms outside the window are masked out below
+    k0 = np.maximum(0, (month_of(low) - months) // steps)
+    k1 = np.maximum(0, (month_of(high - 1) - months) // steps + 1)
+    rows, k = _spread(k0, np.maximum(0, k1 - k0))
+    month = months[rows] + k * steps[rows]
+    first_day = month.astype('M8[M]').astype('M8[D]').astype(np.int64)
+    month_length = (month + 1).astype('M8[M]').astype('M8[D]').astype(np.int64) - first_day
+    occurrences = (first_day + np.minimum(day_of_month[rows], month_length - 1)) * DAY_US + time_of_day[rows]
+    keep = (occurrences >= low[rows]) & (occurrences < high[rows])
+    return ids[rows][keep], occurrences[keep], durations[rows][keep]
+
+
+def expand_occurrences(events, start, end, overlapping=False):
+    """
+    Expand the occurrences of many events within a window in one batch.
+
+    ::param iterable(Event) events : The events to expand, model instances or named rows with the `id`, `start`, `end`,
+        `repeat_type`, `repeat_until`, `repeat_days`, `rrule` and `exdates` fields
+    ::param datetime start : The inclusive lower bound of the window
+    ::param datetime end : The exclusive upper bound of the window
+    ::param bool overlapping : True to include the occurrences that started before `start` and end after it
+    ::return ndarray/list : A structured array of `OCCURRENCE_DTYPE` sorted by start, or without NumPy a list
+        of `(event_id, start, end)` tuples sorted by start; read either with `occurrence_rows`
+    """
+    if np is None:
+        rows = _engine_rows(events, start, end, overlapping)
+        rows.sort(key=itemgetter(1))
+        return rows
+
+    progressions, month_rules, custom = [], [], []
+    exdates = set()
+    for event in events:
+        repeat_type = event.repeat_type
+        if repeat_type == 'CUSTOM' and event.rrule:
+            custom.append(event)
+            continue
+        first = _micros(event.start)
+        duration = _micros(event.end) - first
+        until = _micros(event.repeat_until) if event.repeat_until else NO_UNTIL_US
+        exdates.update(
+            (event.id, _micros(parse_datetime(value) if isinstance(value, str) else value))
+            for value in event.exdates or ()
+        )
+        weekdays = sorted({WEEKDAYS[day] for day in event.repeat_days or () if day in WEEKDAYS})
+        if repeat_type == 'DAILY':
+            progressions.append((event.id, first, duration, until, DAY_US))
+        elif repeat_type == 'WEEKLY' and weekdays:
+            # One weekly progression per repeat day, starting on the first such day on or after the start
+            anchor = first - (first // DAY_US + 3) % 7 * DAY_US  # 1970-01-01 was a Thursday
+            for weekday in weekdays:
+                day = anchor + weekday * DAY_US
+                progressions.append((event.id, day if day >= first else day + WEEK_US, duration, until, WEEK_US))
+        elif repeat_type == 'WEEKLY':
+            progressions.append((event.id, first, duration, until, WEEK_US))
+        elif repeat_type in ('MONTHLY', 'YEARLY'):
+            month_rules.append((event.id, first, duration, until, 1 if repeat_type == 'MONTHLY' else 12))
+        else:
+            progressions.append((event.id, first, duration, until, SINGLE_STEP_US))
+
+    empty = np.empty(0, dtype=np.int64)
+    parts = [(empty, empty, empty)]
+    if progressions:
+        parts.append(_progressions(progressions, _micros(start), _micros(end), overlapping))
+    if month_rules:
+        parts.append(_month_offsets(month_rules, _micros(start), _micros(end), overlapping))
+    if custom:
+        rows = _engine_rows(custom, start, end, overlapping)
+        parts.append((
+            np.array([row[0] for row in rows], dtype=np.int64),
+            np.array([_micros(row[1]) for row in rows], dtype=np.int64),
+            np.array([_micros(row[2]) - _micros(row[1]) for row in rows], dtype=np.int64),
+        ))
+
+    ids, starts, durations = (np.concatenate(column) for column in zip(*parts))
+
+    if exdates:
+        # Few series have exdates, only their occurrences are checked one by one
+        candidates = np.flatnonzero(np.isin(ids, [event_id for event_id, _ in exdates]))
+        pairs = zip(ids[candidates].tolist(), starts[candidates].tolist())
+        removed = [index for index, pair in zip(candidates.tolist(), pairs) if pair in exdates]
+        keep = np.ones(len(ids), dtype=bool)
+        keep[removed] = False
+        ids, starts, durations = ids[keep], starts[keep], durations[keep]
+
+    order = np.argsort(starts, kind='stable')
+    starts = starts[order]
+    occurrences = np.empty(len(order), dtype=OCCURRENCE_DTYPE)
+    occurrences['event_id'] = ids[order]
+    occurrences['start'] = starts.view('M8[us]')
+    occurrences['end'] = (starts + durations[order]).view('M8[us]')
+    return occurrences
+
+
+def occurrence_rows(occurrences):
+    """
+    Iterate over expanded occurrences as Python values.
+
+    ::param ndarray/list occurrences : The occurrences returned by `expand_occurrences`
+    ::return iterator(tuple(int, datetime, datetime)) : The event id, aware start and aware end of each occurrence
+    """
+    if np is None or not isinstance(occurrences, np.ndarray):
+        return iter(occurrences)
+    starts = occurrences['start'].tolist()
+    ends = occurrences['end'].tolist()
+    return (
+        (event_id, start.replace(tzinfo=dt_timezone.utc), end.replace(tzinfo=dt_timezone.utc))
+        for event_id, start, end in zip(occurrences['event_id'].tolist(), starts, ends)
+    )
@@ -1,11 +1,25 @@
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.renderers import JSONRenderer, BrowsableAPIRenderer
 from rest_framework import status
+from rest_framework.utils.encoders import JSONEncoder
 from .models import Event
-from .serializers import EventSerializer
+from .serializers import EventSerializer, event_rows, merge_event_columns, serialize_event_row, serialize_event_rows_columnar
+from .renderers import ColumnarEventsRenderer
+from .recurrence import RecurrenceRule
+from .occurrences import horizon_end, materialize_occurrences, occurrences_between
+from .conflicts import find_conflicts
+from .pagination import keyset_page, parse_page_size
+from .cache import get_cached_windows, set_cached_windows
 from calendars.models import Calendar
+from calendars.membership import visible_calendar_ids
+from sync.changelog import record_event_changes
+from sync.versions import collection_validators, not_modified, with_validators
 from django.shortcuts import get_object_or_404
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+import json
 import logging
 from datetime import datetime, timedelta
 from django.utils import timezone
@@ -13,8 +27,12 @@ from django.utils.dateparse import parse_datetime, parse_date
 
 logger = logging.getLogger(__name__)
 
+# Number of events read from the server-side cursor and serialized per chunk when streaming
+EVENT_STREAM_CHUNK_SIZE = 500
+
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
+@renderer_classes([JSONRenderer, BrowsableAPIRenderer, ColumnarEventsRenderer])
 def event_view(request):
     """
     Manage events for the authenticated user
@@ -31,105 +49,256 @@ def event_view(request):
         return create_event(request)
 
 def generate_repeated_dates(event):
-    # logger.info("Start of generate repeated dates")
-    start_date = event.start
-    repeat_until = event.repeat_until or (start_date + timedelta(days=365))  # Default to 1 year from start
-
-    # Ensure both start_date and repeat_until are timezone-aware
-    if timezone.is_naive(start_date):
-        start_date = timezone.make_aware(start_date)
-    if timezone.is_naive(repeat_until):
-        repeat_until = timezone.make_aware(repeat_until)
-
-    repeated_dates = []
-    current_date = start_date
-
-    # Limit the number of repeated dates to prevent excessive generation
-    max_repetitions = 100
-    loop_counter = 0
-
-    while current_date <= repeat_until and len(repeated_dates) < max_repetitions:
-        # logger.info("In while loop - current date: %s", current_date)
-        loop_counter += 1
-        if event.repeat_type == 'DAILY':
-            repeated_dates.append(current_date)
-            current_date += timedelta(days=1)
-        elif event.repeat_type == 'WEEKLY':
-            if event.repeat_days:
-                weekdays = [{'MON': 0, 'TUE': 1, 'WED': 2, 'THU': 3, 'FRI': 4, 'SAT': 5, 'SUN': 6}[day] for day in event.repeat_days]
-                if current_date.weekday() in weekdays:
-                    repeated_dates.append(current_date)
-                current_date += timedelta(days=1)
-            else:
-                repeated_dates.append(current_date)
-                current_date += timedelta(weeks=1)
-        elif event.repeat_type == 'MONTHLY':
-            repeated_dates.append(current_date)
-            next_month = (current_date.month % 12) + 1
-            year_increment = (current_date.month + 1) // 13
-            current_date = current_date.replace(year=current_date.year + year_increment, month=next_month)
-        elif event.repeat_type == 'YEARLY':
-            repeated_dates.append(current_date)
-            current_date = current_date.replace(year=current_date.year + 1)
-        elif event.repeat_type == "NONE":
-            break
-            
-        # Failsafe in case of an endless loop scenario
-        if loop_counter > max_repetitions:
-            logger.warning("Exceeded max repetition count: %d", max_repetitions)
-            break
-    
-    # Filter out the original start date
-    repeated_dates = [date for date in repeated_dates if date != start_date]
-    # logger.info("End of generate repeated dates")
-    return repeated_dates
+    """
+    Generate the start of every repeat of an event after its first instance, as stored in `repeated_dates`.
 
-def get_events(request):
-    try:
-        owned_calendars = Calendar.objects.filter(user=request.user)
-        shared_calendars = Calendar.objects.filter(shared_users=request.user)
-        all_calendars = owned_calendars | shared_calendars
+    The list is capped at the materialization horizon, or one year after the start for series starting past it,
+    so it does not grow with `repeat_until`. Windowed reads get later occurrences from `occurrences_between`.
+
+    ::param Event event : The event to expand
+    ::return list(datetime) : The repeated dates up to `repeat_until` or the cap, whichever comes first
+    """
+    rule = RecurrenceRule.from_event(event)
+    cap = max(horizon_end(), rule.dtstart + timedelta(days=365))
+    rule.until = min(rule.until, cap) if rule.until is not None else rule.dtstart + timedelta(days=365)
+
+    # Filter out the original start date
+    return [date for date in rule.iter_occurrences() if date != rule.dtstart]
 
-        start_date = request.GET.get('start')
-        end_date = request.GET.get('end')
+def expand_repeated_dates(events, window=None, calendars=None):
+    """
+    Expand the repeated dates of the recurring events in a batch of event rows.
 
-        all_events = []
+    ::param list(namedtuple) events : The event rows, as selected by `list_rows`
+    ::param tuple(datetime, datetime)/optional window : Limits the repeated dates to `[start, end)` when given
+    ::param QuerySet/list/optional calendars : The calendars (or their ids) of the events, lets the window be read with one calendar range scan
+    ::return dict(int, list(datetime)) : The repeated dates of each recurring event keyed by id, without the first instance
+    """
+    recurring = [event for event in events if event.repeat_type != 'NONE']
+    if window:
+        # Read the window from the materialized occurrences, seeking with the recurrence engine past the horizon
+        occurrences = occurrences_between(recurring, window[0], window[1], calendars)
+    else:
+        occurrences = {event.id: generate_repeated_dates(event) for event in recurring}
+    return {
+        event.id: [date for date in occurrences[event.id] if date != event.start]
+        for event in recurring
+    }
+
+def serialize_events(events, window=None, calendars=None):
+    """
+    Serialize a batch of event rows, expanding the repeated dates of recurring ones.
 
-        if start_date and end_date:
-            start_date = timezone.make_aware(datetime.strptime(start_date, '%Y-%m-%d'))
-            end_date = timezone.make_aware(datetime.strptime(end_date, '%Y-%m-%d')) + timedelta(days=1)  # Include the full end date
+    ::param list(namedtuple) events : The event rows to serialize, as selected by `list_rows`
+    ::param tuple(datetime, datetime)/optional window : Limits `repeated_dates` to `[start, end)` when given
+    ::param QuerySet/list/optional calendars : The calendars (or their ids) of the events, lets the window be read with one calendar range scan
+    ::return list(dict) : The serialized events
+    """
+    repeated_dates = expand_repeated_dates(events, window, calendars)
+    current_timezone = timezone.get_current_timezone()
+    all_events = []
+    for event in events:
+        event_data = serialize_event_row(event, current_timezone)
+        if event.id in repeated_dates:
+            event_data['repeated_dates'] = [date.isoformat() for date in repeated_dates[event.id]]
+        all_events.append(event_data)
+    return all_events
+
+def serialize_events_columnar(events, window=None, calendars=None):
+    """
+    Serialize a batch of event rows into the compact columnar layout, expanding the repeated dates of recurring ones.
 
-            events = Event.objects.filter(cal_id__in=all_calendars, start__lt=end_date, end__gte=start_date)
+    ::param list(namedtuple) events : The event rows to serialize, as selected by `list_rows`
+    ::param tuple(datetime, datetime)/optional window : Limits `repeated_dates` to `[start, end)` when given
+    ::param QuerySet/list/optional calendars : The calendars (or their ids) of the events, lets the window be read with one calendar range scan
+    ::return dict : The columnar payload, see `serialize_event_rows_columnar`
+    """
+    return serialize_event_rows_columnar(events, expand_repeated_dates(events, window, calendars))
 
-            for event in events:
-                event_data = EventSerializer(event).data
+def list_rows(events):
+    """
+    Select the event rows used by the list endpoint, with the columns needed to expand recurrences.
 
-                if event.repeat_type != 'NONE':
-                    repeated_dates = generate_repeated_dates(event)
-                    filtered_repeated_dates = [
-                        date for date in repeated_dates
-                        if start_date <= date < end_date
-                    ]
-                    event_data['repeated_dates'] = [date.isoformat() for date in filtered_repeated_dates]
+    ::param QuerySet events : The events to list
+    ::return QuerySet : Named tuples accepted by `serialize_events`
+    """
+    return event_rows(events, 'materialized_until', 'rrule', 'exdates')
 
-                all_events.append(event_data)
+def cached_window_events(calendar_ids, window=None, columnar=False):
+    """
+    Serialize the events of several calendars for a window, reusing the expansions cached for each calendar.
+    Only the calendars missing from the cache are queried and expanded, in a single batch.
 
+    ::param list(int) calendar_ids : The calendars visible to the user
+    ::param tuple(datetime, datetime)/optional window : Limits the events and `repeated_dates` to `[start, end)` when given
+    ::param bool columnar : True to return the compact columnar layout, cached separately from the list of events
+    ::return list(dict)/dict : The serialized events ordered by id, or the columnar payload in the same order
+    """
+    cached, misses = get_cached_windows(calendar_ids, window, 'columnar' if columnar else 'list')
+    if misses:
+        rows = list(list_rows(filter_window(Event.objects.filter(cal_id__in=misses), window)))
+        fresh = {}
+        if columnar:
+            repeated_dates = expand_repeated_dates(rows, window, list(misses))
+            rows_by_calendar = {}
+            for row in rows:
+                rows_by_calendar.setdefault(row.cal_id, []).append(row)
+            # Every calendar gets a payload, empty ones included, so it is cached like the others
+            fresh = {
+                calendar_id: serialize_event_rows_columnar(rows_by_calendar.get(calendar_id, []), repeated_dates)
+                for calendar_id in misses
+            }
         else:
-            events = Event.objects.filter(cal_id__in=all_calendars)
-            for event in events:
-                event_data = EventSerializer(event).data
-                if event.repeat_type != 'NONE':
-                    repeated_dates = generate_repeated_dates(event)
-                    event_data['repeated_dates'] = [date.isoformat() for date in repeated_dates]
-                all_events.append(event_data)
+            for event_data in serialize_events(rows, window, list(misses)):
+                fresh.setdefault(event_data['cal_id'], []).append(event_data)
+        set_cached_windows(misses, fresh)
+        cached.update(fresh)
+    if columnar:
+        return merge_event_columns(cached.values())
+    return sorted((event_data for events in cached.values() for event_data in events), key=lambda event_data: event_data['id'])
+
+def stream_events(events, window=None):
+    """
+    Stream events as a JSON array, reading them through a server-side cursor in chunks of `EVENT_STREAM_CHUNK_SIZE`.
+    Peak memory is bounded by the chunk size instead of the number of events.
+
+    ::param QuerySet events : The events to stream
+    ::param tuple(datetime, datetime)/optional window : Limits `repeated_dates` to `[start, end)` when given
+    ::return StreamingHttpResponse : The streaming JSON response
+    """
+    def encode_chunk(chunk, first):
+        # Match the compact output of DRF's JSONRenderer
+        body = ','.join(
+            json.dumps(event_data, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':'))
+            for event_data in serialize_events(chunk, window)
+        )
+        return body if first else ',' + body
+
+    def generate():
+        yield '['
+        chunk = []
+        first = True
+        try:
+            for event in list_rows(events.order_by('start', 'id')).iterator(chunk_size=EVENT_STREAM_CHUNK_SIZE):
+                chunk.append(event)
+                if len(chunk) == EVENT_STREAM_CHUNK_SIZE:
+                    yield encode_chunk(chunk, first)
+                    chunk = []
+                    first = False
+            if chunk:
+                yield encode_chunk(chunk, first)
+        except Exception:
+            # The status line has already been sent, so the truncated body is the only signal left
+            logger.exception("Error streaming events")
+            return
+        yield ']'
+
+    return StreamingHttpResponse(generate(), content_type='application/json', status=status.HTTP_200_OK)
+
+def parse_window(request):
+    """
+    Parse the optional `start` and `end` query parameters into a window.
+
+    ::param HTTPRequest request : The HTTP request object
+    ::return tuple(datetime, datetime) : The `[start, end)` window covering both days in full, `None` when not requested
+    ::raises ValueError : Raised if a date is not in 'YYYY-MM-DD' format
+    """
+    start_date = request.GET.get('start')
+    end_date = request.GET.get('end')
+    if not (start_date and end_date):
+        return None
+    start_date = timezone.make_aware(datetime.strptime(start_date, '%Y-%m-%d'))
+    end_date = timezone.make_aware(datetime.strptime(end_date, '%Y-%m-%d')) + timedelta(days=1)  # Include the full end date
+    return start_date, end_date
+
+def filter_window(events, window):
+    """
+    Restrict events to the series overlapping a window.
+
+    ::param QuerySet events : The events to filter
+    ::param tuple(datetime, datetime)/optional window : The `[start, end)` window, the events are returned unchanged when `None`
+    ::return QuerySet : The filtered events
+    """
+    if not window:
+        return events
+    # Match on the series bounds so recurring events that started before the window are included
+    return events.filter(series_start__lt=window[1]).filter(
+        Q(series_end__gte=window[0]) | Q(series_end__isnull=True)
+    )
 
-        return Response(all_events, status=status.HTTP_200_OK)
+def get_events(request):
+    """
+    Retrieve all events in the calendars owned by or shared with the user.
+
+    ::param str/optional start : The first day of the window to retrieve in 'YYYY-MM-DD' format
+    ::param str/optional end : The last day (inclusive) of the window to retrieve in 'YYYY-MM-DD' format
+    ::param str/optional cursor : Returns the page after this cursor, ordered by (start, id)
+    ::param int/optional page_size : Returns a single page of this many events along with the `next_cursor`
+    ::param str/optional stream : 'true' to stream every event as a JSON array instead of building the response in memory
+    ::header Accept : 'application/vnd.timemesh.columnar+json' returns the compact columnar layout instead of a list of events (not streamed)
+    ::header If-None-Match : The `ETag` of a previous response, answered with `304 Not Modified` when nothing changed since
+    ::return Response : A JSON response containing the events, with `repeated_dates` limited to the window when one is given
+    """
+    try:
+        # The representation depends on the query and the negotiated layout as well as on the events
+        variant = f"{request.META.get('QUERY_STRING', '')}|{request.accepted_media_type}"
+        validators = collection_validators('events', request.user.pk, variant)
+        cached = not_modified(request, validators)
+        if cached:
+            return cached
+
+        calendar_ids = visible_calendar_ids(request.user)
+
+        window = parse_window(request)
+        events = filter_window(Event.objects.filter(cal_id__in=calendar_ids), window)
+
+        # Clients opt into the compact columnar layout through the Accept header
+        columnar = isinstance(request.accepted_renderer, ColumnarEventsRenderer)
+        serialize = serialize_events_columnar if columnar else serialize_events
+
+        if request.GET.get('stream') == 'true' and not columnar:
+            return with_validators(stream_events(events, window), validators)
+
+        if 'cursor' in request.GET or 'page_size' in request.GET:
+            try:
+                page_size = parse_page_size(request.GET.get('page_size'))
+                page, next_cursor = keyset_page(list_rows(events), 'start', request.GET.get('cursor'), page_size)
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            return with_validators(Response({
+                'results': serialize(page, window),
+                'next_cursor': next_cursor,
+            }, status=status.HTTP_200_OK), validators)
+
+        all_events = cached_window_events(calendar_ids, window, columnar)
+        return with_validators(Response(all_events, status=status.HTTP_200_OK), validators)
 
     except Exception as e:
         logger.exception("Error retrieving events")
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def conflicts_response(request, event):
+    """
+    Check an event against the events of the user's calendars when the request asks for it.
+
+    ::param HTTPRequest request : The HTTP request object, with an optional truthy `check_conflicts`
+    ::param Event event : The event about to be saved
+    ::return Response : A 409 response listing the overlapping occurrences, `None` when there are none or no check was asked
+    """
+    if str(request.data.get('check_conflicts', '')).lower() not in ('true', '1'):
+        return None
+    conflicts = find_conflicts(event, visible_calendar_ids(request.user))
+    if not conflicts:
+        return None
+    return Response({
+        'error': 'The event overlaps existing events',
+        'conflicts': [
+            {**conflict, 'start': conflict['start'].isoformat(), 'end': conflict['end'].isoformat()}
+            for conflict in conflicts
+        ],
+    }, status=status.HTTP_409_CONFLICT)
+
 def create_event(request):
     """
     Create a new event in a calendar.
@@ -140,6 +309,7 @@ def create_event(request):
     ::param datetime start : The start date and time of the event
     ::param datetime end : The end date and time of the event
     ::param str/optional bg_color : The background color for the event in hexadecimal format (default: '#FFFFFF')
+    ::param bool/optional check_conflicts : True to refuse the event with a 409 listing the overlapping occurrences in the user's calendars
     ::return Response : A JSON response with the created event's details
     ::raises ValidationError : Raised if the provided data is invalid
     ::raises NotFound : Raised if the specified calendar does not exist
@@ -158,6 +328,9 @@ def create_event(request):
 
     if not (cal_id and title and start and end):
         return Response({'error': 'cal_id, title, start, and end are required'}, status=status.HTTP_400_BAD_REQUEST)
+    if repeat_type == 'CUSTOM':
+        # Custom rules come from imported RRULEs, they cannot be created through the API
+        return Response({'error': "'CUSTOM' rules can only be imported from an .ics file"}, status=status.HTTP_400_BAD_REQUEST)
 
     try:
         calendar = get_object_or_404(Calendar, pk=cal_id)
@@ -175,7 +348,7 @@ def create_event(request):
         if timezone.is_naive(end):
             end = timezone.make_aware(end)
         
-        event = Event.objects.create(
+        event = Event(
             cal_id=calendar,
             title=title,
             description=description,
@@ -187,12 +360,18 @@ def create_event(request):
             repeat_days=repeat_days,
             repeat_until=repeat_until
         )
+        conflicts = conflicts_response(request, event)
+        if conflicts:
+            return conflicts
+        event.save()
         
         # Generate and save repeated dates
         # logger.info('Start Event Generation: %s', event)
         repeated_dates = generate_repeated_dates(event)
         event.set_repeated_dates(repeated_dates)
         event.save()
+        materialize_occurrences(event)
+        record_event_changes(calendar, [event.id], 'upsert')
         # logger.info('Returning respons: %s', EventSerializer(event).data)
         return Response(EventSerializer(event).data, status=status.HTTP_201_CREATED)
 
@@ -253,6 +432,7 @@ def update_event(request, event_id):
 
     ::param HTTPRequest request : The HTTP request object
     ::param int event_id : The ID of the event to update
+    ::param bool/optional check_conflicts : True to refuse the change with a 409 listing the overlapping occurrences in the user's calendars
     ::return Response : A JSON response with the updated event details or an error message
     """
     logger.debug('Request data: %s', request.data)
@@ -275,23 +455,38 @@ def update_event(request, event_id):
             event.description = description
         if start:
             event.start = parse_datetime(start)
+            if timezone.is_naive(event.start):
+                event.start = timezone.make_aware(event.start)
         if end:
             event.end = parse_datetime(end)
+            if timezone.is_naive(event.end):
+                event.end = timezone.make_aware(event.end)
         if bg_color:
             event.bg_color = bg_color
+        if repeat_type == 'CUSTOM' and not event.rrule:
+            return Response({'error': "'CUSTOM' rules can only be imported from an .ics file"}, status=status.HTTP_400_BAD_REQUEST)
         if repeat_type:
             event.repeat_type = repeat_type
         if repeat_days is not None:
             event.repeat_days = repeat_days
         if repeat_until:
             event.repeat_until = parse_datetime(repeat_until)
+            if timezone.is_naive(event.repeat_until):
+                event.repeat_until = timezone.make_aware(event.repeat_until)
 
         # Regenerate repeated dates if repeat-related fields have changed
-        if any(field in request.data for field in ['repeat_type', 'repeat_days', 'repeat_until', 'start', 'end']):
+        series_changed = any(field in request.data for field in ['repeat_type', 'repeat_days', 'repeat_until', 'start', 'end'])
+        if series_changed:
             repeated_dates = generate_repeated_dates(event)
             event.set_repeated_dates(repeated_dates)
 
+        conflicts = conflicts_response(request, event)
+        if conflicts:
+            return conflicts
         event.save()
+        if series_changed:
+            materialize_occurrences(event)
+        record_event_changes(event.cal_id, [event.id], 'upsert')
         return Response(EventSerializer(event).data, status=status.HTTP_200_OK)
 
     except Event.DoesNotExist:
@@ -310,7 +505,9 @@ def delete_event(request, event_id):
     """
     try:
         event = get_object_or_404(Event, pk=event_id, user=request.user)
+        calendar = event.cal_id
         event.delete()
+        record_event_changes(calendar, [event_id], 'delete')
         return Response({'success': 'Event deleted'}, status=status.HTTP_200_OK)
 
     except Event.DoesNotExist:
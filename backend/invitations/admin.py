@@ -6,11 +6,11 @@ Date: 2024-08-18
 
 Admin configuration for the 'Invitations' Django application.
 
-This module registers the `CalendarInvite` model with the Django admin interface and customizes the display options.
+This module registers the `CalendarInvite` and `OutboundEmail` models with the Django admin interface and customizes the display options.
 """
 
 from django.contrib import admin
-from .models import CalendarInvite
+from .models import CalendarInvite, OutboundEmail
 
 @admin.register(CalendarInvite)
 class CalendarInviteAdmin(admin.ModelAdmin):
@@ -24,3 +24,19 @@ class CalendarInviteAdmin(admin.ModelAdmin):
     list_display = ('calendar', 'email', 'invited_by', 'accepted', 'declined', 'created_at')
     search_fields = ('email', 'calendar__title', 'invited_by__username')
     ordering = ('created_at',)
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    """
+    Customize the display and behavior of the `OutboundEmail` model in the Django admin interface.
+
+    ::field tuple list_display : Specifies the fields to be displayed in the list view of the Django admin.
+    ::field tuple list_filter : Specifies the fields to filter the list view by.
+    ::field tuple search_fields : Specifies the fields to be used for searching in the Django admin interface.
+    ::field tuple exclude : Specifies the fields left out of the edit form.
+    """
+    list_display = ('to', 'subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('to', 'subject')
+    exclude = ('html_body',)
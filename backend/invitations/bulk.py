@@ -0,0 +1,106 @@
+"""
+File: bulk.py
+Author: Jason
+Documentation updated by: Jason
+Date: 2026-10-18
+
+This module creates the invitations of a calendar for a whole list of email addresses at once.
+
+The list is normalized and deduplicated in Python, the existing invitations are found with one `email__in` query
+and the new ones are inserted with `bulk_create` in one transaction. The invitation template is rendered once and
+only the recipient address is substituted per email, so inviting hundreds of people runs a constant number of queries.
+"""
+from datetime import datetime
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.template.loader import render_to_string
+from django.utils.html import escape
+from sync.changelog import record_invite_changes
+from .mail import queue_emails
+from .models import CalendarInvite, OutboundEmail
+
+# Stands in for the recipient address in the rendered template, replaced per email
+RECIPIENT_PLACEHOLDER = '[[recipient_email]]'
+
+
+def normalize_emails(emails):
+    """
+    Lowercase, strip and deduplicate email addresses, keeping their order.
+
+    ::param iterable(str) emails : The addresses as entered
+    ::return tuple(list(str), list(str)) : The distinct valid addresses and the invalid ones
+    """
+    valid = {}
+    invalid = {}
+    for email in emails:
+        email = (email or '').strip().lower()
+        if not email:
+            continue
+        try:
+            validate_email(email)
+            valid[email] = None
+        except ValidationError:
+            invalid[email] = None
+    return list(valid), list(invalid)
+
+
+def render_invitation(calendar, user):
+    """
+    Render the invitation email of a calendar once for all its recipients.
+
+    ::param Calendar calendar : The calendar being shared
+    ::param CustomUser user : The user sending the invitations
+    ::return tuple(str, str) : The subject and the HTML body, containing `RECIPIENT_PLACEHOLDER` where the address goes
+    """
+    subject = f"You've been invited to the calendar: {calendar.title}"
+    context = {
+        'calendar_name': calendar.title,
+        'invited_by': user.username,
+        'recipient_email': RECIPIENT_PLACEHOLDER,
+        'current_year': datetime.now().year
+    }
+    return subject, render_to_string('emails/invitation_email.html', context)
+
+
+def _create_invites(calendar, emails, user):
+    existing = set(CalendarInvite.objects.filter(calendar=calendar, email__in=emails).values_list('email', flat=True))
+    new_invites = [CalendarInvite(calendar=calendar, email=email, invited_by=user) for email in emails if email not in existing]
+    with transaction.atomic():
+        return CalendarInvite.objects.bulk_create(new_invites)
+
+
+def invite_emails(calendar, emails, user):
+    """
+    Invite a list of email addresses to a calendar and queue their invitation emails.
+
+    ::param Calendar calendar : The calendar being shared
+    ::param iterable(str) emails : The addresses to invite, duplicates and addresses already invited are skipped
+    ::param CustomUser user : The user sending the invitations
+    ::return tuple(list(CalendarInvite), list(dict)) : The new invitations, and the status of each new or invalid address,
+        'queued' or 'invalid'
+    """
+    emails, invalid = normalize_emails(emails)
+    invitations = []
+    if emails:
+        try:
+            invitations = _create_invites(calendar, emails, user)
+        except IntegrityError:
+            # A concurrent request invited some of the addresses meanwhile, skip those as well
+            invitations = _create_invites(calendar, emails, user)
+
+    record_invite_changes(invite.email for invite in invitations)
+    subject, html_message = render_invitation(calendar, user)
+    queue_emails([
+        OutboundEmail(
+            invite=invite,
+            to=invite.email,
+            subject=subject,
+            html_body=html_message.replace(RECIPIENT_PLACEHOLDER, escape(invite.email)),
+        )
+        for invite in invitations
+    ])
+
+    email_statuses = [{'email': invite.email, 'status': 'queued'} for invite in invitations]
+    email_statuses += [{'email': email, 'status': 'invalid'} for email in invalid]
+    return invitations, email_statuses
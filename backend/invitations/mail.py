@@ -0,0 +1,150 @@
+"""
+File: mail.py
+Author: Jason
+Documentation updated by: Jason
+Date: 2026-10-18
+
+This module delivers the emails queued in the `OutboundEmail` table, so requests never wait on the mail server.
+
+Due emails are claimed in batches of `OUTBOUND_EMAIL_BATCH_SIZE` and sent over a single connection of `EMAIL_BACKEND`.
+An email that fails is retried after an exponential backoff and marked 'failed' after `OUTBOUND_EMAIL_MAX_ATTEMPTS`.
+With `OUTBOUND_EMAIL_BACKEND = 'thread'` delivery starts on a background thread as soon as the emails are committed;
+with `'db'` it is left to `python manage.py send_queued_emails`.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import logging
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+# How long a worker holds the emails it claimed before another worker may pick them up again
+CLAIM_TIMEOUT = timedelta(minutes=5)
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        # One sender at a time keeps a single connection to the mail server
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='outbound-email')
+    return _executor
+
+
+def queue_emails(emails):
+    """
+    Save emails for delivery and schedule it according to `OUTBOUND_EMAIL_BACKEND`.
+
+    ::param list(OutboundEmail) emails : The unsaved emails
+    ::return list(OutboundEmail) : The queued emails
+    """
+    emails = OutboundEmail.objects.bulk_create(emails)
+    if emails and settings.OUTBOUND_EMAIL_BACKEND == 'thread':
+        # Wait for the emails to be committed so the sender thread can read them
+        transaction.on_commit(lambda: _get_executor().submit(_deliver_in_thread))
+    return emails
+
+
+def _deliver_in_thread():
+    try:
+        deliver_queued_emails()
+    except Exception:
+        logger.exception("Delivering queued emails failed")
+    finally:
+        close_old_connections()
+
+
+def retry_delay(attempts):
+    """
+    Return how long to wait before retrying an email.
+
+    ::param int attempts : The number of failed attempts so far
+    ::return timedelta : The exponential backoff, doubling after every attempt
+    """
+    return timedelta(seconds=settings.OUTBOUND_EMAIL_RETRY_DELAY * 2 ** max(attempts - 1, 0))
+
+
+def claim_due_emails(limit):
+    """
+    Claim the oldest due emails so no other worker sends them meanwhile.
+
+    ::param int limit : The maximum number of emails to claim
+    ::return list(OutboundEmail) : The claimed emails, empty when none is due
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        due = OutboundEmail.objects.select_for_update(skip_locked=True).filter(
+            status='pending', next_attempt_at__lte=now
+        ).order_by('next_attempt_at')
+        email_ids = list(due.values_list('pk', flat=True)[:limit])
+        # A worker that dies holding emails releases them once the claim expires
+        OutboundEmail.objects.filter(pk__in=email_ids).update(next_attempt_at=now + CLAIM_TIMEOUT)
+    return list(OutboundEmail.objects.filter(pk__in=email_ids).order_by('pk'))
+
+
+def _record_failure(email, error):
+    attempts = email.attempts + 1
+    gave_up = attempts >= settings.OUTBOUND_EMAIL_MAX_ATTEMPTS
+    OutboundEmail.objects.filter(pk=email.pk).update(
+        status='failed' if gave_up else 'pending',
+        attempts=attempts,
+        next_attempt_at=timezone.now() + retry_delay(attempts),
+        last_error=str(error),
+    )
+    logger.warning("Failed to send email %s to %s (attempt %s): %s", email.pk, email.to, attempts, error)
+
+
+def send_batch(emails):
+    """
+    Send claimed emails over one connection and record the outcome of each.
+
+    ::param list(OutboundEmail) emails : The emails returned by `claim_due_emails`
+    ::return int : The number of emails sent
+    """
+    sent = []
+    pending = list(emails)
+    try:
+        with get_connection() as connection:
+            while pending:
+                email = pending.pop(0)
+                message = EmailMessage(
+                    subject=email.subject,
+                    body=email.html_body,
+                    from_email=settings.DEFAULT_FROM_EMAIL,
+                    to=[email.to],
+                    connection=connection,
+                )
+                message.content_subtype = "html"  # Set email content to HTML
+                try:
+                    connection.send_messages([message])
+                    sent.append(email.pk)
+                except Exception as e:
+                    _record_failure(email, e)
+    except Exception as e:
+        # Opening or closing the connection failed, the emails not attempted yet are retried later
+        logger.exception("Mail server connection failed")
+        for email in pending:
+            _record_failure(email, e)
+
+    OutboundEmail.objects.filter(pk__in=sent).update(status='sent', sent_at=timezone.now(), last_error='')
+    return len(sent)
+
+
+def deliver_queued_emails(batch_size=None):
+    """
+    Send the due emails batch by batch until none is left.
+
+    ::param int/optional batch_size : The number of emails sent per connection, defaults to `OUTBOUND_EMAIL_BATCH_SIZE`
+    ::return int : The number of emails sent
+    """
+    total = 0
+    while True:
+        batch = claim_due_emails(batch_size or settings.OUTBOUND_EMAIL_BATCH_SIZE)
+        if not batch:
+            return total
+        total += send_batch(batch)
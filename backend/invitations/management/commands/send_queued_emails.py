@@ -0,0 +1,37 @@
+"""
+File: send_queued_emails.py
+Author: Jason
+Documentation updated by: Jason
+Date: 2026-10-18
+
+This module defines the worker process that delivers queued emails when `OUTBOUND_EMAIL_BACKEND = 'db'`, and
+retries the failed ones either way. Run it next to the web process, e.g. `python manage.py send_queued_emails`,
+or from a scheduler with `--once`.
+"""
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from invitations.mail import deliver_queued_emails
+
+
+class Command(BaseCommand):
+    """
+    Polls the `OutboundEmail` table and sends the due emails in batches over one connection each.
+    Several workers can run side by side, each email is claimed by one of them at a time.
+    """
+    help = 'Send queued emails and retry failed ones.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once no email is due instead of polling')
+        parser.add_argument('--interval', type=float, default=10.0, help='Seconds to wait between polls when idle')
+        parser.add_argument('--batch-size', type=int, help='Emails sent per connection, defaults to OUTBOUND_EMAIL_BATCH_SIZE')
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            sent = deliver_queued_emails(options['batch_size'])
+            if sent:
+                self.stdout.write(f"Sent {sent} emails")
+            if options['once']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,39 @@
+# Generated by Django 5.1 on 2026-10-18 12:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def remove_duplicate_invites(apps, schema_editor):
+    # Keep one invitation per calendar and email, preferring an answered one and then the oldest
+    CalendarInvite = apps.get_model('invitations', 'CalendarInvite')
+    kept = set()
+    duplicates = []
+    invites = CalendarInvite.objects.order_by('calendar_id', 'email', '-accepted', '-declined', 'id')
+    for invite_id, calendar_id, email in invites.values_list('id', 'calendar_id', 'email').iterator():
+        if (calendar_id, email) in kept:
+            duplicates.append(invite_id)
+        else:
+            kept.add((calendar_id, email))
+    CalendarInvite.objects.filter(id__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calendars', '0001_initial'),
+        ('invitations', '0003_alter_calendarinvite_token'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='calendarinvite',
+            index=models.Index(fields=['email'], name='invite_email_idx'),
+        ),
+        migrations.RunPython(remove_duplicate_invites, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='calendarinvite',
+            constraint=models.UniqueConstraint(fields=('calendar', 'email'), name='invite_calendar_email_uniq'),
+        ),
+    ]
@@ -8,6 +8,7 @@ This module contains Django model for calendar invitations.
 """
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from django.utils.crypto import get_random_string
 from calendars.models import Calendar  # Adjust this import to match your project structure
 
@@ -34,6 +35,14 @@ class CalendarInvite(models.Model):
     declined = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['email'], name='invite_email_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['calendar', 'email'], name='invite_calendar_email_uniq'),
+        ]
+
     def __str__(self):
         """
         Returns a string representation of the invitation.
@@ -49,3 +58,49 @@ class CalendarInvite(models.Model):
         if not self.token:
             self.token = get_random_string(32)
         super(CalendarInvite, self).save(*args, **kwargs)
+
+
+class OutboundEmail(models.Model):
+    """
+    A queued email, delivered in batches by `invitations.mail` and retried with backoff when sending fails.
+
+    ::field ForeignKey invite : The invitation the email announces, if any.
+    ::field EmailField to : The recipient.
+    ::field CharField subject : The subject line.
+    ::field TextField html_body : The rendered HTML body.
+    ::field CharField status : 'pending', 'sent' or 'failed' (gave up after `OUTBOUND_EMAIL_MAX_ATTEMPTS`).
+    ::field PositiveSmallIntegerField attempts : The number of failed delivery attempts.
+    ::field DateTimeField next_attempt_at : When the email is next due. Pushed forward while a worker holds it.
+    ::field TextField last_error : The error of the latest failed attempt.
+    ::field DateTimeField created_at : The timestamp of when the email was queued.
+    ::field DateTimeField sent_at : The timestamp of when the email was handed to the mail server.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    invite = models.ForeignKey(CalendarInvite, on_delete=models.SET_NULL, null=True, blank=True, related_name='emails')
+    to = models.EmailField()
+    subject = models.CharField(max_length=255)
+    html_body = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbound_status_due_idx'),
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the queued email.
+
+        ::return str: The recipient followed by the status.
+        """
+        return f"Email to {self.to} ({self.status})"
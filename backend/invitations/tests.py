@@ -0,0 +1,77 @@
+"""
+File: tests.py
+Author: Jason
+Documentation updated by: Jason
+Date: 2026-10-18
+
+This module contains the tests of the invitations application.
+"""
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from calendars.models import Calendar
+from invitations.models import CalendarInvite
+from users.models import CustomUser
+
+
+class InvitationInboxQueryTests(TestCase):
+    """
+    The number of queries of GET /api/invitations/ does not depend on the number of invitations.
+    """
+    def setUp(self):
+        self.invitee = CustomUser.objects.create(email='invitee@example.com', username='invitee')
+        self.client = APIClient()
+        self.client.force_authenticate(self.invitee)
+        self.created = 0
+
+    def add_invites(self, count):
+        # Every invitation comes from another inviter, for another calendar with its own shared users
+        for _ in range(count):
+            self.created += 1
+            inviter = CustomUser.objects.create(email=f'inviter{self.created}@example.com', username=f'inviter{self.created}')
+            calendar = Calendar.objects.create(user=inviter, title=f'Calendar {self.created}')
+            for member in range(2):
+                calendar.shared_users.add(CustomUser.objects.create(
+                    email=f'member{self.created}-{member}@example.com', username=f'member{self.created}-{member}'
+                ))
+            # Every other invitation is accepted, so the status filter matches a share of them
+            CalendarInvite.objects.create(
+                calendar=calendar, email=self.invitee.email, invited_by=inviter, accepted=self.created % 2 == 0
+            )
+
+    def count_queries(self, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/invitations/', params)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.data
+
+    def assert_constant_queries(self, params):
+        self.add_invites(4)
+        few, few_data = self.count_queries(params)
+        self.add_invites(16)
+        many, many_data = self.count_queries(params)
+
+        self.assertEqual(few, many)
+        return few_data, many_data
+
+    def test_list(self):
+        few, many = self.assert_constant_queries({})
+        self.assertEqual((len(few), len(many)), (4, 20))
+        self.assertEqual(len(many[0]['calendar']['shared_users']), 2)
+
+    def test_status_filter(self):
+        few, many = self.assert_constant_queries({'status': 'pending'})
+        self.assertEqual((len(few), len(many)), (2, 10))
+
+    def test_keyset_page(self):
+        few, many = self.assert_constant_queries({'page_size': 3})
+        self.assertEqual((len(few['results']), len(many['results'])), (3, 3))
+
+    def test_keyset_next_page(self):
+        self.add_invites(4)
+        cursor = self.count_queries({'page_size': 2})[1]['next_cursor']
+        few = self.count_queries({'page_size': 2, 'cursor': cursor})[0]
+        self.add_invites(16)
+        many = self.count_queries({'page_size': 2, 'cursor': cursor})[0]
+        self.assertEqual(few, many)
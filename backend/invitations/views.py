@@ -13,12 +13,25 @@ from rest_framework.response import Response
 from rest_framework import status
 from .models import CalendarInvite
 from calendars.models import Calendar
+from calendars.membership import invalidate_visible_calendars
 from .serializers import CalendarInviteSerializer
 from users.models import CustomUser
 from users.serializers import CustomUserDetailsSerializer
 from calendars.serializers import CalendarSerializer
 from django.shortcuts import get_object_or_404
+from django.db import IntegrityError, transaction
+from sync.changelog import calendar_member_ids, record_calendar_change, record_changes, record_invite_changes
+from sync.versions import collection_validators, not_modified, with_validators
 from django.utils.crypto import get_random_string
+from django.db.models import Prefetch
+from events.pagination import keyset_page, parse_page_size
+
+# Filters of the inbox for each value of the `status` parameter
+INVITE_STATUS_FILTERS = {
+    'pending': {'accepted': False, 'declined': False},
+    'accepted': {'accepted': True},
+    'declined': {'declined': True},
+}
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -42,12 +55,18 @@ def create_invitation(request):
         if CalendarInvite.objects.filter(email=email, calendar=calendar).exists():
             return Response({'error': 'Invitation already exists'}, status=status.HTTP_400_BAD_REQUEST)
 
-        invite = CalendarInvite.objects.create(
-            calendar=calendar,
-            email=email,
-            invited_by=request.user,
-            token=get_random_string(32)  # Generate a unique token
-        )
+        try:
+            with transaction.atomic():
+                invite = CalendarInvite.objects.create(
+                    calendar=calendar,
+                    email=email,
+                    invited_by=request.user,
+                    token=get_random_string(32)  # Generate a unique token
+                )
+        except IntegrityError:
+            # A concurrent request created the same invitation
+            return Response({'error': 'Invitation already exists'}, status=status.HTTP_400_BAD_REQUEST)
+        record_invite_changes([invite.email])
 
         serializer = CalendarInviteSerializer(invite)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -80,13 +99,19 @@ def respond_invitation(request):
             invite.accepted = True
             shared_user = get_object_or_404(CustomUser, email=invite.email)
             if shared_user:
+                other_member_ids = calendar_member_ids(invite.calendar)
                 invite.calendar.shared_users.add(shared_user)
+                invalidate_visible_calendars([shared_user.id])
+                # The new member needs every event of the calendar, the others only its updated member list
+                record_changes([shared_user.id], 'calendar', [invite.calendar.pk], 'refresh')
+                record_calendar_change(invite.calendar, 'upsert', other_member_ids)
             else:
                 return Response({'error': 'Shared user not found'}, status=status.HTTP_404_NOT_FOUND)
         elif action == 'decline':
             invite.declined = True
 
         invite.save()
+        record_invite_changes([invite.email])
         return Response({'message': f'Invitation {action}ed'}, status=status.HTTP_200_OK)
 
     except CalendarInvite.DoesNotExist:
@@ -94,13 +119,37 @@ def respond_invitation(request):
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+def serialize_invite(invite):
+    """
+    Serialize an invitation for the inbox.
+
+    ::param CalendarInvite invite : The invitation, with its calendar, shared users and inviter already loaded
+    ::return dict : The invitation with its calendar and inviter embedded
+    """
+    return {
+        'inv_id': invite.id,
+        'calendar': CalendarSerializer(invite.calendar).data,
+        'email': invite.email,
+        'invited_by': CustomUserDetailsSerializer(invite.invited_by).data,
+        'token': invite.token,
+        'accepted': invite.accepted,
+        'declined': invite.declined,
+        'created_at': invite.created_at.isoformat(),
+    }
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_invites_by_email(request):
     """
-    Retrieve all calendar invitations related to a specified email address.
+    Retrieve all calendar invitations related to the email address of the authenticated user.
+
+    The calendars, their shared users and the inviters are loaded with the invitations, so the number of queries
+    does not grow with the number of invitations.
 
-    ::param str email : The email address to filter invitations.
+    ::param str/optional status : Only returns the 'pending', 'accepted' or 'declined' invitations
+    ::param str/optional cursor : Returns the page after this cursor, ordered by (created_at, id)
+    ::param int/optional page_size : Returns a single page of this many invitations along with the `next_cursor`
+    ::header If-None-Match : The `ETag` of a previous response, answered with `304 Not Modified` when nothing changed since
     ::return Response : A JSON response containing the list of invitations.
     """
     email = request.user.email
@@ -108,24 +157,36 @@ def get_invites_by_email(request):
     if not email:
         return Response({'error': 'Email is required'}, status=status.HTTP_400_BAD_REQUEST)
 
-    invitations = CalendarInvite.objects.filter(email=email)
-    
+    invite_status = request.GET.get('status')
+    if invite_status and invite_status not in INVITE_STATUS_FILTERS:
+        return Response({'error': f"status must be one of {', '.join(INVITE_STATUS_FILTERS)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+    validators = collection_validators('invites', email.lower(), request.META.get('QUERY_STRING', ''))
+    cached = not_modified(request, validators)
+    if cached:
+        return cached
+
+    invitations = CalendarInvite.objects.filter(email=email).select_related('calendar', 'invited_by').prefetch_related(
+        Prefetch('calendar__shared_users', queryset=CustomUser.objects.only('email'))
+    )
+    if invite_status:
+        invitations = invitations.filter(**INVITE_STATUS_FILTERS[invite_status])
+
+    if 'cursor' in request.GET or 'page_size' in request.GET:
+        try:
+            page_size = parse_page_size(request.GET.get('page_size'))
+            page, next_cursor = keyset_page(invitations, 'created_at', request.GET.get('cursor'), page_size)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return with_validators(Response({
+            'results': [serialize_invite(invite) for invite in page],
+            'next_cursor': next_cursor,
+        }, status=status.HTTP_200_OK), validators)
+
+    invitation_data = [serialize_invite(invite) for invite in invitations.order_by('created_at', 'id')]
+
     # If no invitations are found
-    if not invitations.exists():
+    if not invitation_data and not invite_status:
         return Response({'message': 'No invitations found'}, status=status.HTTP_404_NOT_FOUND)
-    
-    # Create a structured response
-    invitation_data = []
-    for invite in invitations:
-        invitation_data.append({
-            'inv_id': invite.id,
-            'calendar': CalendarSerializer(invite.calendar).data,
-            'email': invite.email,
-            'invited_by': CustomUserDetailsSerializer(invite.invited_by).data,
-            'token': invite.token,
-            'accepted': invite.accepted,
-            'declined': invite.declined,
-            'created_at': invite.created_at.isoformat(),
-        })
-
-    return Response(invitation_data, status=status.HTTP_200_OK)
\ No newline at end of file
+
+    return with_validators(Response(invitation_data, status=status.HTTP_200_OK), validators)
@@ -0,0 +1,19 @@
+"""
+File: apps.py
+Author: Jason
+Documentation updated by: Jason
+Date: 2026-10-18
+
+This module defines the configuration class for the 'scheduling' application, which answers free/busy queries across users and calendars.
+"""
+from django.apps import AppConfig
+
+class SchedulingConfig(AppConfig):
+    """
+    This class inherits from `AppConfig` and is used to specify application-specific settings and behaviors.
+
+    ::field str default_auto_field : specifies the default field type for auto-generated primary keys in models within this app.
+    ::field str name : specifies the application name as Django identifies it in settings and migration files.
+    """
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'scheduling'
@@ -0,0 +1,117 @@
+"""
+File: freebusy.py
+Author: Jason
+Documentation updated by: Jason
+Date: 2026-10-18
+
+This module computes the busy time of several participants, users or calendars, and the slots they all have free.
+
+Every calendar involved is read with one event query, and the occurrences are read from the materialized
+`EventOccurrence` table or expanded with the recurrence engine (see `events.occurrences.occurrence_intervals`).
+Each calendar's occurrences are merged once, and a participant's busy time is the heap-merged union of their calendars.
+
+Only busy intervals are returned, never event details. Users can only be queried by people who share a calendar
+with them, and calendars by people who can see them.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from calendars.membership import calendar_ids_by_user, visible_calendar_ids
+from events.models import Event
+from events.occurrences import INTERVAL_FIELDS, occurrence_intervals
+from events.views import filter_window
+from .intervals import clip_intervals, free_intervals, merge_intervals, union_intervals
+
+# Bounds of a single query, so one request cannot expand years of occurrences for many people
+MAX_WINDOW = timedelta(days=92)
+MAX_PARTICIPANTS = 50
+
+
+def parse_instant(value):
+    """
+    Parse an ISO 8601 datetime or date sent by the client. Dates stand for midnight, naive values are in the current timezone.
+
+    ::param str value : The value to parse
+    ::return datetime : The aware datetime
+    ::raises ValueError : Raised if the value is missing or not ISO 8601
+    """
+    parsed = parse_datetime(value or '') or parse_date(value or '')
+    if parsed is None:
+        raise ValueError(f'Invalid date or datetime: {value!r}')
+    if not isinstance(parsed, datetime):
+        parsed = datetime.combine(parsed, datetime.min.time())
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+
+def resolve_participants(requester, emails=(), calendar_ids=()):
+    """
+    Resolve the calendars of each participant, checking the requester may see their free/busy.
+
+    ::param CustomUser requester : The user asking
+    ::param iterable(str) emails : The users to include, the requester or people sharing a calendar with them
+    ::param iterable(int) calendar_ids : The calendars to include, each visible to the requester
+    ::return tuple(dict, list(str)) : The calendar ids of each participant keyed by label ('<email>' or 'calendar:<id>'),
+        and the requested participants that are unknown or not visible to the requester
+    """
+    visible = set(visible_calendar_ids(requester))
+    participants = {}
+    denied = []
+
+    requested = [email.strip() for email in emails if email and email.strip()]
+    emails = list(dict.fromkeys(email.lower() for email in requested))
+    # Match the addresses as entered and lowercased, an exact lookup keeps the index on email usable
+    users = get_user_model().objects.filter(email__in={*requested, *emails}).only('email')
+    users = {user.email.lower(): user.pk for user in users}
+    memberships = calendar_ids_by_user(users.values())
+    for email in emails:
+        user_id = users.get(email)
+        # Anyone but the requester must be a co-member of one of their calendars
+        if user_id is None or (user_id != requester.pk and not memberships[user_id] & visible):
+            denied.append(email)
+        else:
+            participants[email] = memberships[user_id]
+
+    for calendar_id in dict.fromkeys(calendar_ids):
+        if calendar_id in visible:
+            participants[f'calendar:{calendar_id}'] = {calendar_id}
+        else:
+            denied.append(f'calendar:{calendar_id}')
+    return participants, denied
+
+
+def busy_by_calendar(calendar_ids, start, end):
+    """
+    Merge the occurrences of the events of each calendar that overlap a window.
+
+    ::param set(int) calendar_ids : The calendars to read
+    ::param datetime start : The inclusive lower bound of the window
+    ::param datetime end : The exclusive upper bound of the window
+    ::return dict(int, list(tuple)) : The merged busy intervals of each calendar, clipped to the window
+    """
+    calendar_ids = sorted(calendar_ids)
+    events = list(filter_window(Event.objects.filter(cal_id__in=calendar_ids), (start, end)).values_list(*INTERVAL_FIELDS, named=True))
+    intervals = occurrence_intervals(events, start, end, calendar_ids)
+    by_calendar = defaultdict(list)
+    for event in events:
+        by_calendar[event.cal_id].extend(intervals.get(event.id, ()))
+    return {calendar_id: clip_intervals(merge_intervals(by_calendar[calendar_id]), start, end) for calendar_id in calendar_ids}
+
+
+def free_busy(participants, start, end, min_duration=timedelta(0)):
+    """
+    Compute the busy intervals of each participant and the slots free for all of them.
+
+    ::param dict(str, set(int)) participants : The calendar ids of each participant, as returned by `resolve_participants`
+    ::param datetime start : The inclusive lower bound of the window
+    ::param datetime end : The exclusive upper bound of the window
+    ::param timedelta min_duration : Common free slots shorter than this are left out
+    ::return tuple(dict(str, list(tuple)), list(tuple)) : The busy intervals of each participant and the common free slots
+    """
+    calendars = busy_by_calendar(set().union(*participants.values()), start, end)
+    busy = {
+        label: union_intervals(calendars[calendar_id] for calendar_id in sorted(calendar_ids))
+        for label, calendar_ids in participants.items()
+    }
+    return busy, free_intervals(union_intervals(busy.values()), start, end, min_duration)
@@ -0,0 +1,79 @@
+"""
+File: intervals.py
+Author: Jason
+Documentation updated by: Jason
+Date: 2026-10-18
+
+This module contains the interval set operations behind free/busy: merging, union and complement of `[start, end)` intervals.
+
+Interval sets are plain lists of `(start, end)` tuples, sorted by start and without overlaps once merged.
+Sets that are already merged are combined with a k-way `heapq.merge` and a single sweep, so the union of
+n participants' busy time costs O(total intervals * log n).
+"""
+import heapq
+from datetime import timedelta
+
+
+def _sweep(intervals):
+    """
+    Merge intervals that overlap or touch, in a single pass over intervals sorted by start.
+    """
+    merged = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        elif end > start:
+            merged.append((start, end))
+    return merged
+
+
+def merge_intervals(intervals):
+    """
+    Merge a collection of intervals into a sorted, non-overlapping set.
+
+    ::param iterable(tuple) intervals : The `(start, end)` intervals in any order
+    ::return list(tuple) : The merged intervals sorted by start, empty intervals left out
+    """
+    return _sweep(sorted(intervals))
+
+
+def union_intervals(interval_sets):
+    """
+    Compute the union of several merged interval sets.
+
+    ::param iterable(list(tuple)) interval_sets : The sets, each sorted by start as returned by `merge_intervals`
+    ::return list(tuple) : The merged union
+    """
+    return _sweep(heapq.merge(*interval_sets))
+
+
+def clip_intervals(intervals, start, end):
+    """
+    Restrict a merged interval set to a window.
+
+    ::param list(tuple) intervals : The merged intervals
+    ::param datetime start : The inclusive lower bound of the window
+    ::param datetime end : The exclusive upper bound of the window
+    ::return list(tuple) : The parts of the intervals within `[start, end)`
+    """
+    return [(max(low, start), min(high, end)) for low, high in intervals if low < end and high > start]
+
+
+def free_intervals(busy, start, end, min_duration=timedelta(0)):
+    """
+    Compute the gaps of a merged busy set within a window.
+
+    ::param list(tuple) busy : The merged busy intervals
+    ::param datetime start : The inclusive lower bound of the window
+    ::param datetime end : The exclusive upper bound of the window
+    ::param timedelta min_duration : Gaps shorter than this are left out
+    ::return list(tuple) : The free intervals sorted by start
+    """
+    free = []
+    cursor = start
+    for low, high in clip_intervals(busy, start, end) + [(end, end)]:
+        if low - cursor >= max(min_duration, timedelta.resolution):
+            free.append((cursor, low))
+        cursor = max(cursor, high)
+    return free
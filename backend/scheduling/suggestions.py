@@ -0,0 +1,154 @@
+"""
+File: suggestions.py
+Author: Jason
+Documentation updated by: Jason
+Date: 2026-10-18
+
+This module finds the best slots for a meeting of a given duration across the participants of a free/busy query.
+
+Busy time comes from `scheduling.freebusy`, widened by the buffer so meetings do not start or end back to back
+with another event. Time outside working hours is one more busy set shared by everyone. The boundaries of all sets
+are walked in chronological order with a heap (`heapq.merge`), so the slots where everybody is free are yielded as
+soon as they are reached and the walk stops after `count` of them. Only if there are fewer than that are the
+working-hours slots with the fewest unavailable participants ranked and yielded after them.
+"""
+from bisect import bisect_left
+from datetime import datetime, time, timedelta
+import heapq
+from itertools import groupby
+from operator import itemgetter
+from events.recurrence import WEEKDAYS
+from .intervals import free_intervals, merge_intervals
+
+DEFAULT_WORKING_DAYS = ('MON', 'TUE', 'WED', 'THU', 'FRI')
+DEFAULT_WORKING_HOURS = (time(9), time(17))
+DEFAULT_STEP = timedelta(minutes=15)
+MAX_SUGGESTIONS = 50
+
+# Label of the pseudo participant that is busy outside working hours
+CLOSED = None
+
+
+def working_windows(start, end, tzinfo, day_start=DEFAULT_WORKING_HOURS[0], day_end=DEFAULT_WORKING_HOURS[1], days=DEFAULT_WORKING_DAYS):
+    """
+    Compute the working-hours windows between two instants, in wall-clock time of a timezone.
+
+    ::param datetime start : The inclusive lower bound
+    ::param datetime end : The exclusive upper bound
+    ::param tzinfo tzinfo : The timezone the working hours are expressed in
+    ::param time day_start : The start of the working day
+    ::param time day_end : The end of the working day, on the next day when not after `day_start`
+    ::param iterable(str) days : The working days, e.g. 'MON', as the day on which a working window starts
+    ::return list(tuple(datetime, datetime)) : The working windows clipped to `[start, end)`, sorted
+    """
+    weekdays = {WEEKDAYS[day] for day in days if day in WEEKDAYS}
+    windows = []
+    day = start.astimezone(tzinfo).date() - timedelta(days=1)  # An overnight window may start the day before
+    while day <= end.astimezone(tzinfo).date():
+        if day.weekday() in weekdays:
+            low = datetime.combine(day, day_start, tzinfo=tzinfo)
+            high = datetime.combine(day + timedelta(days=day_end <= day_start), day_end, tzinfo=tzinfo)
+            if low < end and high > start:
+                windows.append((max(low, start), min(high, end)))
+        day += timedelta(days=1)
+    return merge_intervals(windows)
+
+
+def align(value, step, tzinfo):
+    """
+    Round an instant up to the next multiple of `step` after midnight, in wall-clock time of a timezone.
+
+    ::param datetime value : The instant to round
+    ::param timedelta step : The granularity of slot starts
+    ::param tzinfo tzinfo : The timezone of the wall clock
+    ::return datetime : The first aligned instant at or after `value`
+    """
+    local = value.astimezone(tzinfo)
+    midnight = local.replace(hour=0, minute=0, second=0, microsecond=0)
+    return value + (-(local - midnight)) % step
+
+
+def _boundaries(label, intervals):
+    for low, high in intervals:
+        yield low, 1, label
+        yield high, -1, label
+
+
+def _free_stretches(busy, closed, start, end):
+    """
+    Walk the boundaries of every busy set with a heap and yield the stretches where nobody is busy, in order.
+    """
+    depth = {}
+    cursor = start
+    streams = [_boundaries(label, intervals) for label, intervals in busy.items()]
+    streams.append(_boundaries(CLOSED, closed))
+    for instant, changes in groupby(heapq.merge(*streams, key=itemgetter(0, 1)), key=itemgetter(0)):
+        if not depth and instant > cursor:
+            yield cursor, instant
+        for _, delta, label in changes:
+            depth[label] = depth.get(label, 0) + delta
+            if not depth[label]:
+                del depth[label]
+        cursor = max(cursor, instant)
+    if cursor < end:
+        yield cursor, end
+
+
+def _unavailable(busy, low, high):
+    """
+    Return the participants with a busy interval overlapping `[low, high)`, by binary search in each merged set.
+    """
+    labels = []
+    for label, intervals in busy.items():
+        # The first interval ending after `low` is the only candidate, the sets are merged
+        index = bisect_left(intervals, low, key=itemgetter(1))
+        if index < len(intervals) and intervals[index][1] > low and intervals[index][0] < high:
+            labels.append(label)
+    return labels
+
+
+def iter_suggestions(busy, start, end, duration, count, tzinfo, buffer=timedelta(0), step=DEFAULT_STEP, working=None):
+    """
+    Lazily find the best slots for a meeting.
+
+    Slots where every participant is free come first in chronological order, each yielded as soon as the boundary
+    walk reaches it. If there are fewer than `count`, the remaining slots are the working-hours slots with the fewest
+    unavailable participants, earliest first among equals.
+
+    ::param dict(str, list(tuple)) busy : The merged busy intervals of each participant, as returned by `free_busy`
+    ::param datetime start : The earliest start of a slot
+    ::param datetime end : The latest end of a slot
+    ::param timedelta duration : The length of the meeting
+    ::param int count : The number of slots to find
+    ::param tzinfo tzinfo : The timezone of the working hours and of the slot grid
+    ::param timedelta buffer : The free time required before and after the meeting
+    ::param timedelta step : The granularity of slot starts
+    ::param list(tuple)/optional working : The working windows, see `working_windows`, defaults to the whole window
+    ::return generator(dict) : Each slot with its `start`, `end`, `score` (the number of unavailable participants) and the `unavailable` labels
+    """
+    working = [(start, end)] if working is None else working
+    if buffer:
+        busy = {label: merge_intervals((low - buffer, high + buffer) for low, high in intervals) for label, intervals in busy.items()}
+    closed = free_intervals(working, start, end)
+
+    found = 0
+    for low, high in _free_stretches(busy, closed, start, end):
+        slot = align(low, step, tzinfo)
+        while slot + duration <= high:
+            yield {'start': slot, 'end': slot + duration, 'score': 0, 'unavailable': []}
+            found += 1
+            if found == count:
+                return
+            slot += step
+
+    def partial_slots():
+        for low, high in working:
+            slot = align(low, step, tzinfo)
+            while slot + duration <= high:
+                unavailable = _unavailable(busy, slot, slot + duration)
+                if unavailable:  # Slots with everyone free were yielded above
+                    yield len(unavailable), slot, unavailable
+                slot += step
+
+    for score, slot, unavailable in heapq.nsmallest(count - found, partial_slots(), key=itemgetter(0, 1)):
+        yield {'start': slot, 'end': slot + duration, 'score': score, 'unavailable': unavailable}
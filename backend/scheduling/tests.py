@@ -0,0 +1,35 @@
+"""
+File: tests.py
+Author: Jason
+Documentation updated by: Jason
+Date: 2026-10-18
+
+This module contains the tests of the scheduling application.
+"""
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from users.models import CustomUser
+
+
+class ParticipantListTests(TestCase):
+    """
+    The participants of POST /api/freebusy/ and POST /api/freebusy/suggestions/ must be lists.
+    """
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create(email='owner@example.com', username='owner')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.window = {'start': '2026-11-02T08:00:00Z', 'end': '2026-11-02T18:00:00Z'}
+
+    def test_string_participants_are_rejected(self):
+        for url in ('/api/freebusy/', '/api/freebusy/suggestions/'):
+            for body in ({'emails': self.user.email}, {'calendars': '12'}, {'emails': [{'email': self.user.email}]}):
+                response = self.client.post(url, {**self.window, 'duration': 30, **body}, format='json')
+                self.assertEqual(response.status_code, 400, (url, body))
+
+    def test_list_participants_are_accepted(self):
+        response = self.client.post('/api/freebusy/', {**self.window, 'emails': [self.user.email]}, format='json')
+
+        self.assertEqual(response.status_code, 200, response.data)
@@ -0,0 +1,196 @@
+"""
+File: views.py
+Author: Jason
+Documentation updated by: Jason
+Date: 2026-10-18
+
+This module contains the Django views of the scheduling application.
+"""
+from datetime import time, timedelta
+import json
+import logging
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status
+from .freebusy import MAX_PARTICIPANTS, MAX_WINDOW, free_busy, parse_instant, resolve_participants
+from .suggestions import (
+    DEFAULT_STEP, DEFAULT_WORKING_DAYS, DEFAULT_WORKING_HOURS, MAX_SUGGESTIONS, iter_suggestions, working_windows,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def serialize_intervals(intervals):
+    """
+    Serialize intervals as a list of `{start, end}` objects with ISO 8601 datetimes.
+
+    ::param list(tuple) intervals : The `(start, end)` intervals
+    ::return list(dict) : The serialized intervals
+    """
+    return [{'start': start.isoformat(), 'end': end.isoformat()} for start, end in intervals]
+
+
+def parse_list(data, name):
+    """
+    Read a list parameter from the request body.
+
+    ::param dict data : The request body
+    ::param str name : The name of the parameter
+    ::return list : The values, empty when the parameter is missing
+    ::raises ValueError : Raised if the value is not a list, a string would otherwise be read character by character
+    """
+    values = data.get(name) or []
+    if not isinstance(values, list):
+        raise ValueError(f'{name} must be a list')
+    return values
+
+
+def parse_query(data):
+    """
+    Parse and validate the participants and window shared by the scheduling endpoints.
+
+    ::param dict data : The request body
+    ::return tuple(list(str), list(int), datetime, datetime) : The emails, the calendar ids and the `[start, end)` window
+    ::raises ValueError : Raised if a value is malformed or out of bounds
+    """
+    emails = parse_list(data, 'emails')
+    if not all(isinstance(email, str) for email in emails):
+        raise ValueError('emails must be a list of strings')
+    calendar_ids = [int(calendar_id) for calendar_id in parse_list(data, 'calendars')]
+    start = parse_instant(data.get('start'))
+    end = parse_instant(data.get('end'))
+    if not emails and not calendar_ids:
+        raise ValueError('At least one email or calendar is required')
+    if len(emails) + len(calendar_ids) > MAX_PARTICIPANTS:
+        raise ValueError(f'At most {MAX_PARTICIPANTS} participants are allowed')
+    if not start < end <= start + MAX_WINDOW:
+        raise ValueError(f'end must be after start and at most {MAX_WINDOW.days} days later')
+    return emails, calendar_ids, start, end
+
+
+def parse_minutes(data, name, default=0, minimum=0):
+    """
+    Parse a number of minutes from the request body.
+
+    ::param dict data : The request body
+    ::param str name : The name of the parameter
+    ::param int default : The value used when the parameter is missing
+    ::param int minimum : The smallest accepted value
+    ::return timedelta : The duration
+    ::raises ValueError : Raised if the value is not an integer of at least `minimum`
+    """
+    minutes = int(data.get(name) if data.get(name) is not None else default)
+    if minutes < minimum:
+        raise ValueError(f'{name} must be at least {minimum} minutes')
+    return timedelta(minutes=minutes)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def freebusy_view(request):
+    """
+    Compute the busy time of users or calendars over a window and the slots they all have free.
+
+    ::param list(str)/optional emails : The users to include, the requester or people sharing a calendar with them
+    ::param list(int)/optional calendars : The calendars to include, each visible to the requester
+    ::param str start : The inclusive start of the window, an ISO 8601 datetime or date
+    ::param str end : The exclusive end of the window, at most 92 days after `start`
+    ::param int/optional min_duration : The length in minutes of the shortest free slot to return, defaults to 0
+    ::return Response : A JSON response with the `busy` intervals of each participant (keyed by email or 'calendar:<id>')
+        and the common `free` slots, or a 403 listing the participants that cannot be queried
+    """
+    try:
+        emails, calendar_ids, start, end = parse_query(request.data)
+        min_duration = parse_minutes(request.data, 'min_duration')
+    except (TypeError, ValueError) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        participants, denied = resolve_participants(request.user, emails, calendar_ids)
+        if denied:
+            return Response({'error': 'Free/busy is not available for some participants', 'denied': denied}, status=status.HTTP_403_FORBIDDEN)
+
+        busy, free = free_busy(participants, start, end, min_duration)
+        return Response({
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'busy': {label: serialize_intervals(intervals) for label, intervals in busy.items()},
+            'free': serialize_intervals(free),
+        }, status=status.HTTP_200_OK)
+    except Exception as e:
+        logger.exception("Error computing free/busy")
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def suggest_slots_view(request):
+    """
+    Suggest the best slots for a meeting across users or calendars, streamed as newline-delimited JSON.
+
+    Slots where everybody is free are written as soon as they are found, earliest first. If there are fewer than `count`,
+    they are followed by the slots with the fewest unavailable participants. See `scheduling.suggestions`.
+
+    ::param list(str)/optional emails : The users to include, the requester or people sharing a calendar with them
+    ::param list(int)/optional calendars : The calendars to include, each visible to the requester
+    ::param str start : The earliest start of the meeting, an ISO 8601 datetime or date
+    ::param str end : The latest end of the meeting, at most 92 days after `start`
+    ::param int duration : The length of the meeting in minutes
+    ::param int/optional count : The number of slots to return, defaults to 5
+    ::param int/optional buffer : The free minutes required before and after the meeting, defaults to 0
+    ::param int/optional step : The granularity of slot starts in minutes, defaults to 15
+    ::param str/optional timezone : The IANA timezone of the working hours and of the slot grid, defaults to the server timezone
+    ::param dict/optional working_hours : The `start` and `end` of the working day ('HH:MM') and the working `days` (e.g. 'MON'),
+        defaults to 09:00-17:00 on weekdays; null to allow any time
+    ::return StreamingHttpResponse : One JSON object per line with the `start`, `end`, `score` (the number of unavailable
+        participants) and the `unavailable` participants of each slot, or a 400/403 JSON response
+    """
+    data = request.data
+    try:
+        emails, calendar_ids, start, end = parse_query(data)
+        duration = parse_minutes(data, 'duration', default=0, minimum=1)
+        buffer = parse_minutes(data, 'buffer')
+        step = parse_minutes(data, 'step', default=DEFAULT_STEP.seconds // 60, minimum=1)
+        count = int(data.get('count') or 5)
+        if not 1 <= count <= MAX_SUGGESTIONS:
+            raise ValueError(f'count must be between 1 and {MAX_SUGGESTIONS}')
+        tzinfo = ZoneInfo(data['timezone']) if data.get('timezone') else timezone.get_current_timezone()
+        working = None
+        if 'working_hours' not in data or data['working_hours']:
+            hours = data.get('working_hours') or {}
+            working = working_windows(
+                start, end, tzinfo,
+                time.fromisoformat(hours['start']) if hours.get('start') else DEFAULT_WORKING_HOURS[0],
+                time.fromisoformat(hours['end']) if hours.get('end') else DEFAULT_WORKING_HOURS[1],
+                hours.get('days') or DEFAULT_WORKING_DAYS,
+            )
+    except ZoneInfoNotFoundError:
+        return Response({'error': f"Unknown timezone: {data.get('timezone')}"}, status=status.HTTP_400_BAD_REQUEST)
+    except (TypeError, ValueError, AttributeError) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        participants, denied = resolve_participants(request.user, emails, calendar_ids)
+        if denied:
+            return Response({'error': 'Free/busy is not available for some participants', 'denied': denied}, status=status.HTTP_403_FORBIDDEN)
+
+        # Read the buffer around the window too, so events just outside it still keep their distance
+        busy, _ = free_busy(participants, start - buffer, end + buffer)
+    except Exception as e:
+        logger.exception("Error computing free/busy")
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def lines():
+        for slot in iter_suggestions(busy, start, end, duration, count, tzinfo, buffer, step, working):
+            yield json.dumps({
+                'start': slot['start'].astimezone(tzinfo).isoformat(),
+                'end': slot['end'].astimezone(tzinfo).isoformat(),
+                'score': slot['score'],
+                'unavailable': slot['unavailable'],
+            }) + '\n'
+
+    return StreamingHttpResponse(lines(), content_type='application/x-ndjson')
@@ -0,0 +1,43 @@
+"""
+File: admin.py
+Author: Jason
+Documentation updated by: Jason
+Date: 2026-10-18
+
+This module registers the change log models with the Django admin site.
+"""
+from django.contrib import admin
+from .models import ChangeLogEntry, CollectionVersion, SyncState
+
+@admin.register(ChangeLogEntry)
+class ChangeLogEntryAdmin(admin.ModelAdmin):
+    """
+    Customizes the display of `ChangeLogEntry` instances in the Django admin interface.
+
+    ::field tuple list_display : Specifies the fields to be displayed in the list view of the Django admin.
+    ::field tuple list_filter : Specifies the fields to filter the list view by.
+    """
+    list_display = ('user', 'version', 'kind', 'object_id', 'action', 'created_at')
+    list_filter = ('kind', 'action')
+    list_select_related = ('user',)
+
+@admin.register(SyncState)
+class SyncStateAdmin(admin.ModelAdmin):
+    """
+    Customizes the display of `SyncState` instances in the Django admin interface.
+
+    ::field tuple list_display : Specifies the fields to be displayed in the list view of the Django admin.
+    """
+    list_display = ('user', 'version')
+    list_select_related = ('user',)
+
+@admin.register(CollectionVersion)
+class CollectionVersionAdmin(admin.ModelAdmin):
+    """
+    Customizes the display of `CollectionVersion` instances in the Django admin interface.
+
+    ::field tuple list_display : Specifies the fields to be displayed in the list view of the Django admin.
+    ::field tuple list_filter : Specifies the fields to filter the list view by.
+    """
+    list_display = ('scope', 'key', 'version', 'updated_at')
+    list_filter = ('scope',)
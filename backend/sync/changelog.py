@@ -0,0 +1,106 @@
+"""
+File: changelog.py
+Author: Jason
+Documentation updated by: Jason
+Date: 2026-10-18
+
+This module records changes to events and calendars in the per-user change log read by the delta sync endpoint.
+Every write path that creates, updates or deletes an event or calendar calls one of these helpers, which also
+bump the collection versions behind the `ETag` of the read endpoints.
+"""
+from django.db import transaction
+from .models import ChangeLogEntry, SyncState
+from .versions import bump_versions
+
+
+def calendar_member_ids(calendar):
+    """
+    Return the ids of the users who can see a calendar.
+
+    ::param Calendar calendar : The calendar
+    ::return list(int) : The owner followed by the users the calendar is shared with
+    """
+    return [calendar.user_id, *calendar.shared_users.values_list('id', flat=True)]
+
+
+def record_changes(user_ids, kind, object_ids, action):
+    """
+    Bump the version of each user and log the change of the given objects at that version.
+
+    ::param iterable(int) user_ids : The users the change is visible to
+    ::param str kind : 'event' or 'calendar'
+    ::param iterable(int) object_ids : The primary keys of the objects that changed
+    ::param str action : 'upsert', 'delete' or 'refresh'
+    """
+    object_ids = list(object_ids)
+    if not object_ids:
+        return
+    with transaction.atomic():
+        entries = []
+        # Lock the states in a stable order so concurrent writers cannot deadlock
+        for user_id in sorted(set(user_ids)):
+            state, _ = SyncState.objects.select_for_update().get_or_create(user_id=user_id)
+            state.version += 1
+            state.save(update_fields=['version'])
+            entries.extend(
+                ChangeLogEntry(user_id=user_id, version=state.version, kind=kind, object_id=object_id, action=action)
+                for object_id in object_ids
+            )
+        ChangeLogEntry.objects.bulk_create(entries)
+
+        # Deleting or sharing a calendar also changes the events the members can see
+        if kind == 'event' or action in ('delete', 'refresh'):
+            bump_versions('events', user_ids)
+        if kind == 'calendar':
+            bump_versions('calendars', user_ids)
+
+
+def record_event_changes(calendar, event_ids, action, member_ids=None):
+    """
+    Log a change of events for every member of their calendar.
+
+    ::param Calendar calendar : The calendar the events belong to
+    ::param iterable(int) event_ids : The primary keys of the events
+    ::param str action : 'upsert' or 'delete'
+    ::param list(int)/optional member_ids : The members of the calendar when they are already known
+    """
+    member_ids = member_ids or calendar_member_ids(calendar)
+    record_changes(member_ids, 'event', event_ids, action)
+    # Expires the cached event windows of the calendar, which every member shares
+    bump_versions('calendar', [calendar.pk])
+    # The calendar lists embed the event count of each calendar
+    bump_versions('calendars', member_ids)
+
+
+def invitee_emails(calendar):
+    """
+    Return the email addresses invited to a calendar.
+
+    ::param Calendar calendar : The calendar
+    ::return list(str) : The lowercased email addresses of its invitations
+    """
+    return [email.lower() for email in calendar.calendarinvite_set.values_list('email', flat=True)]
+
+
+def record_invite_changes(emails):
+    """
+    Mark the invitations listed for each email address as changed.
+
+    ::param iterable(str) emails : The email addresses whose invitations were created, answered or whose calendar changed
+    """
+    bump_versions('invites', (email.lower() for email in emails if email))
+
+
+def record_calendar_change(calendar, action, member_ids=None, emails=None):
+    """
+    Log a change of a calendar for every member of it. Invitations embed the calendar, so they are marked as changed too.
+
+    ::param Calendar calendar : The calendar that changed
+    ::param str action : 'upsert', 'delete' or 'refresh'
+    ::param list(int)/optional member_ids : The members of the calendar when they are already known, e.g. before a delete
+    ::param list(str)/optional emails : The invited email addresses when they are already known, e.g. before a delete
+    """
+    record_changes(member_ids or calendar_member_ids(calendar), 'calendar', [calendar.pk], action)
+    # Expires the cached event windows and the subscription feed, which embeds the calendar title
+    bump_versions('calendar', [calendar.pk])
+    record_invite_changes(invitee_emails(calendar) if emails is None else emails)
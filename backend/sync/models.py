@@ -0,0 +1,100 @@
+"""
+File: models.py
+Author: Jason
+Documentation updated by: Jason
+Date: 2026-10-18
+
+This module contains the models of the change log that backs the delta sync endpoint.
+"""
+from django.db import models
+from django.conf import settings
+
+
+class SyncState(models.Model):
+    """
+    Holds the monotonically increasing change version of a user.
+
+    ::field OneToOneField user : The user the version belongs to.
+    ::field PositiveBigIntegerField version : The version of the latest change visible to the user.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='sync_state')
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        """
+        Returns a string representation of the sync state.
+
+        ::return str: The user followed by the current version.
+        """
+        return f"{self.user} @ {self.version}"
+
+
+class ChangeLogEntry(models.Model):
+    """
+    Records that an event or calendar visible to a user was created, updated or deleted.
+
+    ::field ForeignKey user : The user the change is visible to.
+    ::field PositiveBigIntegerField version : The version of the user the change was recorded at.
+    ::field CharField kind : The kind of object that changed, 'event' or 'calendar'.
+    ::field BigIntegerField object_id : The primary key of the object that changed.
+    ::field CharField action : 'upsert' for creates and updates, 'delete' for deletes and 'refresh' when a
+        calendar and all of its events have to be sent again (e.g. it was just shared with or imported by the user).
+    ::field DateTimeField created_at : The timestamp of when the change was recorded.
+    """
+    KIND_CHOICES = [
+        ('event', 'Event'),
+        ('calendar', 'Calendar'),
+    ]
+    ACTION_CHOICES = [
+        ('upsert', 'Created or updated'),
+        ('delete', 'Deleted'),
+        ('refresh', 'Calendar and all of its events'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='change_log')
+    version = models.PositiveBigIntegerField()
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'version'], name='changelog_user_version_idx'),
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the change.
+
+        ::return str: The action, kind and id of the changed object.
+        """
+        return f"{self.action} {self.kind} {self.object_id}"
+
+
+class CollectionVersion(models.Model):
+    """
+    Holds the version of a collection served by a read endpoint, used to build its `ETag` and `Last-Modified` headers.
+
+    ::field CharField scope : The collection, e.g. 'events', 'calendars' or 'invites'.
+    ::field CharField key : Who the collection belongs to, a user id or an email address for invitations.
+    ::field PositiveBigIntegerField version : Incremented on every change to the collection.
+    ::field DateTimeField updated_at : The timestamp of the latest change to the collection.
+    """
+    scope = models.CharField(max_length=20)
+    key = models.CharField(max_length=254)
+    version = models.PositiveBigIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='collection_version_scope_key_uniq'),
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the collection version.
+
+        ::return str: The scope and key followed by the current version.
+        """
+        return f"{self.scope}:{self.key} @ {self.version}"
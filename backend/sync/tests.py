@@ -0,0 +1,36 @@
+"""
+File: tests.py
+Author: Jason
+Documentation updated by: Jason
+Date: 2026-10-18
+
+This module contains the tests of the sync application.
+"""
+from unittest import mock
+from django.test import TestCase
+from sync.models import CollectionVersion
+from sync.versions import bump_versions, collection_versions
+
+
+class BumpVersionsTests(TestCase):
+    """
+    Every bump of a collection version is counted, including concurrent first bumps.
+    """
+    def test_bumps_are_counted(self):
+        bump_versions('events', [1, 2])
+        bump_versions('events', [2, 3])
+
+        self.assertEqual(collection_versions('events', [1, 2, 3, 4]), {'1': 1, '2': 2, '3': 1, '4': 0})
+
+    def test_concurrent_first_bump_is_not_lost(self):
+        bulk_create = CollectionVersion.objects.bulk_create
+
+        def racing_bulk_create(*args, **kwargs):
+            # Another request completes the first bump of the same key just before this insert
+            CollectionVersion.objects.create(scope='events', key='1', version=1)
+            return bulk_create(*args, **kwargs)
+
+        with mock.patch.object(CollectionVersion.objects, 'bulk_create', side_effect=racing_bulk_create):
+            bump_versions('events', [1])
+
+        self.assertEqual(collection_versions('events', [1]), {'1': 2})
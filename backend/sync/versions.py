@@ -0,0 +1,102 @@
+"""
+File: versions.py
+Author: Jason
+Documentation updated by: Jason
+Date: 2026-10-18
+
+This module versions the collections served by the read endpoints so they can answer conditional GETs.
+
+Every write bumps the version of the collections it affects. The read endpoints derive a strong `ETag`
+and a `Last-Modified` header from that version alone, so a `304 Not Modified` is answered with a single
+indexed lookup, before the collection is queried or serialized.
+"""
+import hashlib
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from .models import CollectionVersion
+
+
+def bump_versions(scope, keys):
+    """
+    Increment the version of a collection for each key.
+
+    ::param str scope : The collection that changed, e.g. 'events'
+    ::param iterable keys : The user ids or email addresses whose collection changed
+    """
+    keys = {str(key) for key in keys if key}
+    if not keys:
+        return
+    with transaction.atomic():
+        # Create the missing rows at 0 first, so concurrent first bumps all go through the increment below
+        CollectionVersion.objects.bulk_create(
+            [CollectionVersion(scope=scope, key=key, version=0) for key in sorted(keys)],
+            ignore_conflicts=True,
+        )
+        CollectionVersion.objects.filter(scope=scope, key__in=keys).update(
+            version=F('version') + 1, updated_at=timezone.now()
+        )
+
+
+def collection_versions(scope, keys):
+    """
+    Read the current version of a collection for several keys with one query.
+
+    ::param str scope : The collection, e.g. 'calendar'
+    ::param iterable keys : The user ids, calendar ids or email addresses to read
+    ::return dict(str, int) : The version of each key, 0 for collections that never changed
+    """
+    keys = [str(key) for key in keys]
+    versions = dict(CollectionVersion.objects.filter(scope=scope, key__in=keys).values_list('key', 'version'))
+    return {key: versions.get(key, 0) for key in keys}
+
+
+def collection_validators(scope, key, variant=''):
+    """
+    Build the validators of a collection from its current version.
+
+    ::param str scope : The collection being read, e.g. 'events'
+    ::param str/int key : The user id or email address the collection belongs to
+    ::param str variant : Anything else the representation depends on, e.g. the query string and media type
+    ::return tuple(str, datetime) : The quoted strong ETag and the time of the latest change, `None` if never changed
+    """
+    version, updated_at = CollectionVersion.objects.filter(scope=scope, key=str(key)).values_list(
+        'version', 'updated_at'
+    ).first() or (0, None)
+    digest = hashlib.sha256(f'{scope}:{key}:{version}:{variant}'.encode()).hexdigest()[:32]
+    return quote_etag(digest), updated_at
+
+
+def not_modified(request, validators):
+    """
+    Answer a conditional GET from the validators of a collection.
+
+    ::param HTTPRequest request : The HTTP request object
+    ::param tuple(str, datetime) validators : The validators returned by `collection_validators`
+    ::return HttpResponseNotModified : The `304` response when the client copy is current, `None` otherwise
+    """
+    etag, updated_at = validators
+    last_modified = int(updated_at.timestamp()) if updated_at else None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None or response.status_code != 304:
+        return None
+    return with_validators(response, validators)
+
+
+def with_validators(response, validators):
+    """
+    Set the `ETag` and `Last-Modified` headers of a response.
+
+    ::param HttpResponse response : The response of the read endpoint
+    ::param tuple(str, datetime) validators : The validators returned by `collection_validators`
+    ::return HttpResponse : The same response
+    """
+    etag, updated_at = validators
+    response['ETag'] = etag
+    if updated_at:
+        response['Last-Modified'] = http_date(updated_at.timestamp())
+    # The collections are per user, so only the browser may reuse them
+    response['Cache-Control'] = 'private, no-cache'
+    return response
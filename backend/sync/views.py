@@ -0,0 +1,90 @@
+"""
+File: views.py
+Author: Jason
+Documentation updated by: Jason
+Date: 2026-10-18
+
+This module contains the delta sync endpoint, which returns only the events and calendars changed since a token.
+"""
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status
+from calendars.models import Calendar
+from calendars.membership import visible_calendar_ids
+from calendars.serializers import CalendarSerializer
+from events.models import Event
+from events.views import parse_window, filter_window, list_rows, serialize_events
+from .models import ChangeLogEntry, SyncState
+import logging
+
+logger = logging.getLogger(__name__)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def sync_view(request):
+    """
+    Retrieve the events and calendars created, updated or deleted since a change token.
+
+    Clients start with a full load plus a sync without `since` to obtain a token, then pass the returned token
+    to each following sync. When `reset` is true the token is unknown and the client has to reload everything.
+    Deleting a calendar deletes its events, so clients drop the events of calendars listed as deleted.
+
+    ::param str since : The token returned by the previous sync
+    ::param str/optional start : The first day of the window `repeated_dates` are limited to, as for GET /api/events/
+    ::param str/optional end : The last day (inclusive) of that window
+    ::return Response : A JSON response with the new `token`, the `reset` flag and the upserted and deleted `events` and `calendars`
+    """
+    try:
+        current = SyncState.objects.filter(user=request.user).values_list('version', flat=True).first() or 0
+        try:
+            since = int(request.GET.get('since', ''))
+        except ValueError:
+            since = None
+
+        if since is None or since < 0 or since > current:
+            return Response({'token': str(current), 'reset': True}, status=status.HTTP_200_OK)
+
+        # Collapse the log so only the latest action per object is applied
+        latest = {}
+        entries = ChangeLogEntry.objects.filter(
+            user=request.user, version__gt=since, version__lte=current
+        ).order_by('version').values_list('kind', 'object_id', 'action')
+        for kind, object_id, action in entries:
+            latest[(kind, object_id)] = action
+
+        calendar_ids = {object_id for (kind, object_id), action in latest.items() if kind == 'calendar' and action != 'delete'}
+        refreshed_ids = {object_id for (kind, object_id), action in latest.items() if kind == 'calendar' and action == 'refresh'}
+        event_ids = {object_id for (kind, object_id), action in latest.items() if kind == 'event' and action != 'delete'}
+        deleted_calendar_ids = {object_id for (kind, object_id), action in latest.items() if kind == 'calendar' and action == 'delete'}
+        deleted_event_ids = {object_id for (kind, object_id), action in latest.items() if kind == 'event' and action == 'delete'}
+
+        visible_ids = visible_calendar_ids(request.user)
+        calendars = list(Calendar.objects.filter(cal_id__in=calendar_ids & set(visible_ids))) if calendar_ids else []
+        # Calendars that are no longer visible were unshared or deleted
+        deleted_calendar_ids |= calendar_ids - {calendar.cal_id for calendar in calendars}
+
+        window = parse_window(request)
+        events = Event.objects.filter(cal_id__in=visible_ids)
+        changed_events = events.filter(pk__in=event_ids)
+        if refreshed_ids:
+            changed_events = changed_events | filter_window(events.filter(cal_id__in=refreshed_ids), window)
+        rows = list(list_rows(changed_events.distinct())) if event_ids or refreshed_ids else []
+        deleted_event_ids |= event_ids - {row.id for row in rows}
+
+        return Response({
+            'token': str(current),
+            'reset': False,
+            'events': {
+                'upserted': serialize_events(rows, window),
+                'deleted': sorted(deleted_event_ids),
+            },
+            'calendars': {
+                'upserted': CalendarSerializer(calendars, many=True).data,
+                'deleted': sorted(deleted_calendar_ids),
+            },
+        }, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        logger.exception("Error syncing changes")
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
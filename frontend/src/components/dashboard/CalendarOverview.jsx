@@ -20,7 +20,7 @@ const localizer = momentLocalizer(moment);
  * @returns A div containing the Calendar component
  */
 const CalendarOverview = ({events, isRightBarOpen, setIsRightBarOpen, rightBarContent, setRightBarContent, popupIsOpen }) => {
-  const {calendars, updateEvent, deleteEvent} = useUserContext()
+  const {calendars, updateEvent, deleteEvent, setEventsRange} = useUserContext()
   const [eventDetails, setEventDetails] = useState({}); 
   const [screenWidth, setScreenWidth] = useState(window.innerWidth);
   
@@ -39,6 +39,12 @@ const CalendarOverview = ({events, isRightBarOpen, setIsRightBarOpen, rightBarCo
     }));
   }, [events]);
 
+  // Keep the fetched events window in sync with the range shown by the calendar
+  const handleRangeChange = (range) => {
+    const days = Array.isArray(range) ? range : [range.start, range.end];
+    setEventsRange({ start: days[0], end: days[days.length - 1] });
+  };
+
   const editEventHandler = () => {
     setRightBarContent('update_event');
     setIsRightBarOpen(true);
@@ -118,6 +124,7 @@ const CalendarOverview = ({events, isRightBarOpen, setIsRightBarOpen, rightBarCo
         components={{ toolbar: CustomToolbar }}
         style={{ height: '100%'}}
         onSelectEvent={handleEventSelect}
+        onRangeChange={handleRangeChange}
         eventPropGetter={eventPropGetter}
       />
 
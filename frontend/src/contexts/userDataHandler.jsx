@@ -1,6 +1,6 @@
-import React, { createContext, useState, useEffect, useCallback, useContext } from 'react';
+import React, { createContext, useState, useEffect, useCallback, useContext, useRef } from 'react';
 import { useLocation } from 'react-router-dom';
-import { parseISO, format, addDays, isSameDay, startOfDay, setHours, setMinutes, setSeconds } from 'date-fns';
+import { parseISO, format, addDays, isSameDay, startOfDay, startOfMonth, endOfMonth, setHours, setMinutes, setSeconds } from 'date-fns';
 
 const UserContext = createContext();
 
@@ -51,6 +51,27 @@ const UserProvider = ({ children }) => {
    */
   const [events, setEvents] = useState([]);
 
+  /**
+   * The window of days events are fetched for, kept in sync with the range shown by the calendar.
+   * Defaults to the current month padded by a week on each side.
+   * 
+   * @typedef {object} EventsRange
+   * @property {Date} start - The first day of the window.
+   * @property {Date} end - The last day of the window (inclusive).
+   * 
+   * @type {EventsRange}
+   */
+  const [eventsRange, setEventsRange] = useState(() => {
+    const today = new Date();
+    return { start: addDays(startOfMonth(today), -7), end: addDays(endOfMonth(today), 7) };
+  });
+  const eventsRangeRef = useRef(eventsRange);
+
+  // Builds the bounded events URL so only the events overlapping the window are fetched
+  const eventsUrl = (range = eventsRangeRef.current) => {
+    return `${backend_url}/api/events/?start=${format(range.start, 'yyyy-MM-dd')}&end=${format(range.end, 'yyyy-MM-dd')}`;
+  };
+
 
   /**
    * Invitation object representing a calendar invitation sent to a user.
@@ -112,7 +133,7 @@ const UserProvider = ({ children }) => {
       fetchData(`${backend_url}/api/calendars/`, setCalendars);
     },
     events: () => {
-      fetchData(`${backend_url}/api/events/`, setEvents);
+      fetchData(eventsUrl(), setEvents);
     },
     invitations: () => {
       fetchData(`${backend_url}/api/invitations/`, setInvitations);
@@ -161,23 +182,50 @@ const UserProvider = ({ children }) => {
     });
   };
 
+  // Media type of the compact columnar events layout served by /api/events/
+  const COLUMNAR_EVENTS_TYPE = 'application/vnd.timemesh.columnar+json';
+
+  // Expands the columnar events payload back into the list of Event objects
+  const decodeColumnarEvents = ({ count, strings, colors, columns }) => {
+    const toISO = (seconds) => (seconds === null ? null : new Date(seconds * 1000).toISOString());
+    const toString = (index) => (index === null ? null : strings[index]);
+    return Array.from({ length: count }, (_, i) => ({
+      id: columns.id[i],
+      cal_id: columns.cal_id[i],
+      title: toString(columns.title[i]),
+      description: toString(columns.description[i]),
+      start: toISO(columns.start[i]),
+      end: toISO(columns.end[i]),
+      bg_color: colors[columns.bg_color[i]],
+      user: columns.user[i],
+      repeat_type: toString(columns.repeat_type[i]),
+      repeat_until: toISO(columns.repeat_until[i]),
+      repeat_days: columns.repeat_days[i],
+      repeated_dates: columns.repeated_dates[i].map(toISO),
+    }));
+  };
+
   {/* Beginning of User Data Fetching */}
   // Reusable function to fetch data from the API and set the corresponding state
   const fetchData = async (url, setState, setState2 = null) => {
+    const isEventsUrl = url.includes('/api/events/');
     try {
       const response = await fetch(url, {
         method: 'GET',
         headers: {
           'Content-Type': 'application/json',
           'Authorization': `Token ${user.token}`,
+          // Events are requested in the compact columnar layout
+          ...(isEventsUrl && { 'Accept': COLUMNAR_EVENTS_TYPE }),
         },
       });
 
       const data = await response.json();
 
       if (response.ok) {
-        if (url.includes('/api/events/')) {
-          const processedEvents = processEvents(data);
+        if (isEventsUrl) {
+          const events = response.headers.get('Content-Type')?.startsWith(COLUMNAR_EVENTS_TYPE) ? decodeColumnarEvents(data) : data;
+          const processedEvents = processEvents(events);
           setState(processedEvents);
           if (setState2) setState2(processedEvents);
         } else {
@@ -197,12 +245,18 @@ const UserProvider = ({ children }) => {
   useEffect(() => {
     if (user && user.token) {
       fetchData(`${backend_url}/api/calendars/`, setCalendars);
-      fetchData(`${backend_url}/api/events/`, setEvents);
       fetchData(`${backend_url}/api/invitations/`, setInvitations);
       fetchData(`${backend_url}/api/calendars/shared/`, setSharedCalendars);
     }
   }, [user?.token]);
 
+  useEffect(() => {
+    eventsRangeRef.current = eventsRange;
+    if (user && user.token) {
+      fetchData(eventsUrl(eventsRange), setEvents);
+    }
+  }, [user?.token, eventsRange]);
+
   {/* Beginning of Event CRUD Requests */}
   // Check for valid end and start time
   const isEndTimeAfterStartTime = (start, end) => {
@@ -469,7 +523,7 @@ const UserProvider = ({ children }) => {
         // console.log('Invitation accepted:', data);
         // Update invitations state to reflect the change
         setInvitations(prevInvitations => prevInvitations.filter(invite => invite.token !== invite_token));
-        fetchData(`${backend_url}/api/events/`, setEvents);
+        fetchData(eventsUrl(), setEvents);
         fetchData(`${backend_url}/api/calendars/shared/`, setSharedCalendars);
         alert('Invitation Acceptance Successful!');
       } else {
@@ -534,6 +588,23 @@ const UserProvider = ({ children }) => {
     }
   }
 
+  const pollImportJob = async (jobId, interval = 1500) => {
+    // Resolves with the job status once the import has succeeded or failed
+    while (true) {
+      const response = await fetch(`${backend_url}/api/calendars/import/${jobId}/`, {
+        headers: { 'Authorization': `Token ${user.token}` },
+      });
+      if (!response.ok) {
+        throw new Error(`Error ${response.status}: ${await response.text()}`);
+      }
+      const job = await response.json();
+      if (job.status === 'succeeded' || job.status === 'failed') {
+        return job;
+      }
+      await new Promise(resolve => setTimeout(resolve, interval));
+    }
+  };
+
   const postImportCal = async (importCalenderDetails) => {
     // console.log("Processing Import Request:", importCalenderDetails);
     alert("Processing Import Request May Take a Few Seconds")
@@ -561,15 +632,19 @@ const UserProvider = ({ children }) => {
             throw new Error(`Error ${response.status}: ${errorText}`);
         }
 
-        // Parse the JSON response
-        const data = await response.json();
-        // console.log("Import Successful:", data);
+        // The import runs in the background, poll its job until it finishes
+        const { job_id } = await response.json();
+        const job = await pollImportJob(job_id);
+        if (job.status === 'failed') {
+            throw new Error(job.failure);
+        }
 
         // Handle the successful response, e.g., show a message or update UI
-        // Example: display a success message
         fetchData(`${backend_url}/api/calendars/`, setCalendars);
-        fetchData(`${backend_url}/api/events/`, setEvents);  
-        alert('Import successful!');
+        fetchData(eventsUrl(), setEvents);  
+        alert(job.errors.length
+            ? `Imported ${job.imported} events, ${job.errors.length} could not be imported.`
+            : 'Import successful!');
     } catch (error) {
         console.error("Error during import:", error.message);
         // Handle or display the error as needed
@@ -579,49 +654,125 @@ const UserProvider = ({ children }) => {
 
   
 
-  const postExportCal = async (exportCalenderDetails, filteredEvents) => {
-    // console.log("Processing Export Request:", filteredEvents);
-    alert("Processing Export Request May Take a Few Seconds")
+  const postExportCal = async (exportCalenderDetails, calendarIds) => {
+    // Each selected calendar is exported by the server straight from the database
+    try {
+      for (const calId of calendarIds) {
+        const response = await fetch(`${backend_url}/api/calendars/${calId}/export.ics`, {
+          method: 'GET',
+          headers: {
+            'Authorization': `Token ${user.token}`,
+          },
+        });
+  
+        if (!response.ok) {
+          // Handle response errors, e.g., 4xx or 5xx HTTP status codes
+          const errorText = await response.text();
+          throw new Error(`Error ${response.status}: ${errorText}`);
+        }
+  
+        // Handle the file download
+        const blob = await response.blob();
+        const url = window.URL.createObjectURL(blob);
+        const link = document.createElement('a');
+        link.href = url;
+        link.download = calendarIds.length > 1
+          ? `${exportCalenderDetails.title}-${calId}.ics`
+          : `${exportCalenderDetails.title}.ics`; // Set the file name for the downloaded file
+        document.body.appendChild(link);
+        link.click();
+        link.remove();
+  
+        // Optionally, revoke the object URL after the download
+        window.URL.revokeObjectURL(url);
+      }
+  
+    } catch (error) {
+      console.error("Error during export:", error.message);
+      // Handle or display the error as needed
+    }
+  };
+  
+
+
+  const postCalendarFeed = async (calId) => {
+    // Enables (or rotates) the subscription URL of a calendar for Google/Apple/Outlook
+    try {
+      const response = await fetch(`${backend_url}/api/calendars/${calId}/feed/`, {
+        method: 'POST',
+        headers: { 'Authorization': `Token ${user.token}` },
+      });
+      if (!response.ok) {
+        throw new Error(`Error ${response.status}: ${await response.text()}`);
+      }
+      const { feed_url } = await response.json();
+      return feed_url;
+    } catch (error) {
+      console.error("Error enabling calendar feed:", error.message);
+      return null;
+    }
+  };
+
+  const postFreeBusy = async ({ emails = [], calendars = [], start, end, minDuration = 0 }) => {
+    // Returns the busy blocks of each participant and the slots they all have free
     try {
-      const response = await fetch(`${backend_url}/api/calendars/export/`, {
+      const response = await fetch(`${backend_url}/api/freebusy/`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
           'Authorization': `Token ${user.token}`,
         },
-        body: JSON.stringify({ 
-          cal_title: exportCalenderDetails.title,
-          events: filteredEvents
-        }),
+        body: JSON.stringify({ emails, calendars, start, end, min_duration: minDuration }),
       });
-  
       if (!response.ok) {
-        // Handle response errors, e.g., 4xx or 5xx HTTP status codes
-        const errorText = await response.text();
-        throw new Error(`Error ${response.status}: ${errorText}`);
+        throw new Error(`Error ${response.status}: ${await response.text()}`);
       }
-  
-      // Handle the file download
-      const blob = await response.blob();
-      // console.log("Result: ", blob)
-      const url = window.URL.createObjectURL(blob);
-      const link = document.createElement('a');
-      link.href = url;
-      link.download = 'calendar.ics'; // Set the file name for the downloaded file
-      document.body.appendChild(link);
-      link.click();
-      link.remove();
-  
-      // Optionally, revoke the object URL after the download
-      window.URL.revokeObjectURL(url);
-  
+      return await response.json();
     } catch (error) {
-      console.error("Error during export:", error.message);
-      // Handle or display the error as needed
+      console.error("Error fetching free/busy:", error.message);
+      return null;
     }
   };
-  
 
+  const postSlotSuggestions = async ({ emails = [], calendars = [], start, end, duration, count = 5, buffer = 0, step = 15, timezone, workingHours, onSlot }) => {
+    // Streams the best meeting slots, one JSON line each; onSlot is called as soon as a slot arrives
+    const slots = [];
+    try {
+      const body = { emails, calendars, start, end, duration, count, buffer, step,
+        timezone: timezone || Intl.DateTimeFormat().resolvedOptions().timeZone };
+      if (workingHours !== undefined) body.working_hours = workingHours;
+      const response = await fetch(`${backend_url}/api/freebusy/suggestions/`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          'Authorization': `Token ${user.token}`,
+        },
+        body: JSON.stringify(body),
+      });
+      if (!response.ok) {
+        throw new Error(`Error ${response.status}: ${await response.text()}`);
+      }
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffered = '';
+      for (;;) {
+        const { done, value } = await reader.read();
+        buffered += decoder.decode(value || new Uint8Array(), { stream: !done });
+        const lines = buffered.split('\n');
+        buffered = lines.pop();
+        for (const line of lines.filter(Boolean)) {
+          const slot = JSON.parse(line);
+          slots.push(slot);
+          if (onSlot) onSlot(slot);
+        }
+        if (done) break;
+      }
+      return slots;
+    } catch (error) {
+      console.error("Error fetching slot suggestions:", error.message);
+      return slots;
+    }
+  };
 
   return (
     <UserContext.Provider
@@ -634,6 +785,7 @@ const UserProvider = ({ children }) => {
         postAI,
         setCalendars,
         setEvents,
+        setEventsRange,
         setMessages,
         addEvent,
         addCalendar,
@@ -644,6 +796,9 @@ const UserProvider = ({ children }) => {
         acceptInvitation,
         postImportCal,
         postExportCal,
+        postCalendarFeed,
+        postFreeBusy,
+        postSlotSuggestions,
         processEvents,
       }}
     >
@@ -164,7 +164,7 @@ const Dashboards = () => {
   }
 
   const clickedExportCalendar = (exportCalenderDetails) => {
-    postExportCal(exportCalenderDetails, filteredEvents)
+    postExportCal(exportCalenderDetails, activeItems)
     setIsRightBarOpen(false);
   }
 